@@ -0,0 +1,122 @@
+from datetime import date
+
+from flask import Blueprint, render_template, jsonify, current_app
+from sqlalchemy import func
+
+from app import db, Venue, Artist, ShowRollup
+
+bp = Blueprint('analytics', __name__)
+
+
+def last_months(count, today=None):
+    """The ``count`` months up to and including this one, as "YYYY-MM",
+    oldest first."""
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1
+    return [f'{i // 12:04d}-{i % 12 + 1:02d}'
+            for i in range(index - count + 1, index + 1)]
+
+
+def rollup_grid(dimension, months, top):
+    """``(keys, grid)`` of the ``top`` keys of ``dimension`` with the
+    most shows over ``months``, busiest first, and their shows per key
+    and month as a NumPy array."""
+    import numpy as np
+
+    window = (ShowRollup.dimension == dimension,
+              ShowRollup.month.in_(months))
+    busiest = db.session.query(ShowRollup.key).filter(*window) \
+        .group_by(ShowRollup.key) \
+        .order_by(func.sum(ShowRollup.shows).desc(), ShowRollup.key) \
+        .limit(top)
+    rows = db.session.query(
+        ShowRollup.key, ShowRollup.month, ShowRollup.shows
+    ).filter(*window, ShowRollup.key.in_(busiest.scalar_subquery())).all()
+
+    keys = sorted({row.key for row in rows})
+    grid = np.zeros((len(keys), len(months)), dtype=np.int64)
+    if rows:
+        np.add.at(grid, (np.searchsorted(keys, [row.key for row in rows]),
+                         [months.index(row.month) for row in rows]),
+                  [row.shows for row in rows])
+    order = np.lexsort((np.arange(len(keys)), -grid.sum(axis=1)))
+    return [keys[i] for i in order], grid[order]
+
+
+def utilisation(months):
+    """Per month, how many artists played at least once, their share
+    of all artists and their shows per head."""
+    import numpy as np
+
+    rows = db.session.query(
+        ShowRollup.month, func.count(), func.sum(ShowRollup.shows)
+    ).filter(
+        ShowRollup.dimension == 'artist', ShowRollup.month.in_(months),
+        ShowRollup.shows > 0
+    ).group_by(ShowRollup.month).all()
+    active = np.zeros(len(months), dtype=np.int64)
+    shows = np.zeros(len(months), dtype=np.int64)
+    for month, artists, total in rows:
+        active[months.index(month)] = artists
+        shows[months.index(month)] = total
+    artists = db.session.query(func.count(Artist.id)).scalar()
+    share = active / max(artists, 1)
+    per_artist = np.divide(shows, active, out=np.zeros(len(months)),
+                           where=active > 0)
+    return [{
+        "month": month,
+        "active_artists": int(active[i]),
+        "share": round(float(share[i]), 4),
+        "shows_per_artist": round(float(per_artist[i]), 2)
+    } for i, month in enumerate(months)]
+
+
+def analytics_data():
+    # Every figure is read from the ShowRollup table, whose size grows
+    # with venues, artists and months rather than with shows.
+    config = current_app.config
+    months = last_months(config['ANALYTICS_MONTHS'])
+    top = config['ANALYTICS_TOP']
+
+    _, monthly = rollup_grid('all', months, 1)
+    totals = monthly[0] if len(monthly) else [0] * len(months)
+    total = int(sum(totals))
+
+    venue_keys, venue_grid = rollup_grid('venue', months, top)
+    names = dict(db.session.query(Venue.id, Venue.name).filter(
+        Venue.id.in_([int(key) for key in venue_keys])))
+    city_keys, city_grid = rollup_grid('city', months, top)
+    genre_keys, genre_grid = rollup_grid('genre', months, top)
+
+    return {
+        "months": months,
+        "shows": [int(count) for count in totals],
+        "venues": [{
+            "id": int(key),
+            "name": names.get(int(key)),
+            "shows": [int(count) for count in row],
+            "total": int(row.sum())
+        } for key, row in zip(venue_keys, venue_grid)],
+        "cities": [{
+            "city": key,
+            "shows": [int(count) for count in row],
+            "total": int(row.sum())
+        } for key, row in zip(city_keys, city_grid)],
+        "genres": [{
+            "genre": key,
+            "total": int(row.sum()),
+            # Shows of multi-genre artists count once per genre.
+            "share": round(int(row.sum()) / max(total, 1), 4)
+        } for key, row in zip(genre_keys, genre_grid)],
+        "utilisation": utilisation(months)
+    }
+
+
+@bp.route('/analytics')
+def analytics():
+    return render_template('pages/analytics.html', data=analytics_data())
+
+
+@bp.route('/api/analytics')
+def analytics_json():
+    return jsonify(analytics_data())
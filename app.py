@@ -2,39 +2,235 @@
 # Imports
 # ----------------------------------------------------------------------------#
 
+import base64
+import click
 import json
-import dateutil.parser
-import babel
-from flask import Flask, render_template, request, Response, \
-    flash, redirect, url_for, abort
+import os
+import re
+import weakref
+from datetime import datetime, timedelta
+from functools import wraps
+from time import perf_counter
+from urllib.parse import urlencode
+from flask import Flask, Blueprint, render_template, request, Response, \
+    abort, jsonify, session, stream_with_context, g, has_request_context, \
+    current_app
 from flask_moment import Moment
+from jinja2 import FileSystemBytecodeCache
 from flask_sqlalchemy import SQLAlchemy
 import logging
 from logging import Formatter, FileHandler
-from forms import *
-from sqlalchemy import func
-from flask_wtf import *
-from wtforms import *
-from datetime import *
+from filters import format_datetime
+from suggest import PrefixIndex
+from cache import PageCache, DiskCache
+from assets import bundle_urls
+from pool import MeteredQueuePool, pool_stats
+from metrics import RequestMetrics
+from sqlalchemy import event, func, tuple_, and_, or_, text, literal, \
+    literal_column, union_all, column
 from flask_migrate import Migrate
+from sqlalchemy.engine import Engine, make_url
 
 # ----------------------------------------------------------------------------#
 # App Config.
 # ----------------------------------------------------------------------------#
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object('config')
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+moment = Moment()
+db = SQLAlchemy()
+migrate = Migrate()
+
+
+def create_app(config='config', **settings):
+    """Build the app from ``config`` (an import name or object), with
+    ``settings`` overriding it.
+
+    Nothing here touches the database, so the app can be built in a
+    gunicorn master with --preload and forked into workers:
+
+        $ gunicorn --preload -w 4 'app:create_app()'
+    """
+    app = Flask(__name__)
+    app.config.from_object(config)
+    app.config.update(settings)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    if not app.config.get('SECRET_KEY'):
+        app.config['SECRET_KEY'] = instance_secret_key(app)
+
+    moment.init_app(app)
+    db.init_app(app)
+    migrate.init_app(app, db)
+    page_cache.init_app(app)
+    suggestions.configure(app.config['SUGGEST_REFRESH'])
+    thumbnail_cache.configure(
+        app.config.get('THUMBNAIL_CACHE_DIR') or
+        os.path.join(app.instance_path, 'thumbnails'),
+        app.config['THUMBNAIL_CACHE_BYTES'])
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(
+        template_cache_dir(app))
+    app.jinja_env.filters['datetime'] = format_datetime
+    app.jinja_env.globals['bundle_urls'] = bundle_urls
+
+    from venues import bp as venues
+    from artists import bp as artists
+    from shows import bp as shows
+    from analytics import bp as analytics
+    from assets import bp as assets
+    from images import bp as images
+    app.register_blueprint(main)
+    app.register_blueprint(venues)
+    app.register_blueprint(artists)
+    app.register_blueprint(shows)
+    app.register_blueprint(analytics)
+    app.register_blueprint(assets)
+    app.register_blueprint(images)
+
+    app.before_request(start_request_timer)
+    app.after_request(record_request)
+    app.register_error_handler(404, not_found_error)
+    app.register_error_handler(500, server_error)
+
+    from importer import import_command
+    from export import export_command
+    from geo import geocode_command
+    from recommend import recommend_command
+    from assets import build_assets_command
+    app.cli.add_command(refresh_show_counts_command)
+    app.cli.add_command(refresh_rollups_command)
+    app.cli.add_command(check_query_plans)
+    app.cli.add_command(import_command)
+    app.cli.add_command(export_command)
+    app.cli.add_command(geocode_command)
+    app.cli.add_command(recommend_command)
+    app.cli.add_command(build_assets_command)
+    app.cli.add_command(warm_templates_command)
+
+    configure_logging(app)
+    if app.config['WARM_TEMPLATES']:
+        for name, seconds in warm_templates(app):
+            app.logger.debug('template %s compiled in %.1f ms', name,
+                             seconds * 1000)
+
+    with app.app_context():
+        engine = db.engine
+    engines.add(engine)
+    if engine.dialect.name == 'postgresql' and \
+            app.config['DB_STATEMENT_TIMEOUT']:
+        event.listen(engine, 'begin',
+                     request_statement_timeout(
+                         app.config['DB_STATEMENT_TIMEOUT']))
+    return app
+
+
+# Engines of the apps built, workers forked after --preload must not
+# share the parent's pooled connections: each drops them and opens its
+# own.
+engines = weakref.WeakSet()
+os.register_at_fork(after_in_child=lambda: [
+    engine.dispose(close=False) for engine in list(engines)])
+
+
+def request_statement_timeout(timeout):
+    """``begin`` listener that has Postgres cancel the statements of a
+    request's transactions after ``timeout`` milliseconds. CLI commands
+    such as imports and rollups run without the limit."""
+    def begin(connection):
+        if has_request_context():
+            connection.exec_driver_sql(
+                f'SET LOCAL statement_timeout = {int(timeout)}')
+    return begin
+
+
+def engine_options(config):
+    """Engine options for the final SQLALCHEMY_DATABASE_URI, so a
+    database passed to create_app gets options it accepts."""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {}
+    if url.get_backend_name() != 'sqlite' or \
+            url.database not in (None, '', ':memory:'):
+        # Record how long requests wait for a pooled connection.
+        options.update(
+            poolclass=MeteredQueuePool, pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+            pool_pre_ping=config['DB_POOL_PRE_PING'])
+    options.update(config['SQLALCHEMY_ENGINE_OPTIONS'])
+    return options
+
+
+def instance_secret_key(app):
+    """Key generated once in the instance folder, so sessions and
+    flashes survive restarts and work across workers."""
+    path = os.path.join(app.instance_path, 'secret_key')
+    if not os.path.exists(path):
+        os.makedirs(app.instance_path, exist_ok=True)
+        # Written aside and linked in place, so a concurrent worker
+        # either wins the race or reads the complete winner.
+        partial = f'{path}.{os.getpid()}'
+        fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(os.urandom(32))
+        try:
+            os.link(partial, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(partial)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def template_cache_dir(app):
+    path = app.config.get('TEMPLATE_CACHE_DIR') or \
+        os.path.join(app.instance_path, 'jinja')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def warm_templates(app):
+    """Load every template into the environment's cache, from cached
+    bytecode when there is some, and return ``(name, seconds)`` for
+    each, slowest first."""
+    timings = []
+    for name in app.jinja_env.list_templates(
+            filter_func=lambda name: name.endswith('.html')):
+        started = perf_counter()
+        app.jinja_env.get_template(name)
+        timings.append((name, perf_counter() - started))
+    return sorted(timings, key=lambda timing: -timing[1])
 
-# TODO: connect to a local postgresql database
 
 # ----------------------------------------------------------------------------#
 # Models.
 # ----------------------------------------------------------------------------#
 
 
+venue_genres = db.Table(
+    'venue_genres',
+    db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id'),
+              primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id'),
+              primary_key=True),
+    db.Index('ix_venue_genres_genre_id', 'genre_id', 'venue_id')
+)
+
+artist_genres = db.Table(
+    'artist_genres',
+    db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id'),
+              primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id'),
+              primary_key=True),
+    db.Index('ix_artist_genres_genre_id', 'genre_id', 'artist_id')
+)
+
+
+class Genre(db.Model):
+    __tablename__ = 'Genre'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+
 class Venue(db.Model):
     __tablename__ = 'Venue'
 
@@ -44,13 +240,33 @@ class Venue(db.Model):
     state = db.Column(db.String(120))
     address = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
+    genres = db.relationship('Genre', secondary=venue_genres,
+                             order_by='Genre.name', lazy='selectin')
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(120))
+    upcoming_shows_count = db.Column(db.Integer, nullable=False,
+                                     default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False,
+                                 default=0, server_default='0')
     shows = db.relationship('Show', backref="Venue", lazy=True)
+    updated_at = db.Column(db.DateTime, index=True,
+                           default=func.now(), onupdate=func.now())
+    version = db.Column(db.Integer, nullable=False, default=1,
+                        server_default='1')
+    # Set by ``flask geocode``, geocell is the grid cell of geo.py the
+    # coordinates fall in.
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geocell = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.Index('ix_venue_state_city_name_id', 'state', 'city', 'name',
+                 'id'),
+        db.Index('ix_venue_geocell', 'geocell', 'latitude', 'longitude'),
+    )
 
     # TODO: implement any missing fields, as a database
     # migration using Flask-Migrate
@@ -64,13 +280,39 @@ class Artist(db.Model):
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
+    genres = db.relationship('Genre', secondary=artist_genres,
+                             order_by='Genre.name', lazy='selectin')
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(120))
     website = db.Column(db.String(120))
+    upcoming_shows_count = db.Column(db.Integer, nullable=False,
+                                     default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False,
+                                 default=0, server_default='0')
     shows = db.relationship('Show', backref="Artist", lazy=True)
+    updated_at = db.Column(db.DateTime, index=True,
+                           default=func.now(), onupdate=func.now())
+    version = db.Column(db.Integer, nullable=False, default=1,
+                        server_default='1')
+
+    __table_args__ = (
+        db.Index('ix_artist_name_id', 'name', 'id'),
+    )
+
+
+# Longest show accepted. Overlap lookups only scan the shows starting
+# this long before the interval they check, lowering it would miss
+# conflicts with longer shows already booked.
+MAX_SHOW_MINUTES = 24 * 60
+
+
+def default_end_time(context):
+    start_time = context.get_current_parameters()['start_time']
+    if start_time is not None:
+        return start_time + timedelta(
+            minutes=current_app.config['SHOW_MINUTES'])
 
 
 class Show(db.Model):
@@ -80,563 +322,812 @@ class Show(db.Model):
     artist_id = db.Column(db.Integer, db.ForeignKey(
         'Artist.id'), nullable=False)
     start_time = db.Column(db.DateTime)
+    # A show holds its venue and artist over [start_time, end_time). On
+    # Postgres exclusion constraints reject overlapping bookings.
+    end_time = db.Column(db.DateTime, default=default_end_time)
+    updated_at = db.Column(db.DateTime, index=True,
+                           default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_show_start_time_id', 'start_time', 'id'),
+    )
+
+
+class Recommendation(db.Model):
+    """The ``target`` artists or venues closest to one ``source`` artist
+    or venue by where artists play, best first. Written by ``flask
+    recommend``, see recommend.py."""
+    __tablename__ = 'Recommendation'
+    source = db.Column(db.String(6), primary_key=True)
+    source_id = db.Column(db.Integer, primary_key=True)
+    target = db.Column(db.String(6), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    target_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class ShowRollup(db.Model):
+    """Shows per calendar month ("YYYY-MM") of one venue, city, artist
+    genre or artist, and in total, read by the analytics dashboard.
+    Kept in step with ORM show inserts and deletes, rebuilt by
+    ``flask refresh-rollups``."""
+    __tablename__ = 'ShowRollup'
+    dimension = db.Column(db.String(6), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)
+    key = db.Column(db.String(250), primary_key=True)
+    shows = db.Column(db.Integer, nullable=False)
+
+
+db.Index('ix_venue_name_lower', func.lower(Venue.name))
+db.Index('ix_artist_name_lower', func.lower(Artist.name))
 
 # TODO:implement any missing fields,
 # as a database migration using Flask-Migrate
 # TODO Implement Show and Artist models, and complete all model relationships
 # and properties, as a database migration.
 
-# ----------------------------------------------------------------------------#
-# Filters.
-# ----------------------------------------------------------------------------#
-
 
-def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(value)
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format, locale='en')
+def adjust_show_counts(connection, show, delta):
+    # Keeps the upcoming/past counters of the show's venue and artist
+    # in step with ORM inserts and deletes of shows.
+    if show.start_time is None:
+        return
+    if show.start_time > datetime.now():
+        column = 'upcoming_shows_count'
+    else:
+        column = 'past_shows_count'
+    for model, id in ((Venue, show.venue_id), (Artist, show.artist_id)):
+        counter = getattr(model, column)
+        connection.execute(model.__table__.update()
+                           .where(model.id == id)
+                           .values({counter: counter + delta,
+                                    model.version: model.version + 1}))
+
+
+def adjust_rollups(connection, show, delta):
+    # One lookup for the venue's city and the artist's genres, one
+    # upsert for every rollup the show counts in.
+    if show.start_time is None:
+        return
+    rows = connection.execute(
+        db.select(Venue.city, Venue.state, Genre.name)
+        .select_from(Venue)
+        .outerjoin(artist_genres, artist_genres.c.artist_id == show.artist_id)
+        .outerjoin(Genre, Genre.id == artist_genres.c.genre_id)
+        .where(Venue.id == show.venue_id)).all()
+    keys = [('all', ''), ('venue', str(show.venue_id)),
+            ('artist', str(show.artist_id))]
+    if rows:
+        keys.append(('city', f'{rows[0].city}, {rows[0].state}'))
+        keys += [('genre', row.name) for row in rows if row.name]
+    month = f'{show.start_time:%Y-%m}'
+    table = ShowRollup.__table__
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    upsert = insert(table)
+    connection.execute(
+        upsert.on_conflict_do_update(
+            index_elements=['dimension', 'month', 'key'],
+            set_={'shows': table.c.shows + upsert.excluded.shows}),
+        [{'dimension': dimension, 'month': month, 'key': key,
+          'shows': delta} for dimension, key in keys])
+
+
+@event.listens_for(Show, 'after_insert')
+def count_inserted_show(mapper, connection, show):
+    adjust_show_counts(connection, show, 1)
+    adjust_rollups(connection, show, 1)
+
+
+@event.listens_for(Show, 'after_delete')
+def count_deleted_show(mapper, connection, show):
+    adjust_show_counts(connection, show, -1)
+    adjust_rollups(connection, show, -1)
+
+
+def refresh_show_counts(now=None):
+    """Recompute every upcoming/past counter with one UPDATE per table,
+    moving shows that started since the last run into the past. Only
+    rows whose counts changed are written."""
+    now = now or datetime.now()
+    for model, fk in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        shows = db.session.query(func.count(Show.id)) \
+            .filter(fk == model.id)
+        upcoming = shows.filter(Show.start_time > now).scalar_subquery()
+        past = shows.filter(Show.start_time <= now).scalar_subquery()
+        db.session.execute(model.__table__.update().where(or_(
+            model.upcoming_shows_count != upcoming,
+            model.past_shows_count != past
+        )).values(upcoming_shows_count=upcoming, past_shows_count=past,
+                  version=model.version + 1))
+    db.session.commit()
 
 
-app.jinja_env.filters['datetime'] = format_datetime
+def month_of(column):
+    """SQL for the "YYYY-MM" month of a datetime column."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.to_char(column, 'YYYY-MM')
+    return func.strftime('%Y-%m', column)
+
+
+def refresh_rollups():
+    """Rebuild ShowRollup from Show with one grouped INSERT ... SELECT
+    per dimension, after bulk loads that bypass the ORM events."""
+    month = month_of(Show.start_time).label('month')
+    shows = func.count(Show.id).label('shows')
+    dimensions = {
+        'all': (literal(''), []),
+        'venue': (db.cast(Show.venue_id, db.String), []),
+        'artist': (db.cast(Show.artist_id, db.String), []),
+        'city': (Venue.city + ', ' + Venue.state,
+                 [(Venue, Venue.id == Show.venue_id)]),
+        'genre': (Genre.name,
+                  [(artist_genres, artist_genres.c.artist_id ==
+                    Show.artist_id),
+                   (Genre, Genre.id == artist_genres.c.genre_id)]),
+    }
+    table = ShowRollup.__table__
+    db.session.execute(table.delete())
+    for dimension, (key, joins) in dimensions.items():
+        query = db.select(literal(dimension), month, key.label('key'),
+                          shows).select_from(Show)
+        for target, on in joins:
+            query = query.join(target, on)
+        query = query.where(Show.start_time.isnot(None)) \
+            .group_by(month, key)
+        db.session.execute(table.insert().from_select(
+            ['dimension', 'month', 'key', 'shows'], query))
+    db.session.commit()
 
 # ----------------------------------------------------------------------------#
-# Controllers.
+# Helpers.
 # ----------------------------------------------------------------------------#
 
 
-@app.route('/')
-def index():
-    return render_template('pages/home.html')
-
+def encode_cursor(values):
+    # Opaque, url-safe token holding the sort key of a row.
+    values = [v.isoformat() if isinstance(v, datetime) else v
+              for v in values]
+    return base64.urlsafe_b64encode(
+        json.dumps(values).encode()).decode().rstrip('=')
 
-#  Venues
-#  ----------------------------------------------------------------
 
-@app.route('/venues')
-def venues():
-    # TODO: replace with real venues data.
-    # num_shows should be aggregated based
-    # on number of upcoming shows per venue.
-    data = []
-    venues_location = db.session.query(Venue.city, Venue.state).distinct()
-    for venue in venues_location:
-        filtered_venues = Venue.query.filter_by(
-            state=venue.state).filter_by(city=venue.city).all()
-        venuesPerEachCity = []
-        for venue in filtered_venues:
-            venuesPerEachCity.append({
-                "id": venue.id,
-                "name": venue.name,
-                "upcoming_shows": len(db.session.query(Show)
-                                      .filter(Show.venue_id == venue.id)
-                                      .filter(Show.start_time > datetime.now())
-                                      .all())
-            })
-
-        data.append({
-            "city": venue.city,
-            "state": venue.state,
-            "venues": venuesPerEachCity
-        })
-    return render_template('pages/venues.html', areas=data)
-
-
-@app.route('/venues/search', methods=['POST'])
-def search_venues():
-    # TODO: implement search on artists with partial string search.
-    # Ensure it is case-insensitive.
-    # seach for Hop should return "The Musical Hop".
-    # search for "Music" should return "The Musical Hop"
-    # and "Park Square Live Music & Coffee"
-    search_term = request.form.get('search_term', '')
-    results = db.session.query(Venue).filter(
-        Venue.name.ilike(f'%{search_term}%')).all()
-    data = []
-    for r in results:
-        data.append({
-            "id": r.id,
-            "name": r.name,
-            "upcoming_shows": len(db.session.query(Show)
-                                    .filter(Show.venue_id == r.id)
-                                    .filter(Show.start_time > datetime.now())
-                                    .all())
-        })
-
-    response = {
-        "count": len(results),
-        "data": data
-    }
-    return render_template('pages/search_venues.html', results=response,
-                           search_term=request.form.get('search_term', ''))
-
-
-@app.route('/venues/<int:venue_id>')
-def show_venue(venue_id):
-    # shows the venue page with the given venue_id
-    # TODO: replace with real venue data from the venues table, using venue_id
+def decode_cursor(token, columns):
     try:
-
-        venue = Venue.query.get(venue_id)
-        data = []
-        upcoming = '''db.session.query(Show).join(Artist)
-        .filter(Show.venue_id == venue_id)
-        .filter(Show.start_time > datetime.now()).all()'''
-        upcomingShows = []
-
-        past = ''' db.session.query(Show).join(Artist)
-        .filter(Show.venue_id == venue_id)
-        .filter(Show.start_time < datetime.now()).all()'''
-        pastShows = []
-
-        for u in upcoming:
-            upcomingShows.append({
-                "artist_id": u.Artist.id,
-                "artist_name": u.Artist.name,
-                "artist_image_link": u.Artist.image_link,
-                "start_time": u.start_time.strftime("%Y-%m-%d, %H:%M:%S")
-            })
-
-        for p in past:
-            pastShows.append({
-                "artist_id": p.Artist.id,
-                "artist_name": p.Artist.name,
-                "artist_image_link": p.Artist.image_link,
-                "start_time": p.start_time.strftime("%Y-%m-%d, %H:%M:%S")
-            })
-
-        data = [{
-            "id": venue.id,
-            "name": venue.name,
-            "genres": (venue.genres),
-            "address": venue.address,
-            "city": venue.city,
-            "state": venue.state,
-            "phone": venue.phone,
-            "website": venue.website,
-            "facebook_link": venue.facebook_link,
-            "seeking_talent": venue.seeking_talent,
-            "seeking_description": venue.seeking_description,
-            "image_link": venue.image_link,
-            "past_shows": pastShows,
-            "upcoming_shows": upcomingShows,
-            "past_shows_count": len(past),
-            "upcoming_shows_count": len(upcoming)
-        }]
-
-        data = list(filter(lambda d: d['id'] == venue_id, data))[0]
-        return render_template('pages/show_venue.html', venue=data)
-    except:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(token)
+        return [cursor_value(v, column)
+                for v, column in zip(values, columns)]
+    except (ValueError, TypeError):
+        abort(400)
+
+
+def cursor_value(value, column):
+    """``value`` of a decoded cursor as ``column``'s Python type. Raises
+    TypeError when the JSON type does not fit the column."""
+    python_type = column.type.python_type
+    if value is None:
+        return None
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is float and type(value) is int:
+        return float(value)
+    # bool is an int, but never a cursor value.
+    if type(value) is not python_type or \
+            python_type not in (str, int, float):
+        raise TypeError(f'{value!r} is no {python_type.__name__}')
+    return value
+
+
+def keyset_page(query, columns, per_page, before=None, after=None):
+    """Return one page of ``query`` ordered by ``columns``.
+
+    Pages are addressed by keyset cursors instead of OFFSET, so every
+    page costs one index range scan no matter how deep it is.
+    Returns ``(rows, prev_cursor, next_cursor)``.
+    """
+    key = tuple_(*columns)
+    if before:
+        query = query.filter(key < tuple_(*decode_cursor(before, columns)))
+        query = query.order_by(*[c.desc() for c in columns])
+    else:
+        if after:
+            query = query.filter(
+                key > tuple_(*decode_cursor(after, columns)))
+        query = query.order_by(*columns)
+
+    rows = query.limit(per_page + 1).all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if before:
+        rows.reverse()
+
+    def cursor(row):
+        return encode_cursor([getattr(row, c.key) for c in columns])
+
+    prev_cursor = next_cursor = None
+    if rows:
+        if (before and more) or (not before and after):
+            prev_cursor = cursor(rows[0])
+        if (not before and more) or before:
+            next_cursor = cursor(rows[-1])
+    return rows, prev_cursor, next_cursor
+
+
+def page_size():
+    # ?per_page= overrides PER_PAGE, bounded by MAX_PER_PAGE.
+    config = current_app.config
+    per_page = request.args.get('per_page', config['PER_PAGE'], type=int)
+    return max(1, min(per_page, config['MAX_PER_PAGE']))
+
+
+# FTS5 tables found by has_fts, per engine.
+_fts_tables = weakref.WeakKeyDictionary()
+
+
+def has_fts(fts):
+    """Whether SQLite table ``fts`` exists. The name search migration
+    creates it, db.create_all() does not. Only found tables are
+    remembered, so a database migrated later is picked up."""
+    found = _fts_tables.setdefault(db.session.get_bind(), set())
+    if fts not in found and db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+            "AND name = :name"), {'name': fts}).first():
+        found.add(fts)
+    return fts in found
+
+
+def search_names(model, term, genre=None):
+    """Return up to SEARCH_LIMIT rows of ``model`` whose name contains
+    ``term``, best match first, with their number of upcoming shows.
+    ``genre`` restricts the hits to one genre.
+
+    Postgres goes through the pg_trgm and tsvector indexes, SQLite
+    through the trigram FTS5 table created by the migrations, or ILIKE
+    when the database was built without them.
+    """
+    limit = current_app.config['SEARCH_LIMIT']
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql' and term:
+        config = literal_column("'english'::regconfig")
+        tsv = func.to_tsvector(config, func.coalesce(model.name, ''))
+        tsq = func.plainto_tsquery(config, term)
+        ranked = filter_genre(db.session.query(model.id).filter(or_(
+            model.name.ilike(f'%{term}%'), tsv.op('@@')(tsq)
+        )), model, genre).order_by(
+            (func.similarity(model.name, term) + func.ts_rank(tsv, tsq))
+            .desc(), model.id).limit(limit)
+        ids = [r.id for r in ranked]
+    elif dialect == 'sqlite' and len(term) >= 3 and \
+            has_fts(model.__tablename__.lower() + '_fts'):
+        # The trigram tokenizer can only match terms of 3+ characters.
+        owner = model.__tablename__.lower()
+        fts = owner + '_fts'
+        tagged = ''
+        if genre:
+            tagged = (f'AND rowid IN (SELECT {owner}_id FROM {owner}_genres '
+                      'JOIN "Genre" ON "Genre".id = genre_id '
+                      'WHERE "Genre".name = :genre) ')
+        ids = [r[0] for r in db.session.execute(
+            text(f'SELECT rowid FROM {fts} WHERE {fts} MATCH :term '
+                 f'{tagged}ORDER BY rank LIMIT :limit'),
+            {'term': '"%s"' % term.replace('"', '""'), 'limit': limit,
+             'genre': genre})]
+    else:
+        ids = [r.id for r in filter_genre(db.session.query(model.id).filter(
+            model.name.ilike(f'%{term}%')
+        ), model, genre).order_by(model.name.ilike(f'{term}%').desc(),
+                                  model.name, model.id).limit(limit)]
+    if not ids:
+        return []
+
+    rows = db.session.query(
+        model.id, model.name,
+        model.upcoming_shows_count.label('upcoming_shows')
+    ).filter(model.id.in_(ids)).all()
+    rank = {id: i for i, id in enumerate(ids)}
+    return sorted(rows, key=lambda r: rank[r.id])
+
+
+def genres_named(names):
+    """Return the Genre rows for ``names``, creating missing ones."""
+    names = set(names or [])
+    genres = Genre.query.filter(Genre.name.in_(names)).all() \
+        if names else []
+    for name in names - {g.name for g in genres}:
+        genre = Genre(name=name)
+        db.session.add(genre)
+        genres.append(genre)
+    return genres
+
+
+def filter_genre(query, model, genre):
+    # EXISTS on the association table, served by its genre_id index.
+    if not genre:
+        return query
+    return query.filter(model.genres.any(Genre.name == genre))
+
+
+def genre_counts():
+    """Number of venues and artists per genre, in one grouped query."""
+    tagged = union_all(
+        db.select(venue_genres.c.genre_id,
+                  literal(1).label('venues'), literal(0).label('artists')),
+        db.select(artist_genres.c.genre_id,
+                  literal(0).label('venues'), literal(1).label('artists'))
+    ).subquery()
+    return db.session.query(
+        Genre.name,
+        func.sum(tagged.c.venues).label('venues'),
+        func.sum(tagged.c.artists).label('artists')
+    ).join(tagged, tagged.c.genre_id == Genre.id) \
+        .group_by(Genre.id).order_by(Genre.name).all()
+
+
+def load_suggestions():
+    for artist in db.session.query(Artist.id, Artist.name):
+        yield 'artist', artist.id, artist.name
+    for venue in db.session.query(Venue.id, Venue.name):
+        yield 'venue', venue.id, venue.name
+
+
+def suggestions_stamp():
+    """Changes when a venue or artist is added, deleted or updated."""
+    return tuple(tuple(db.session.query(
+        func.count(model.id), func.max(model.updated_at)).one())
+        for model in (Artist, Venue))
+
+
+# Typeahead index, built from the database on first use and kept up to
+# date by the handlers that write names, and reloaded when another
+# process changed the names.
+suggestions = PrefixIndex(load_suggestions, suggestions_stamp)
+
+
+# Rendered detail pages, keyed by "venue:<id>" and "artist:<id>".
+page_cache = PageCache()
+
+# Venue and artist images and their thumbnails, served by /img/.
+thumbnail_cache = DiskCache()
+
+
+def cached_page(kind):
+    """Serve the decorated detail view from ``page_cache``.
+
+    Pages carrying flashed messages are rendered for that user only and
+    never cached, neither are aborted (404) renders.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if session.get('_flashes'):
+                return view(**kwargs)
+            key = f'{kind}:{kwargs[kind + "_id"]}'
+            page = page_cache.get(key)
+            if page is None:
+                page = view(**kwargs)
+                page_cache.set(key, page)
+            return page
+        return wrapper
+    return decorator
+
+
+def venue_changed(venue_id):
+    """Bump the version of the venue and of the artists whose pages
+    list it, and return their page cache keys. Call before commit."""
+    artist_ids = [a.artist_id for a in db.session.query(Show.artist_id)
+                  .filter(Show.venue_id == venue_id).distinct()]
+    bump_versions(Venue, [venue_id])
+    bump_versions(Artist, artist_ids)
+    return [f'venue:{venue_id}'] + [f'artist:{id}' for id in artist_ids]
+
+
+def artist_changed(artist_id):
+    venue_ids = [v.venue_id for v in db.session.query(Show.venue_id)
+                 .filter(Show.artist_id == artist_id).distinct()]
+    bump_versions(Artist, [artist_id])
+    bump_versions(Venue, venue_ids)
+    return [f'artist:{artist_id}'] + [f'venue:{id}' for id in venue_ids]
+
+
+def bump_versions(model, ids):
+    if ids:
+        db.session.execute(model.__table__.update()
+                           .where(model.id.in_(ids))
+                           .values(version=model.version + 1))
+
+
+def versioned_json(model, id, data):
+    """JSON of ``data(id)`` with a strong ETag taken from the version
+    column, answering If-None-Match with a 304 after one lookup.
+
+    The ETag also carries the start time of the next upcoming show,
+    which moves to the past shows once it starts without the version
+    changing.
+    """
+    owner = getattr(Show, model.__tablename__.lower() + '_id')
+    next_show = db.session.query(func.min(Show.start_time)).filter(
+        owner == id, Show.start_time > datetime.now()).scalar_subquery()
+    row = db.session.query(model.version, next_show) \
+        .filter(model.id == id).one_or_none()
+    if row is None:
         abort(404)
+    version, next_start = row
+    etag = f'{model.__tablename__.lower()}-{id}-{version}'
+    if next_start is not None:
+        etag += f'-{next_start:%Y%m%dT%H%M%S}'
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        detail = data(id)
+        for show in detail['upcoming_shows'] + detail['past_shows']:
+            show['start_time'] = show['start_time'].isoformat()
+        response = jsonify(detail)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def show_interval(start_time, minutes=None, end_time=None):
+    """Return ``(start_time, end_time)`` of a show lasting ``minutes``
+    or ending at ``end_time``, SHOW_MINUTES long by default. Raises
+    ValueError unless it lasts up to MAX_SHOW_MINUTES."""
+    if end_time is None:
+        end_time = start_time + timedelta(
+            minutes=minutes or current_app.config['SHOW_MINUTES'])
+    if not start_time < end_time <= \
+            start_time + timedelta(minutes=MAX_SHOW_MINUTES):
+        raise ValueError(f'a show lasts up to {MAX_SHOW_MINUTES} minutes')
+    return start_time, end_time
+
+
+def show_conflicts(proposed):
+    """Return the booked shows overlapping ``proposed``, a list of
+    ``(venue_id, artist_id, start_time, end_time)``, in one query.
+
+    Rows are ``(index, kind, id, start_time, end_time)`` where ``index``
+    points into ``proposed`` and ``kind`` says whether the venue or the
+    artist is taken. Shows last at most MAX_SHOW_MINUTES, so only those
+    starting within that much before a proposal can overlap it, each
+    side is one range scan of the (venue_id|artist_id, start_time)
+    indexes.
+    """
+    if not proposed:
+        return []
+    longest = timedelta(minutes=MAX_SHOW_MINUTES)
+    values = db.values(
+        column('index', db.Integer), column('venue_id', db.Integer),
+        column('artist_id', db.Integer), column('start_time', db.DateTime),
+        column('end_time', db.DateTime), column('earliest', db.DateTime),
+        name='proposed'
+    ).data([(i, venue_id, artist_id, start, end, start - longest)
+            for i, (venue_id, artist_id, start, end) in enumerate(proposed)]
+           ).cte('proposed')
+
+    def booked(kind, owner):
+        return db.select(
+            values.c.index, literal(kind).label('kind'), Show.id,
+            Show.start_time, Show.end_time
+        ).join_from(values, Show, and_(
+            getattr(Show, owner) == values.c[owner],
+            Show.start_time > values.c.earliest,
+            Show.start_time < values.c.end_time,
+            Show.end_time > values.c.start_time))
+
+    rows = db.session.execute(union_all(
+        booked('venue', 'venue_id'), booked('artist', 'artist_id'))).all()
+    return sorted(rows, key=lambda row: (row[0], row.start_time))
+
+
+def schedule_overlaps(proposed):
+    """Yield ``(index, other, kind)`` for the shows of ``proposed``
+    that overlap each other on the same venue or artist."""
+    for kind, owner in (('venue', 0), ('artist', 1)):
+        order = sorted(range(len(proposed)),
+                       key=lambda i: (proposed[i][owner], proposed[i][2]))
+        running = []
+        for i in order:
+            owner_id, start = proposed[i][owner], proposed[i][2]
+            running = [j for j in running
+                       if proposed[j][owner] == owner_id
+                       and proposed[j][3] > start]
+            for j in running:
+                yield i, j, kind
+            running.append(i)
+
+
+def recommendations(source, source_id):
+    """The stored recommendations of one artist or venue as
+    ``{"artist": [...], "venue": [...]}``, from one query."""
+    def targets(model, target):
+        return db.select(
+            Recommendation.target, Recommendation.rank, model.id,
+            model.name, model.image_link
+        ).join(model, model.id == Recommendation.target_id).where(
+            Recommendation.source == source,
+            Recommendation.source_id == source_id,
+            Recommendation.target == target)
+
+    rows = db.session.execute(union_all(
+        targets(Artist, 'artist'), targets(Venue, 'venue'))).all()
+    found = {"artist": [], "venue": []}
+    for row in sorted(rows, key=lambda row: (row.target, row.rank)):
+        found[row.target].append({
+            "id": row.id,
+            "name": row.name,
+            "image_link": row.image_link
+        })
+    return found
 
-#  Create Venue
-#  ----------------------------------------------------------------
-
-
-@app.route('/venues/create', methods=['GET'])
-def create_venue_form():
-    form = VenueForm()
-    return render_template('forms/new_venue.html', form=form)
 
+def paged(rows_and_cursors, data):
+    _, prev_cursor, next_cursor = rows_and_cursors
+    return {"data": data, "prev": prev_cursor, "next": next_cursor}
 
-@app.route('/venues/create', methods=['POST'])
-def create_venue_submission():
-    # TODO: insert form data as a new Venue record in the db, instead
-    # TODO: modify data to be the data object returned from db insertion
-    error = False
-    data = request.form
-    try:
-        name = VenueForm().name.data
-        city = VenueForm().city.data
-        state = VenueForm().state.data
-        address = VenueForm().address.data
-        phone = VenueForm().phone.data
-        genres = ','.join(VenueForm().genres.data)
-        facebook_link = VenueForm().facebook_link.data
-        website = VenueForm().website.data
-        image_link = VenueForm().image_link.data
-        seeking_talent = VenueForm().seeking_talent.data
-        seeking_description = VenueForm().seeking_description.data
-
-        venue = Venue(name=name, city=city, state=state, address=address,
-                      phone=phone, image_link=image_link,
-                      facebook_link=facebook_link,
-                      website=website, seeking_talent=seeking_talent,
-                      seeking_description=seeking_description, genres=genres)
-        db.session.add(venue)
-        db.session.commit()
-
-    except:
-        db.session.rollback()
-        error = True
-        print(sys.exc_info())
-
-    finally:
-        db.session.close()
-    # TODO: on unsuccessful db insert, flash an error instead.
-    # e.g., flash('An error occurred. Venue ' + data.name +
-    # ' could not be listed.')
-    # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
-        if error:
-            flash('An error occurred. Venue ' +
-                  request.form['name'] + ' could not be listed.')
-        else:
-            # on successful db insert, flash success
-            flash('Venue ' + request.form['name'] +
-                  ' was successfully listed!')
-    return render_template('pages/home.html')
 
+# Latency, SQL statement count and SQL time per route.
+request_metrics = RequestMetrics()
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
-def delete_venue(venue_id):
-    # TODO: Complete this endpoint for taking a venue_id, and using
-    # SQLAlchemy ORM to delete a record. Handle cases
-    # where the session commit could fail.
-    try:
-        Venue.query.filter_by(id=venue_id).delete()
-        db.session.commit()
-    except:
-        db.session.rollback()
-    finally:
-        db.session.close()
-    return render_template('pages/home.html')
 
-    # BONUS CHALLENGE: Implement a button to delete a Venue on
-    # a Venue Page, have it so that
-    # clicking that button delete it from the db then
-    # redirect the user to the homepage
-    # return None
-
-
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
-def edit_venue(venue_id):
-    form = VenueForm()
-    Art = Venue.query.get(venue_id)
-    form = ArtistForm(obj=Art)
-    if form.validate_on_submit():
-        form.populate_obj(Art)
-    # TODO: populate form with values from venue with ID <venue_id>
-    return render_template('forms/edit_venue.html', form=form, venue=Art)
-
-
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
-def edit_venue_submission(venue_id):
-    # TODO: take values from the form submitted, and update existing
-    # venue record with ID <venue_id> using the new attributes
-    form = VenueForm()
-    venEdit = Venue.query.get(venue_id)
-
-    venEdit.name = form.name.data
-    venEdit.genres = form.genres.data
-    venEdit.city = form.city.data
-    venEdit.state = form.state.data
-    venEdit.phone = form.phone.data
-    venEdit.website = form.website.data
-    venEdit.facebook_link = form.facebook_link.data
-    venEdit.seeking_talent = form.seeking_talent.data
-    venEdit.seeking_description = form.seeking_description.data
-    venEdit.image_link = form.image_link.data
-    venEdit.address = form.address.data
-    db.session.commit()
-    return redirect(url_for('show_venue', venue_id=venue_id))
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context,
+                      executemany):
+    conn.info['query_started'] = perf_counter()
 
 
-#  Artists
-#  ----------------------------------------------------------------
-@app.route('/artists')
-def artists():
-    # TODO: replace with real data returned from querying the database
-    artists = Artist.query.all()
-    data = []
-    for artist in artists:
-        data.append({
-            "id": artist.id,
-            "name": artist.name
-        })
-    return render_template('pages/artists.html', artists=data)
-
-
-@app.route('/artists/search', methods=['POST'])
-def search_artists():
-    # TODO: implement search on artists with partial
-    # string search. Ensure it is case-insensitive.
-    # seach for "A" should return "Guns N Petals",
-    # "Matt Quevado", and "The Wild Sax Band".
-    # search for "band" should return "The Wild Sax Band".
-    search_term = request.form.get('search_term', '')
-    searchResults = db.session.query(Artist).filter(
-        Artist.name.ilike(f'%{search_term}%')).all()
-    data = []
-    for artist in searchResults:
-        data.append({
-            "id": artist.id,
-            "name": artist.name,
-            "num_upcoming_shows": len(db.session.query(Show)
-                                      .filter(Show.artist_id == artist.id)
-                                      .filter(Show.start_time > datetime
-                                      .now()).all())
-        })
+@event.listens_for(Engine, 'after_cursor_execute')
+def stop_query_timer(conn, cursor, statement, parameters, context,
+                     executemany):
+    elapsed = perf_counter() - conn.info['query_started']
+    if has_request_context() and 'request_started' in g:
+        g.queries += 1
+        g.db_seconds += elapsed
 
-    response = {
-        "count": len(searchResults),
-        "data": data
-    }
-    return render_template('pages/search_artists.html',
-                           results=response,
-                           search_term=request.form.get('search_term', ''))
 
+def start_request_timer():
+    g.request_started = perf_counter()
+    g.queries = 0
+    g.db_seconds = 0.0
 
-@app.route('/artists/<int:artist_id>')
-def show_artist(artist_id):
-    # shows the venue page with the given venue_id
-    # TODO: replace with real venue data from the venues table, using venue_id
-    try:
-        artist = Artist.query.get(artist_id)
-        upcoming = db.session.query(Show).join(Venue).filter(
-            Show.artist_id == artist_id).filter(
-                Show.start_time > datetime.now()).all()
-        upcomingShows = []
-        past = db.session.query(Show).join(Venue).filter(
-            Show.artist_id == artist_id).filter(
-                Show.start_time < datetime.now()).all()
-        pastShows = []
-
-        for u in upcoming:
-            upcomingShows.append({
-                "venue_id": u.Venue.id,
-                "venue_name": u.Venue.name,
-                "venue_image_link": u.Venue.image_link,
-                "start_time": (u.start_time.strftime("%Y-%m-%d, %H:%M:%S"))
-            })
-
-        for p in past:
-            pastShows.append({
-                "venue_id": p.Venue.id,
-                "venue_name": p.Venue.name,
-                "venue_image_link": p.Venue.image_link,
-                "start_time": (p.start_time.strftime("%Y-%m-%d, %H:%M:%S"))
-            })
-
-        data = [{
-            "id": artist.id,
-            "name": artist.name,
-            "genres": (artist.genres),
-            "city": artist.city,
-            "state": artist.state,
-            "phone": artist.phone,
-            "website": artist.website,
-            "facebook_link": artist.facebook_link,
-            "seeking_venue": artist.seeking_venue,
-            "seeking_description": artist.seeking_description,
-            "image_link": artist.image_link,
-            "past_shows": pastShows,
-            "upcoming_shows": upcomingShows,
-            "past_shows_count": len(past),
-            "upcoming_shows_count": len(upcoming)
-        }]
-
-        data = list(filter(lambda d: d['id'] == artist_id, data))[0]
-        return render_template('pages/show_artist.html', artist=data)
-    except:
-        abort(404)
 
-#  Update
-#  ----------------------------------------------------------------
+def record_request(response):
+    if 'request_started' not in g:
+        return response
+    elapsed = perf_counter() - g.request_started
+    # The rule rather than the path keeps one series per route.
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    config = current_app.config
+    slow = elapsed * 1000 > config['SLOW_REQUEST_MS'] or \
+        g.queries > config['SLOW_REQUEST_QUERIES']
+    if slow:
+        current_app.logger.warning(
+            'slow request: %s %s %d in %.0fms, %d queries in %.0fms',
+            request.method, request.full_path.rstrip('?'),
+            response.status_code, elapsed * 1000, g.queries,
+            g.db_seconds * 1000)
+    request_metrics.observe(route, request.method, response.status_code,
+                            elapsed, g.queries, g.db_seconds, slow)
+    return response
 
 
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
-def edit_artist(artist_id):
-    form = ArtistForm()
-    artist = Artist.query.get(artist_id)
-
-    form = ArtistForm(obj=artist)
-    if form.validate_on_submit():
-        form.populate_obj(artist)
-
-    # TODO: populate form with fields from artist with ID <artist_id>
-    return render_template('forms/edit_artist.html', form=form, artist=artist)
-
-
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
-def edit_artist_submission(artist_id):
-    # TODO: take values from the form submitted, and update existing
-    # artist record with ID <artist_id> using the new attributes
-    form = ArtistForm()
-    artist = Artist.query.get(artist_id)
-
-    artist.name = form.name.data
-    artist.genres = form.genres.data
-    artist.city = form.city.data
-    artist.state = form.state.data
-    artist.phone = form.phone.data
-    artist.website = form.website.data
-    artist.facebook_link = form.facebook_link.data
-    artist.seeking_venue = form.seeking_venue.data
-    artist.seeking_description = form.seeking_description.data
-    artist.image_link = form.image_link.data
-    db.session.commit()
+# ----------------------------------------------------------------------------#
+# Controllers.
+# ----------------------------------------------------------------------------#
 
-    return redirect(url_for('show_artist', artist_id=artist_id))
+# Venue, artist and show pages live in the venues, artists and shows
+# blueprints.
+main = Blueprint('main', __name__)
 
-#  Create Artist
-#  ----------------------------------------------------------------
 
+@main.route('/')
+def index():
+    return render_template('pages/home.html')
 
-@app.route('/artists/create', methods=['GET'])
-def create_artist_form():
-    form = ArtistForm()
-    return render_template('forms/new_artist.html', form=form)
 
+@main.route('/search/suggest')
+def search_suggest():
+    # Typeahead for artist and venue names, served from memory.
+    return jsonify({"data": suggestions.search(
+        request.args.get('q', ''), current_app.config['SUGGEST_LIMIT'])})
+
+
+@main.route('/api/genres')
+def genres_json():
+    return jsonify({"data": [{
+        "name": genre.name,
+        "venues": genre.venues,
+        "artists": genre.artists
+    } for genre in genre_counts()]})
+
+
+@main.route('/export/<any(venues, artists, shows):entity>'
+            '.<any(csv, ndjson):format>')
+def export(entity, format):
+    # Streams the whole table, or the rows past a watermark, without
+    # loading it in memory.
+    from export import export_chunks, gzip_chunks
+
+    updated_since = request.args.get('updated_since')
+    if updated_since:
+        try:
+            updated_since = datetime.fromisoformat(updated_since)
+        except ValueError:
+            abort(400)
+    chunks = export_chunks(entity, format,
+                           current_app.config['EXPORT_CHUNK'],
+                           after_id=request.args.get('after_id', type=int),
+                           updated_since=updated_since or None)
+    headers = {
+        'Content-Disposition': f'attachment; filename={entity}.{format}',
+        'Vary': 'Accept-Encoding'
+    }
+    if 'gzip' in request.accept_encodings:
+        chunks = gzip_chunks(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    mimetype = 'text/csv' if format == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers=headers)
 
-@app.route('/artists/create', methods=['POST'])
-def create_artist_submission():
-    # called upon submitting the new artist listing form
-    # TODO: insert form data as a new Venue record in the db, instead
-    # TODO: modify data to be the data object returned from db insertion
-    error = False
-    try:
-        name = ArtistForm().name.data
-        city = ArtistForm().city.data
-        state = ArtistForm().state.data
-        address = ArtistForm().address.data
-        phone = ArtistForm().phone.data
-        genres = ','.join(ArtistForm().genres.data)
-        facebook_link = ArtistForm().facebook_link.data
-        website = ArtistForm().website.data
-        image_link = ArtistForm().image_link.data
-        seeking_venue = ArtistForm().seeking_venue.data
-        seeking_description = ArtistForm().seeking_description.data
-        newArtist = Artist(name=name, city=city, genres=genres, state=state,
-                           phone=phone, image_link=image_link,
-                           facebook_link=facebook_link, website=website,
-                           seeking_venue=seeking_venue,
-                           seeking_description=seeking_description)
-        db.session.add(newArtist)
-        db.session.commit()
-
-    except:
-        db.session.rollback()
-        error = True
-        print(sys.exc_info())
-    finally:
-        db.session.close()
-        if error:
-            flash('An error occurred. Artist ' +
-                  request.form['name'] + ' could not be listed.')
-        else:
-            flash('Artist ' + request.form['name'] +
-                  ' was successfully listed!')
-
-    # on successful db insert, flash success
-    # TODO: on unsuccessful db insert, flash an error instead.
-    # e.g., flash('An error occurred. Artist ' +
-    # data.name + ' could not be listed.')
-    return render_template('pages/home.html')
 
+@main.route('/cache/stats')
+def cache_stats():
+    return jsonify(page_cache.stats())
 
-#  Shows
-#  ----------------------------------------------------------------
 
-@app.route('/shows')
-def shows():
-    # displays list of shows at /shows
-    # TODO: replace with real venues data.
-    #       num_shows should be aggregated based
-    # on number of upcoming shows per venue.
-    shows = Show.query.all()
-    data = []
-    for i in shows:
-        ven = Venue.query.filter_by(id=i.venue_id).first()
-        art = Artist.query.filter_by(id=i.artist_id).first()
-        data.append({
-            "venue_id": i.venue_id,
-            "venue_name": ven.name,
-            "artist_id": i.artist_id,
-            "artist_name": art.name,
-            "artist_image_link": art.image_link,
-            "start_time": (i.start_time.strftime("%Y-%m-%d, %H:%M:%S"))
-        })
+@main.route('/pool/stats')
+def db_pool_stats():
+    # Pools are per process, each worker answers for its own.
+    return jsonify(pool_stats(db.engine))
 
-    return render_template('pages/shows.html', shows=data)
 
+@main.route('/metrics')
+def metrics():
+    return Response(request_metrics.render(),
+                    mimetype='text/plain; version=0.0.4')
 
-@app.route('/shows/create', methods=['GET'])
-def create_shows():
-    # renders form. do not touch.
-    form = ShowForm()
-    return render_template('forms/new_show.html', form=form)
 
+#  Venues
+#  ----------------------------------------------------------------
 
-@app.route('/shows/create', methods=['POST'])
-def create_show_submission():
-    # called to create new shows in the db,
-    # upon submitting new show listing form
-    # TODO: insert form data as a new Show record in the db, instead
-    error = False
-    try:
-        # show = Show()
-        artist_id = ShowForm().artist_id.data
-        venue_id = ShowForm().venue_id.data
-        time = ShowForm().start_time.data
-        start_time = time.strftime("%Y-%m-%d, %H:%M:%S")
-        newShow = Show(artist_id=artist_id, venue_id=venue_id,
-                       start_time=start_time)
-        db.session.add(newShow)
-        db.session.commit()
-
-    except:
-        db.session.rollback()
-        error = True
-        abort(404)
-        print(sys.exc_info())
-    finally:
-        db.session.close()
-        if error:
-            flash('An error occurred. Show could not be listed.')
-        else:
-            # on successful db insert, flash success
-            flash('Show was successfully listed!')
-
-    # TODO: on unsuccessful db insert, flash an error instead.
-    # e.g., flash('An error occurred. Show could not be listed.')
-    # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
-    return render_template('pages/home.html')
+@click.command('refresh-show-counts')
+def refresh_show_counts_command():
+    """Roll upcoming/past show counters forward, run it periodically."""
+    refresh_show_counts()
+
+
+@click.command('warm-templates')
+def warm_templates_command():
+    """Compile every template into the bytecode cache and report the
+    time each takes."""
+    # Compile from source rather than load what is cached.
+    current_app.jinja_env.cache.clear()
+    current_app.jinja_env.bytecode_cache.clear()
+    timings = warm_templates(current_app)
+    for name, seconds in timings:
+        click.echo(f'{seconds * 1000:8.1f} ms  {name}')
+    click.echo(f'{len(timings)} templates in '
+               f'{sum(seconds for _, seconds in timings) * 1000:.1f} ms')
+
+
+@click.command('refresh-rollups')
+def refresh_rollups_command():
+    """Rebuild the analytics rollups from the shows."""
+    refresh_rollups()
+
+
+def hot_routes():
+    # One request per hot route, parameterized from the data at hand.
+    venue = db.session.query(Venue.id, Venue.name).first()
+    artist = db.session.query(Artist.id, Artist.name).first()
+    genre = db.session.query(Genre.name).first()
+    routes = [('GET', '/venues', None), ('GET', '/artists', None),
+              ('GET', '/shows', None)]
+    if genre:
+        query = urlencode({'genre': genre.name})
+        routes += [('GET', f'/venues?{query}', None),
+                   ('GET', f'/artists?{query}', None)]
+    if venue:
+        routes += [('GET', f'/venues/{venue.id}', None),
+                   ('POST', '/venues/search',
+                    {'search_term': (venue.name or '').split(' ')[0]})]
+    if artist:
+        routes += [('GET', f'/artists/{artist.id}', None),
+                   ('POST', '/artists/search',
+                    {'search_term': (artist.name or '').split(' ')[0]})]
+    return routes
+
+
+@click.command('check-query-plans')
+@click.option('--min-rows', default=1000, show_default=True,
+              help='Tables with fewer rows may be scanned.')
+def check_query_plans(min_rows):
+    """EXPLAIN the queries of every hot route against the current
+    database and fail if any of them scans a large table."""
+    from explain import seq_scans
+
+    large = {table.name for table in db.metadata.sorted_tables
+             if db.session.query(func.count()).select_from(table).scalar()
+             >= min_rows}
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(
+                ('SELECT', 'WITH')):
+            statements.append((statement, parameters))
+
+    client = current_app.test_client()
+    failed = False
+    for method, url, data in hot_routes():
+        detail = re.fullmatch(r'/(venue|artist)s/(\d+)', url)
+        if detail:
+            # A cached page would answer without running its queries.
+            page_cache.invalidate('{}:{}'.format(*detail.groups()))
+        del statements[:]
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            client.open(url, method=method, data=data)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        scanned = []
+        with db.engine.connect() as connection:
+            for statement, parameters in statements:
+                tables = seq_scans(connection, statement, parameters) & large
+                if tables:
+                    scanned.append((', '.join(sorted(tables)), statement))
+        for tables, statement in scanned:
+            click.echo(f'FAIL {method} {url}: sequential scan of {tables}\n'
+                       f'     {" ".join(statement.split())}')
+        if not scanned:
+            click.echo(f'ok   {method} {url} ({len(statements)} queries)')
+        failed = failed or bool(scanned)
+    if failed:
+        raise click.ClickException('sequential scans on large tables')
 
 
-@app.errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
 
-@app.errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
+def configure_logging(app):
+    # Errors and slow requests go to LOG_FILE outside debug mode. The
+    # logger is shared by every app built in the process, attach once.
+    if app.debug or any(isinstance(handler, FileHandler)
+                        for handler in app.logger.handlers):
+        return
+    file_handler = FileHandler(app.config['LOG_FILE'])
     file_handler.setFormatter(
-        Formatter(''' % (asctime) s % (levelname) s : % (message)s
-                  [in % (pathname) s : % (lineno)d]''')
+        Formatter('%(asctime)s %(levelname)s: %(message)s '
+                  '[in %(pathname)s:%(lineno)d]')
     )
     app.logger.setLevel(logging.INFO)
     file_handler.setLevel(logging.INFO)
     app.logger.addHandler(file_handler)
-    app.logger.info('errors')
 
 # ----------------------------------------------------------------------------#
 # Launch.
 # ----------------------------------------------------------------------------#
 
-# Default port:
+# Default port. The factory is imported through the module name so the
+# blueprints and the app share one ``db``.
 if __name__ == '__main__':
-    app.run()
+    import app
+    app.create_app().run()
 
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    import app
+    app.create_app().run(host='0.0.0.0', port=port)
 '''
@@ -0,0 +1,233 @@
+import sys
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, flash, redirect, \
+    url_for, abort, jsonify
+
+from app import db, Venue, Artist, Show, keyset_page, page_size, paged, \
+    search_names, filter_genre, genres_named, suggestions, page_cache, \
+    cached_page, artist_changed, versioned_json, recommendations
+from forms import ArtistForm
+
+bp = Blueprint('artists', __name__)
+
+
+def artists_page():
+    # Only one page of (id, name) rows is loaded, ordered by name and id.
+    page = keyset_page(
+        filter_genre(db.session.query(Artist.id, Artist.name),
+                     Artist, request.args.get('genre')),
+        [Artist.name, Artist.id], page_size(),
+        before=request.args.get('before'), after=request.args.get('after'))
+    data = []
+    for artist in page[0]:
+        data.append({
+            "id": artist.id,
+            "name": artist.name
+        })
+    return paged(page, data)
+
+
+@bp.route('/artists')
+def artists():
+    page = artists_page()
+    return render_template('pages/artists.html', artists=page['data'],
+                           prev_cursor=page['prev'], next_cursor=page['next'])
+
+
+@bp.route('/api/artists')
+def artists_json():
+    return jsonify(artists_page())
+
+
+@bp.route('/artists/search', methods=['POST'])
+def search_artists():
+    # TODO: implement search on artists with partial
+    # string search. Ensure it is case-insensitive.
+    # seach for "A" should return "Guns N Petals",
+    # "Matt Quevado", and "The Wild Sax Band".
+    # search for "band" should return "The Wild Sax Band".
+    search_term = request.form.get('search_term', '')
+    searchResults = search_names(Artist, search_term,
+                                 request.values.get('genre'))
+    data = []
+    for artist in searchResults:
+        data.append({
+            "id": artist.id,
+            "name": artist.name,
+            "num_upcoming_shows": artist.upcoming_shows
+        })
+
+    response = {
+        "count": len(searchResults),
+        "data": data
+    }
+    return render_template('pages/search_artists.html',
+                           results=response,
+                           search_term=request.form.get('search_term', ''))
+
+
+def artist_data(artist_id):
+    # shows the venue page with the given venue_id
+    # TODO: replace with real venue data from the venues table, using venue_id
+    try:
+        artist = Artist.query.get(artist_id)
+        upcoming = db.session.query(
+            Show.start_time, Venue.id, Venue.name, Venue.image_link
+        ).join(Venue).filter(
+            Show.artist_id == artist_id).filter(
+                Show.start_time > datetime.now()).all()
+        upcomingShows = []
+        past = db.session.query(
+            Show.start_time, Venue.id, Venue.name, Venue.image_link
+        ).join(Venue).filter(
+            Show.artist_id == artist_id).filter(
+                Show.start_time < datetime.now()).all()
+        pastShows = []
+
+        for u in upcoming:
+            upcomingShows.append({
+                "venue_id": u.id,
+                "venue_name": u.name,
+                "venue_image_link": u.image_link,
+                "start_time": u.start_time
+            })
+
+        for p in past:
+            pastShows.append({
+                "venue_id": p.id,
+                "venue_name": p.name,
+                "venue_image_link": p.image_link,
+                "start_time": p.start_time
+            })
+
+        data = [{
+            "id": artist.id,
+            "name": artist.name,
+            "genres": [genre.name for genre in artist.genres],
+            "city": artist.city,
+            "state": artist.state,
+            "phone": artist.phone,
+            "website": artist.website,
+            "facebook_link": artist.facebook_link,
+            "seeking_venue": artist.seeking_venue,
+            "seeking_description": artist.seeking_description,
+            "image_link": artist.image_link,
+            "past_shows": pastShows,
+            "upcoming_shows": upcomingShows,
+            "past_shows_count": len(past),
+            "upcoming_shows_count": len(upcoming)
+        }]
+
+        return list(filter(lambda d: d['id'] == artist_id, data))[0]
+    except:
+        abort(404)
+
+
+@bp.route('/artists/<int:artist_id>')
+@cached_page('artist')
+def show_artist(artist_id):
+    data = artist_data(artist_id)
+    return render_template(
+        'pages/show_artist.html', artist=data,
+        recommendations=recommendations('artist', artist_id))
+
+
+@bp.route('/api/artists/<int:artist_id>')
+def artist_json(artist_id):
+    return versioned_json(Artist, artist_id, artist_data)
+
+#  Update
+#  ----------------------------------------------------------------
+
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+    artist = Artist.query.get(artist_id)
+
+    form = ArtistForm(obj=artist)
+    form.genres.data = [genre.name for genre in artist.genres]
+
+    # TODO: populate form with fields from artist with ID <artist_id>
+    return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+    # TODO: take values from the form submitted, and update existing
+    # artist record with ID <artist_id> using the new attributes
+    form = ArtistForm()
+    artist = Artist.query.get(artist_id)
+
+    artist.name = form.name.data
+    artist.genres = genres_named(form.genres.data)
+    artist.city = form.city.data
+    artist.state = form.state.data
+    artist.phone = form.phone.data
+    artist.website = form.website.data
+    artist.facebook_link = form.facebook_link.data
+    artist.seeking_venue = form.seeking_venue.data
+    artist.seeking_description = form.seeking_description.data
+    artist.image_link = form.image_link.data
+    changed = artist_changed(artist_id)
+    db.session.commit()
+    suggestions.add('artist', artist_id, form.name.data)
+    page_cache.invalidate(*changed)
+
+    return redirect(url_for('.show_artist', artist_id=artist_id))
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+    form = ArtistForm()
+    return render_template('forms/new_artist.html', form=form)
+
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+    # called upon submitting the new artist listing form
+    # TODO: insert form data as a new Venue record in the db, instead
+    # TODO: modify data to be the data object returned from db insertion
+    error = False
+    try:
+        form = ArtistForm()
+        name = form.name.data
+        city = form.city.data
+        state = form.state.data
+        phone = form.phone.data
+        genres = genres_named(form.genres.data)
+        facebook_link = form.facebook_link.data
+        website = form.website.data
+        image_link = form.image_link.data
+        seeking_venue = form.seeking_venue.data
+        seeking_description = form.seeking_description.data
+        newArtist = Artist(name=name, city=city, genres=genres, state=state,
+                           phone=phone, image_link=image_link,
+                           facebook_link=facebook_link, website=website,
+                           seeking_venue=seeking_venue,
+                           seeking_description=seeking_description)
+        db.session.add(newArtist)
+        db.session.commit()
+        suggestions.add('artist', newArtist.id, name)
+
+    except:
+        db.session.rollback()
+        error = True
+        print(sys.exc_info())
+    finally:
+        db.session.close()
+        if error:
+            flash('An error occurred. Artist ' +
+                  request.form['name'] + ' could not be listed.')
+        else:
+            flash('Artist ' + request.form['name'] +
+                  ' was successfully listed!')
+
+    # on successful db insert, flash success
+    # TODO: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Artist ' +
+    # data.name + ' could not be listed.')
+    return render_template('pages/home.html')
@@ -0,0 +1,221 @@
+"""Fingerprinted, precompressed static bundles.
+
+    $ flask build-assets
+
+Each bundle of BUNDLES is concatenated from its files under static/,
+minified and written to static/dist/ under a name carrying a hash of
+its content, with .gz and .br siblings. The icon font is cut down to
+the glyphs static/css/icons.css maps the templates' icons to.
+static/dist/manifest.json maps bundle names to the hashed files.
+
+Templates link a bundle with ``bundle_urls(name)``, which falls back to
+the separate source files while there is no manifest, so development
+needs no build step. /assets/ serves the hashed files with the best
+encoding the client accepts and a year-long immutable Cache-Control:
+changed content gets a new name, so a cached copy is never stale.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+from io import BytesIO
+
+import click
+from flask import Blueprint, current_app, request, url_for, abort, \
+    send_from_directory
+from werkzeug.utils import safe_join
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+# Bundles in the order their files are concatenated, paths are relative
+# to the static folder.
+BUNDLES = {
+    'app.css': ['css/bootstrap.css', 'css/icons.css', 'css/layout.main.css',
+                'css/main.css', 'css/main.responsive.css',
+                'css/main.quickfix.css'],
+    'head.js': ['js/libs/modernizr-2.8.2.min.js'],
+    'app.js': ['js/libs/jquery-1.11.1.min.js',
+               'js/libs/bootstrap-3.1.1.min.js', 'js/libs/moment.min.js',
+               'js/plugins.js', 'js/script.js'],
+}
+# Subset to the glyphs icons.css uses.
+ICON_FONT = 'fonts/fontawesome-webfont.ttf'
+ONE_YEAR = 365 * 24 * 60 * 60
+
+bp = Blueprint('assets', __name__)
+
+_manifest = (None, {})
+
+
+def manifest():
+    """The bundle manifest, read again when a build replaces it."""
+    global _manifest
+    path = os.path.join(current_app.static_folder, DIST, MANIFEST)
+    try:
+        stamp = (path, os.stat(path).st_mtime_ns)
+    except FileNotFoundError:
+        return {}
+    if _manifest[0] != stamp:
+        with open(path, encoding='utf-8') as f:
+            _manifest = (stamp, json.load(f))
+    return _manifest[1]
+
+
+def bundle_urls(name):
+    """URLs to link for bundle ``name``: the built bundle, or its source
+    files before a build."""
+    built = manifest().get(name)
+    if built:
+        return [url_for('assets.asset', filename=built)]
+    return [url_for('static', filename=path) for path in BUNDLES[name]]
+
+
+@bp.route('/assets/<path:filename>')
+def asset(filename):
+    folder = os.path.join(current_app.static_folder, DIST)
+    mimetype = mimetypes.guess_type(filename)[0]
+    suffix, encoding = '', None
+    for accepted, extension in (('br', '.br'), ('gzip', '.gz')):
+        path = safe_join(folder, filename + extension)
+        if path is None:
+            abort(404)
+        if request.accept_encodings[accepted] and os.path.isfile(path):
+            suffix, encoding = extension, accepted
+            break
+    response = send_from_directory(folder, filename + suffix,
+                                   mimetype=mimetype, max_age=ONE_YEAR)
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+
+def fingerprinted(name, data):
+    stem, extension = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}'
+
+
+def absolute_urls(css, path, static_url):
+    # Relative url()s point next to the source file, which the bundle
+    # is not.
+    def absolute(match):
+        quote, url = match.groups()
+        if re.match(r'([a-z]+:|/|#)', url):
+            return match.group(0)
+        target, mark, query = url.partition('?')
+        target = posixpath.normpath(
+            posixpath.join(posixpath.dirname(path), target))
+        return f'url({quote}{static_url}/{target}{mark}{query}{quote})'
+    return re.sub(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)', absolute, css)
+
+
+def icon_font(css, static_folder):
+    """The ``(woff2, woff)`` bytes of the icon font cut down to the
+    codepoints of the ``content`` rules in ``css``."""
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    codepoints = {int(code, 16) for code in
+                  re.findall(r'content:\s*"\\([0-9a-fA-F]{4})"', css)}
+    fonts = []
+    for flavor in ('woff2', 'woff'):
+        font = TTFont(os.path.join(static_folder, ICON_FONT))
+        options = subset.Options(flavor=flavor)
+        # Font Forge and webfont generator tables, unused by browsers.
+        options.drop_tables += ['FFTM', 'webf']
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=codepoints)
+        subsetter.subset(font)
+        font.flavor = flavor
+        buffer = BytesIO()
+        font.save(buffer)
+        fonts.append(buffer.getvalue())
+    return fonts
+
+
+def missing_icons(css, template_folder):
+    """Icon classes used in templates without a rule in ``css``."""
+    defined = set(re.findall(r'\.fa-([a-z0-9-]+):before', css))
+    used = set()
+    for folder, _, files in os.walk(template_folder):
+        for name in files:
+            with open(os.path.join(folder, name), encoding='utf-8') as f:
+                used.update(re.findall(r'\bfa-([a-z0-9-]+)', f.read()))
+    return sorted(used - defined)
+
+
+@click.command('build-assets')
+def build_assets_command():
+    """Build the fingerprinted, precompressed static bundles."""
+    import brotli
+    import rcssmin
+    import rjsmin
+
+    app = current_app
+    static_folder = app.static_folder
+    dist = os.path.join(static_folder, DIST)
+    os.makedirs(dist, exist_ok=True)
+    previous = set(manifest().values())
+
+    built, files = {}, {}
+    for name, paths in BUNDLES.items():
+        sources = []
+        for path in paths:
+            with open(os.path.join(static_folder, path),
+                      encoding='utf-8') as f:
+                sources.append(f.read())
+        if name.endswith('.css'):
+            text = rcssmin.cssmin('\n'.join(
+                absolute_urls(source, path, app.static_url_path)
+                for source, path in zip(sources, paths)),
+                keep_bang_comments=True)
+            templates = os.path.join(app.root_path, app.template_folder)
+            for icon in missing_icons(text, templates):
+                click.echo(f'no glyph for fa-{icon} in css/icons.css',
+                           err=True)
+            for flavor, data in zip(('woff2', 'woff'),
+                                    icon_font(text, static_folder)):
+                built[f'icons.{flavor}'] = fingerprinted(
+                    f'icons.{flavor}', data)
+                files[built[f'icons.{flavor}']] = data
+            # Relative to the bundle, which /assets/ serves alongside.
+            text = re.sub(
+                r'src:[^;}]*fontawesome-webfont[^;}]*',
+                'src:' + ','.join(
+                    f'url({built["icons." + flavor]}) format("{flavor}")'
+                    for flavor in ('woff2', 'woff')),
+                text)
+        else:
+            # Separated so a file without a trailing semicolon does not
+            # run into the next.
+            text = rjsmin.jsmin(';\n'.join(sources), keep_bang_comments=True)
+        data = text.encode('utf-8')
+        built[name] = fingerprinted(name, data)
+        files[built[name]] = data
+        click.echo(f'{name}: {built[name]}, '
+                   f'{sum(len(source) for source in sources)} -> '
+                   f'{len(data)} bytes')
+
+    for filename, data in files.items():
+        with open(os.path.join(dist, filename), 'wb') as f:
+            f.write(data)
+        if filename.endswith(('.css', '.js')):
+            with open(os.path.join(dist, filename + '.gz'), 'wb') as f:
+                f.write(gzip.compress(data, 9, mtime=0))
+            with open(os.path.join(dist, filename + '.br'), 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+    # Replaced last, so the app never links a file not written yet.
+    path = os.path.join(dist, MANIFEST)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(built, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+    # The previous build stays for pages rendered before this one.
+    keep = set(files) | previous | {MANIFEST}
+    for filename in os.listdir(dist):
+        if re.sub(r'\.(gz|br)$', '', filename) not in keep:
+            os.remove(os.path.join(dist, filename))
@@ -0,0 +1,43 @@
+"""Compare the ``datetime`` Jinja filter against the string-parsing one
+it replaced.
+
+    $ python benchmarks/datetime_filter.py
+"""
+import os
+import sys
+import timeit
+from datetime import datetime
+
+import babel.dates
+import dateutil.parser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from filters import format_datetime  # noqa: E402
+
+
+def legacy_format_datetime(value, format='medium'):
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale='en')
+
+
+def main(number=20000):
+    value = datetime(2035, 4, 1, 20, 0, 0)
+    text = value.strftime("%Y-%m-%d, %H:%M:%S")
+    assert legacy_format_datetime(text, 'full') == \
+        format_datetime(value, 'full')
+
+    legacy = timeit.timeit(
+        lambda: legacy_format_datetime(text, 'full'), number=number)
+    current = timeit.timeit(
+        lambda: format_datetime(value, 'full'), number=number)
+    print(f'legacy  {legacy / number * 1e6:8.2f} us/call')
+    print(f'current {current / number * 1e6:8.2f} us/call')
+    print(f'speedup {legacy / current:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""A local stand-in for the hosts image links point at, to try and
+benchmark the /img/ thumbnails offline.
+
+    $ python benchmarks/image_origin.py --port 8765 &
+    $ python benchmarks/seed.py 1000 --image-origin http://127.0.0.1:8765
+
+Like picsum.photos, /seed/<seed>/<width>/<height> (or /<width>/<height>,
+or /<size> for a square) answers with a JPEG of that size, its colours
+derived from the path, so the same path always gives the same image.
+"""
+import argparse
+import hashlib
+import re
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+PORT = 8765
+# Largest side served, keeps a typo from allocating gigabytes.
+MAX_SIDE = 4000
+
+
+@lru_cache(maxsize=256)
+def image(path):
+    from PIL import Image
+
+    sizes = [int(n) for n in re.findall(r'/(\d+)(?=/|$)', path)[-2:]]
+    width, height = (sizes * 2)[:2] if sizes else (1200, 800)
+    width, height = min(width, MAX_SIDE), min(height, MAX_SIDE)
+    digest = hashlib.sha256(path.encode()).digest()
+    picture = Image.linear_gradient('L').resize((width, height))
+    picture = Image.merge('RGB', [
+        picture.point(lambda v, c=c: (v * c // 255 + digest[c % 32]) % 256)
+        for c in digest[:3]])
+    buffer = BytesIO()
+    picture.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        data = image(self.path.split('?')[0])
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def image_origin(port=PORT):
+    """Serve images on ``port`` in a thread, yield the origin URL."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), Handler)
+    print(f'serving images on http://127.0.0.1:{args.port}')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
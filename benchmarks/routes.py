@@ -0,0 +1,298 @@
+"""Drive every route through the Flask test client and check latency and
+queries per request against budgets.json.
+
+    $ python benchmarks/routes.py
+    $ python benchmarks/routes.py --scale 2000 --repeat 50
+    $ DATABASE_URL=postgresql:///fyyur_bench python benchmarks/routes.py
+    $ python benchmarks/routes.py --update-budgets
+
+Without DATABASE_URL a scratch SQLite database is seeded with SCALE
+venues (see seed.py), their image links served by the local stand-in of
+image_origin.py. A database that already has venues is used as is.
+The create and edit handlers write rows, so only point DATABASE_URL at
+a scratch database.
+
+Query budgets must hold at any scale, a per-row query shows up as a
+count that grows with --scale. Latency budgets are loose, they catch
+slowdowns of several times on the machine they were recorded on.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+BUDGETS = os.path.join(HERE, 'budgets.json')
+# Routes that are not request handlers of the site itself.
+UNBENCHMARKED = {'/static/<path:filename>', '/assets/<path:filename>',
+                 '/metrics', '/cache/stats', '/pool/stats',
+                 '/venues/<venue_id>',
+                 '/export/<any(venues, artists, shows):entity>'
+                 '.<any(csv, ndjson):format>'}
+
+
+def venue_form(i):
+    return {'name': f'Bench Venue {i}', 'city': 'San Francisco',
+            'state': 'CA', 'address': '1 Bench Street',
+            'phone': '415-555-0100', 'genres': ['Jazz', 'Blues'],
+            'facebook_link': 'https://www.facebook.com/bench',
+            'website': 'https://example.com', 'seeking_talent': 'y',
+            'seeking_description': 'Open to booking'}
+
+
+def artist_form(i):
+    return {'name': f'Bench Artist {i}', 'city': 'San Francisco',
+            'state': 'CA', 'phone': '415-555-0101', 'genres': ['Jazz'],
+            'facebook_link': 'https://www.facebook.com/bench',
+            'website': 'https://example.com', 'seeking_venue': 'y',
+            'seeking_description': 'Looking for gigs'}
+
+
+def routes(sample):
+    """``(name, method, request)`` per route, ``request(i)`` returns the
+    url and test client options, such as form data, of the i-th run."""
+    from app import db, Venue, Artist, Genre
+    from seed import CITIES
+
+    venues = [id for id, in db.session.query(Venue.id)
+              .order_by(Venue.upcoming_shows_count.desc()).limit(sample)]
+    artists = [id for id, in db.session.query(Artist.id)
+               .order_by(Artist.upcoming_shows_count.desc()).limit(sample)]
+    names = [name for name, in db.session.query(Venue.name).limit(sample)]
+    genre = db.session.query(Genre.name).order_by(Genre.name).first()[0]
+    # Seeded shows run from two years back to one ahead.
+    year = date.today().year
+    if not venues or not artists:
+        sys.exit('no venues or artists, seed the database first')
+
+    def venue(i):
+        return venues[i % len(venues)]
+
+    def artist(i):
+        return artists[i % len(artists)]
+
+    def term(i):
+        return names[i % len(names)].split(' ')[0]
+
+    def tour(i):
+        # A week on the road for one artist, a show a night.
+        return {'shows': [
+            {'venue_id': venue(i + night), 'artist_id': artist(i),
+             'start_time': f'2030-02-{night + 1:02d}T20:00',
+             'duration': 150} for night in range(7)]}
+
+    def get(url):
+        return lambda i: (url, {})
+
+    return [
+        ('GET /', 'GET', get('/')),
+        ('GET /venues', 'GET', get('/venues')),
+        ('GET /venues?genre=', 'GET', get(f'/venues?genre={genre}')),
+        ('GET /api/venues', 'GET', get('/api/venues')),
+        ('GET /artists', 'GET', get('/artists')),
+        ('GET /artists?genre=', 'GET', get(f'/artists?genre={genre}')),
+        ('GET /api/artists', 'GET', get('/api/artists')),
+        ('GET /shows', 'GET', get('/shows')),
+        ('GET /shows?from=&to=&venue=', 'GET',
+         lambda i: (f'/shows?from={year}-01-01&to={year}-12-31'
+                    f'&venue={venue(i)}', {})),
+        ('GET /analytics', 'GET', get('/analytics')),
+        ('GET /api/analytics', 'GET', get('/api/analytics')),
+        # The first run fetches and resizes, the measured ones are served
+        # from the thumbnail cache.
+        ('GET /img/<kind>/<int:id>', 'GET',
+         lambda i: (f'/img/venue/{venue(0)}?w=480',
+                    {'headers': {'Accept': 'image/webp,*/*'}})),
+        ('GET /api/genres', 'GET', get('/api/genres')),
+        ('GET /search/suggest', 'GET',
+         lambda i: (f'/search/suggest?q={term(i)[:3]}', {})),
+        ('POST /venues/search', 'POST',
+         lambda i: ('/venues/search', {'data': {'search_term': term(i)}})),
+        ('POST /artists/search', 'POST',
+         lambda i: ('/artists/search', {'data': {'search_term': term(i)}})),
+        ('GET /venues/<int:venue_id>', 'GET',
+         lambda i: (f'/venues/{venue(i)}', {})),
+        ('GET /venues/near', 'GET',
+         lambda i: ('/venues/near?lat={2}&lon={3}&radius=50'.format(
+             *CITIES[i % len(CITIES)]), {})),
+        ('GET /venues/<int:venue_id>/calendar', 'GET',
+         lambda i: (f'/venues/{venue(i)}/calendar'
+                    f'?month={year}-{i % 12 + 1:02d}', {})),
+        ('GET /api/venues/<int:venue_id>', 'GET',
+         lambda i: (f'/api/venues/{venue(i)}', {})),
+        ('GET /artists/<int:artist_id>', 'GET',
+         lambda i: (f'/artists/{artist(i)}', {})),
+        ('GET /api/artists/<int:artist_id>', 'GET',
+         lambda i: (f'/api/artists/{artist(i)}', {})),
+        ('GET /venues/create', 'GET', get('/venues/create')),
+        ('POST /venues/create', 'POST',
+         lambda i: ('/venues/create', {'data': venue_form(i)})),
+        ('GET /artists/create', 'GET', get('/artists/create')),
+        ('POST /artists/create', 'POST',
+         lambda i: ('/artists/create', {'data': artist_form(i)})),
+        ('GET /shows/create', 'GET', get('/shows/create')),
+        ('POST /shows/create', 'POST',
+         lambda i: ('/shows/create', {'data': {
+             'venue_id': str(venue(i)), 'artist_id': str(artist(i)),
+             'start_time': f'2030-01-{i % 28 + 1:02d} 20:00:00'}})),
+        ('POST /api/shows/check', 'POST',
+         lambda i: ('/api/shows/check', {'json': tour(i)})),
+        ('GET /venues/<int:venue_id>/edit', 'GET',
+         lambda i: (f'/venues/{venue(i)}/edit', {})),
+        ('POST /venues/<int:venue_id>/edit', 'POST',
+         lambda i: (f'/venues/{venue(i)}/edit', {'data': venue_form(i)})),
+        ('GET /artists/<int:artist_id>/edit', 'GET',
+         lambda i: (f'/artists/{artist(i)}/edit', {})),
+        ('POST /artists/<int:artist_id>/edit', 'POST',
+         lambda i: (f'/artists/{artist(i)}/edit',
+                    {'data': artist_form(i)})),
+    ]
+
+
+def uncovered(app, names):
+    covered = {name.split('?')[0] for name in names}
+    return sorted(
+        f'{method} {rule.rule}' for rule in app.url_map.iter_rules()
+        if rule.rule not in UNBENCHMARKED
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+        if f'{method} {rule.rule}' not in covered)
+
+
+def measure(app, routes, repeat):
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app import page_cache
+
+    queries = 0
+
+    def count(*args):
+        nonlocal queries
+        queries += 1
+
+    client = app.test_client()
+    results = {}
+    event.listen(Engine, 'before_cursor_execute', count)
+    try:
+        for name, method, request in routes:
+            times, counts, statuses = [], [], set()
+            # The first run warms up templates and caches.
+            for i in range(repeat + 1):
+                url, options = request(i)
+                detail = re.fullmatch(r'/(venue|artist)s/(\d+)', url)
+                if detail:
+                    # Measure the render, not the page cache.
+                    page_cache.invalidate('{}:{}'.format(*detail.groups()))
+                queries = 0
+                started = time.perf_counter()
+                response = client.open(url, method=method, **options)
+                elapsed = time.perf_counter() - started
+                response.close()
+                if i:
+                    times.append(elapsed * 1000)
+                    counts.append(queries)
+                    statuses.add(response.status_code)
+            results[name] = {
+                'p50_ms': statistics.median(times),
+                'p95_ms': percentile(times, 95),
+                'queries': max(counts),
+                'statuses': sorted(statuses),
+            }
+    finally:
+        event.remove(Engine, 'before_cursor_execute', count)
+    return results
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, math.ceil(len(values) * p / 100) - 1)]
+
+
+def check(results, budgets):
+    """Yield ``(name, problem)`` for every result over its budget."""
+    for name, result in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            yield name, 'no budget, run with --update-budgets'
+            continue
+        if result['queries'] > budget['queries']:
+            yield name, (f"{result['queries']} queries, "
+                         f"budget {budget['queries']}")
+        if result['p95_ms'] > budget['p95_ms']:
+            yield name, (f"p95 {result['p95_ms']:.1f}ms, "
+                         f"budget {budget['p95_ms']}ms")
+        if any(status >= 400 for status in result['statuses']):
+            yield name, f"responded {result['statuses']}"
+
+
+def new_budgets(results):
+    # Queries exactly, latency with room for noisy machines.
+    return {name: {'queries': result['queries'],
+                   'p95_ms': max(25, math.ceil(result['p95_ms'] * 4 / 5) * 5)}
+            for name, result in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scale', type=int, default=500,
+                        help='venues to seed a scratch database with')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='measured requests per route')
+    parser.add_argument('--budgets', default=BUDGETS)
+    parser.add_argument('--update-budgets', action='store_true',
+                        help='record these results as the new budgets')
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        scratch = tempfile.mkdtemp(prefix='fyyur-bench-')
+        os.environ['DATABASE_URL'] = \
+            'sqlite:///' + os.path.join(scratch, 'fyyur.db')
+
+    import flask_migrate
+    from app import create_app, db, Venue
+    from image_origin import image_origin
+    from seed import seed
+
+    # The image origin stand-in listens on 127.0.0.1.
+    app = create_app(WTF_CSRF_ENABLED=False, THUMBNAIL_ALLOW_PRIVATE=True,
+                     THUMBNAIL_CACHE_DIR=tempfile.mkdtemp(
+                         prefix='fyyur-thumbnails-'))
+    with app.app_context(), image_origin() as origin:
+        flask_migrate.upgrade(directory=os.path.join(ROOT, 'migrations'))
+        if not db.session.query(Venue.id).first():
+            seed(args.scale, image_origin=origin)
+        plan = routes(args.repeat)
+        results = measure(app, plan, args.repeat)
+    for rule in uncovered(app, [name for name, _, _ in plan]):
+        print(f'not benchmarked: {rule}')
+
+    print(f"{'route':36} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8}")
+    for name, result in results.items():
+        print(f"{name:36} {result['p50_ms']:8.1f} {result['p95_ms']:8.1f} "
+              f"{result['queries']:8d}")
+
+    if args.update_budgets:
+        with open(args.budgets, 'w') as f:
+            json.dump(new_budgets(results), f, indent=2)
+            f.write('\n')
+        print(f'budgets written to {args.budgets}')
+        return
+
+    with open(args.budgets) as f:
+        budgets = json.load(f)
+    failures = list(check(results, budgets))
+    for name, problem in failures:
+        print(f'OVER BUDGET {name}: {problem}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
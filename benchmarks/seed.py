@@ -0,0 +1,157 @@
+"""Fill the database with synthetic venues, artists and shows.
+
+    $ python benchmarks/seed.py 1000
+    $ DATABASE_URL=postgresql:///fyyur_bench python benchmarks/seed.py 5000
+
+SCALE is the number of venues; there are twice as many artists and up
+to ten shows per venue, about a third of them upcoming. Shows that
+would double book a venue or an artist are dropped. Venues are placed
+within about 20 km of their city centre. The database is
+migrated to the latest revision first. The same SCALE and --seed give
+the same rows. Image links point at picsum.photos, or at
+--image-origin, such as the stand-in of image_origin.py.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CITIES = [('San Francisco', 'CA', 37.77, -122.42),
+          ('Los Angeles', 'CA', 34.05, -118.24),
+          ('New York', 'NY', 40.71, -74.01), ('Brooklyn', 'NY', 40.68, -73.94),
+          ('Austin', 'TX', 30.27, -97.74), ('Houston', 'TX', 29.76, -95.37),
+          ('Chicago', 'IL', 41.88, -87.63), ('Seattle', 'WA', 47.61, -122.33),
+          ('Portland', 'OR', 45.52, -122.68), ('Denver', 'CO', 39.74, -104.99),
+          ('Nashville', 'TN', 36.16, -86.78), ('Atlanta', 'GA', 33.75, -84.39),
+          ('Miami', 'FL', 25.76, -80.19), ('Boston', 'MA', 42.36, -71.06),
+          ('New Orleans', 'LA', 29.95, -90.07),
+          ('Detroit', 'MI', 42.33, -83.05)]
+WORDS = ['Blue', 'Velvet', 'Electric', 'Midnight', 'Golden', 'Silver',
+         'Wild', 'Crimson', 'Lucky', 'Broken', 'Neon', 'Paper', 'Iron',
+         'Hollow', 'Sunset', 'Echo', 'Stone', 'River', 'Jazz', 'Rock']
+VENUE_KINDS = ['Hall', 'Lounge', 'Club', 'Theatre', 'Cellar', 'Room',
+               'Bar', 'Arena', 'Garden', 'House']
+ARTIST_KINDS = ['Band', 'Trio', 'Quartet', 'Collective', 'Project',
+                'Orchestra', 'Brothers', 'Sisters', 'Ensemble', 'Crew']
+
+ARTISTS_PER_VENUE = 2
+SHOWS_PER_VENUE = 10
+CHUNK = 5000
+IMAGE_ORIGIN = 'https://picsum.photos'
+
+
+def genre_choices():
+    from forms import VenueForm
+    return [value for value, _ in VenueForm.genres.kwargs['choices']]
+
+
+def owner_rows(rng, count, kinds, extra, image_origin=IMAGE_ORIGIN):
+    for i in range(count):
+        city, state, latitude, longitude = rng.choice(CITIES)
+        name = f'{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(kinds)}'
+        row = {'name': f'{name} {i}', 'city': city, 'state': state,
+               'phone': f'{rng.randint(200, 999)}-555-{i % 10000:04d}',
+               'image_link': f'{image_origin}/seed/{i}/1200/800',
+               'facebook_link': f'https://www.facebook.com/{i}',
+               'website': f'https://example.com/{i}',
+               'seeking_description': rng.choice([None, 'Open to booking'])}
+        row.update(extra(i, latitude, longitude))
+        yield row
+
+
+def located(row, latitude, longitude):
+    from geo import cell
+    row.update(latitude=latitude, longitude=longitude,
+               geocell=cell(latitude, longitude))
+    return row
+
+
+def insert_owners(model, links, owner_column, rows, rng, genres):
+    from app import db
+
+    table = model.__table__
+    rows = list(rows)
+    ids = []
+    for start in range(0, len(rows), CHUNK):
+        ids += db.session.execute(
+            table.insert().returning(table.c.id,
+                                     sort_by_parameter_order=True),
+            rows[start:start + CHUNK]).scalars().all()
+    links_rows = [{owner_column: id, 'genre_id': genre.id}
+                  for id in ids
+                  for genre in rng.sample(genres, rng.randint(1, 3))]
+    for start in range(0, len(links_rows), CHUNK):
+        db.session.execute(links.insert(), links_rows[start:start + CHUNK])
+    return ids
+
+
+def seed(scale, random_seed=0, now=None, image_origin=IMAGE_ORIGIN):
+    """Insert ``scale`` venues with their artists and shows."""
+    from flask import current_app
+    from app import (db, Venue, Artist, Show, venue_genres, artist_genres,
+                     genres_named, refresh_show_counts, refresh_rollups,
+                     schedule_overlaps)
+
+    rng = random.Random(random_seed)
+    now = now or datetime.now().replace(minute=0, second=0, microsecond=0)
+    genres = sorted(genres_named(genre_choices()), key=lambda g: g.name)
+    db.session.flush()
+
+    venue_ids = insert_owners(
+        Venue, venue_genres, 'venue_id',
+        owner_rows(rng, scale, VENUE_KINDS, lambda i, lat, lon: located({
+            'address': f'{rng.randint(1, 9999)} Main Street',
+            'seeking_talent': rng.random() < 0.3},
+            lat + rng.uniform(-0.2, 0.2), lon + rng.uniform(-0.2, 0.2)),
+            image_origin),
+        rng, genres)
+    artist_ids = insert_owners(
+        Artist, artist_genres, 'artist_id',
+        owner_rows(rng, scale * ARTISTS_PER_VENUE, ARTIST_KINDS,
+                   lambda i, lat, lon: {'seeking_venue': rng.random() < 0.3},
+                   image_origin),
+        rng, genres)
+
+    # Shows spread over the past two years and the coming one, without
+    # double bookings.
+    length = timedelta(minutes=current_app.config['SHOW_MINUTES'])
+    proposed = []
+    for _ in range(scale * SHOWS_PER_VENUE):
+        start = now + timedelta(days=rng.randint(-730, 365),
+                                hours=rng.randint(-4, 4))
+        proposed.append((rng.choice(venue_ids), rng.choice(artist_ids),
+                         start, start + length))
+    overlapping = {index for index, _, _ in schedule_overlaps(proposed)}
+    shows = [{'venue_id': venue_id, 'artist_id': artist_id,
+              'start_time': start, 'end_time': end}
+             for i, (venue_id, artist_id, start, end) in enumerate(proposed)
+             if i not in overlapping]
+    for start in range(0, len(shows), CHUNK):
+        db.session.execute(Show.__table__.insert(),
+                           shows[start:start + CHUNK])
+    db.session.commit()
+    refresh_show_counts()
+    refresh_rollups()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('scale', type=int, help='number of venues')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--image-origin', default=IMAGE_ORIGIN)
+    args = parser.parse_args()
+
+    import flask_migrate
+    from app import create_app
+
+    with create_app().app_context():
+        flask_migrate.upgrade(directory=os.path.join(ROOT, 'migrations'))
+        seed(args.scale, args.seed, image_origin=args.image_origin)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Measure cold start: importing the app module, building the app with
+``create_app()`` and serving the first request, each in a fresh
+interpreter.
+
+    $ python benchmarks/startup.py
+    $ python benchmarks/startup.py --runs 20 --imports 15
+
+--imports lists the slowest modules imported on the way, from
+``python -X importtime``.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+application.test_client().get('/')
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': served - created,
+    'total': served - started,
+}))
+'''
+
+
+def probe_env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [ROOT] + [p for p in [env.get('PYTHONPATH')] if p])
+    # The home page needs no tables, a missing database is fine.
+    env.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(
+        tempfile.gettempdir(), 'fyyur-startup.db'))
+    env.setdefault('SECRET_KEY', 'startup-benchmark')
+    return env
+
+
+def run_probe(env, *flags):
+    result = subprocess.run(
+        [sys.executable, *flags, '-c', PROBE], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def slowest_imports(stderr, count):
+    # Lines read "import time: self [us] | cumulative | imported package".
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((int(cumulative), name.rstrip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--imports', type=int, default=0, metavar='N',
+                        help='also list the N slowest imports')
+    args = parser.parse_args()
+
+    env = probe_env()
+    samples = [run_probe(env)[0] for _ in range(args.runs)]
+    print(f"{'phase':14} {'p50 ms':>8} {'max ms':>8}")
+    for phase in ('import', 'create_app', 'first_request', 'total'):
+        values = [sample[phase] * 1000 for sample in samples]
+        print(f'{phase:14} {statistics.median(values):8.1f} '
+              f'{max(values):8.1f}')
+
+    if args.imports:
+        _, stderr = run_probe(env, '-X', 'importtime')
+        print(f"\n{'cumulative ms':>13}  module")
+        for cumulative, name in slowest_imports(stderr, args.imports):
+            print(f'{cumulative / 1000:13.1f}  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+import os
+import time
+from collections import OrderedDict
+from threading import Lock, get_ident
+
+
+class LRUBackend:
+    """In-process store, evicts the least recently used entry once
+    ``max_entries`` is reached and drops entries older than ``ttl``."""
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Store shared by every worker, needs the ``redis`` package."""
+
+    def __init__(self, url, ttl=300, prefix='fyyur:page:'):
+        import redis
+        self.ttl = ttl
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key):
+        value = self._redis.get(self.prefix + key)
+        return None if value is None else value.decode()
+
+    def set(self, key, value):
+        self._redis.setex(self.prefix + key, self.ttl, value)
+
+    def delete(self, *keys):
+        if keys:
+            self._redis.delete(*[self.prefix + key for key in keys])
+
+    def __len__(self):
+        return sum(1 for _ in self._redis.scan_iter(self.prefix + '*'))
+
+
+def backend_from_config(config):
+    ttl = config['PAGE_CACHE_TTL']
+    if config.get('PAGE_CACHE_URL'):
+        return RedisBackend(config['PAGE_CACHE_URL'], ttl)
+    return LRUBackend(config['PAGE_CACHE_SIZE'], ttl)
+
+
+class PageCache:
+    """Rendered page cache keyed by entity, e.g. ``venue:1``.
+
+    Entries are dropped with :meth:`invalidate` by the handlers that
+    change what the page shows.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(backend_from_config(config))
+
+    def init_app(self, app):
+        self.backend = backend_from_config(app.config)
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def invalidate(self, *keys):
+        self.backend.delete(*keys)
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+class DiskCache:
+    """Files in one directory, kept under ``max_bytes``.
+
+    Reading a file bumps its mtime; once a write takes the directory
+    over the bound, the files read longest ago are removed until it is
+    back under nine tenths of it. Writes are atomic, so processes can
+    share the directory.
+    """
+
+    def __init__(self, directory=None, max_bytes=0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Bytes in the directory, counted on the first write and
+        # recounted on eviction; other processes' writes are missed
+        # until then.
+        self._size = None
+        self._lock = Lock()
+
+    def configure(self, directory, max_bytes):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def get(self, name):
+        """The path of ``name``, or None when it is not cached."""
+        path = self.path(name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def read(self, name):
+        path = self.get(name)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, name, data):
+        path = self.path(name)
+        partial = f'{path}.{os.getpid()}.{get_ident()}.tmp'
+        with open(partial, 'wb') as f:
+            f.write(data)
+        os.replace(partial, path)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._files())
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+        return path
+
+    def _files(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.tmp'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            yield stat.st_mtime, stat.st_size, entry.path
+
+    def _evict(self):
+        files = sorted(self._files())
+        size = sum(size for _, size, _ in files)
+        for _, file_size, path in files:
+            if size <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= file_size
+        self._size = size
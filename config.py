@@ -1,14 +1,118 @@
 import os
-SECRET_KEY = os.urandom(32)
+# Shared by every worker. Without SECRET_KEY in the environment a key is
+# generated once and kept in the instance folder.
+SECRET_KEY = os.environ.get('SECRET_KEY')
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-# Enable debug mode.
-DEBUG = True
+# Enable debug mode with FLASK_DEBUG=1.
+DEBUG = os.environ.get('FLASK_DEBUG', '0') == '1'
+
+# Compiled templates are kept here across restarts and shared by the
+# workers, in the instance folder when unset.
+TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
+# Compile every template when the app is built, so the first requests
+# of a worker, or of every worker forked from a --preload master, do
+# not pay for it.
+WARM_TEMPLATES = os.environ.get('WARM_TEMPLATES', '1') == '1'
+
+# Errors and slow requests are logged here when debug mode is off.
+LOG_FILE = os.environ.get('LOG_FILE', os.path.join(basedir, 'error.log'))
+
+# Requests slower than SLOW_REQUEST_MS or running more than
+# SLOW_REQUEST_QUERIES SQL statements are logged as slow.
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES', 20))
 
 # Connect to the database
+SQLALCHEMY_DATABASE_URI = os.environ.get(
+    'DATABASE_URL', 'postgresql://suliman@localhost:5432/fyyur')
+if SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
+    # Heroku style URLs, which SQLAlchemy no longer accepts.
+    SQLALCHEMY_DATABASE_URI = 'postgresql://' + \
+        SQLALCHEMY_DATABASE_URI[len('postgres://'):]
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Connection pool, per worker process: keep DB_POOL_SIZE +
+# DB_MAX_OVERFLOW times the number of gunicorn workers under the
+# server's max_connections. Connections are recycled before the server
+# or a proxy drops them when idle, and pinged on checkout so a dead one
+# is replaced instead of failing the request. create_app turns these
+# into engine options for the database it is given, in-memory SQLite
+# takes none of them.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+# Further engine options, applied over the ones above.
+SQLALCHEMY_ENGINE_OPTIONS = {}
+
+# Milliseconds before Postgres cancels a statement run for a request,
+# 0 disables it. CLI commands, such as imports, are not limited.
+DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 30000))
+
+# Rows per page on the paginated listings, ?per_page= may ask for up
+# to MAX_PER_PAGE.
+PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+# Maximum number of results returned by the search pages.
+SEARCH_LIMIT = 50
+
+# Maximum number of names returned by /search/suggest.
+SUGGEST_LIMIT = 10
+# Seconds between checks for venues and artists written by other
+# workers, which the typeahead index then reloads; None never checks.
+SUGGEST_REFRESH = 30
+
+# Rendered venue/artist page cache. Set PAGE_CACHE_URL to a redis:// URL
+# to share it between workers, otherwise each process keeps an LRU of
+# PAGE_CACHE_SIZE pages.
+PAGE_CACHE_URL = os.environ.get('PAGE_CACHE_URL')
+PAGE_CACHE_SIZE = 1024
+PAGE_CACHE_TTL = 300
+
+# Radius of /venues/near in km when none is given, the largest one it
+# accepts, and the most venues it returns.
+NEAR_RADIUS_KM = 25
+NEAR_MAX_RADIUS_KM = 200
+NEAR_LIMIT = 50
+
+# Similar artists and venues listed on the detail pages, refreshed by
+# ``flask recommend``.
+RECOMMENDATIONS = 6
+
+# Months up to and including this one shown on /analytics, and the
+# venues, cities, genres and artists ranked in each table.
+ANALYTICS_MONTHS = 12
+ANALYTICS_TOP = 10
+
+# Venue and artist image thumbnails served by /img/, kept with their
+# originals in THUMBNAIL_CACHE_DIR (the instance folder when unset) up
+# to THUMBNAIL_CACHE_BYTES, the least recently served evicted first. A
+# requested width is rounded up to the next of THUMBNAIL_WIDTHS.
+THUMBNAIL_CACHE_DIR = os.environ.get('THUMBNAIL_CACHE_DIR')
+THUMBNAIL_CACHE_BYTES = int(os.environ.get('THUMBNAIL_CACHE_BYTES',
+                                           512 * 1024 * 1024))
+THUMBNAIL_WIDTHS = (240, 480, 960)
+THUMBNAIL_QUALITY = 80
+# Originals larger than THUMBNAIL_MAX_BYTES or slower than the timeout,
+# in seconds, are not thumbnailed; they are tried again after
+# THUMBNAIL_RETRY seconds.
+THUMBNAIL_MAX_BYTES = 10 * 1024 * 1024
+THUMBNAIL_FETCH_TIMEOUT = 5
+THUMBNAIL_RETRY = 600
+THUMBNAIL_MAX_REDIRECTS = 5
+# Originals are only fetched from public addresses, so image links
+# cannot reach the server's own network; True allows private ones too.
+THUMBNAIL_ALLOW_PRIVATE = False
+
+# Length of a show, in minutes, when it is booked without one.
+SHOW_MINUTES = 180
 
+# Most shows /api/shows/check accepts in one schedule.
+SCHEDULE_CHECK_LIMIT = 500
 
-# TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgresql://suliman@localhost:5432/fyyur'
-SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+# Rows fetched per server-side cursor round trip by the exports.
+EXPORT_CHUNK = 1000
@@ -0,0 +1,30 @@
+import json
+import re
+
+# SQLite plan lines for full scans look like "SCAN Venue", index walks
+# read "SCAN Venue USING INDEX ..." and lookups "SEARCH Venue ...".
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?"?(\w+)"?(?: AS \w+)?$')
+
+
+def seq_scans(connection, statement, parameters):
+    """Return the tables ``statement`` reads with a sequential scan."""
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        plan = connection.exec_driver_sql(
+            'EXPLAIN (FORMAT JSON) ' + statement, parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return set(_pg_seq_scans(plan[0]['Plan']))
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(
+            'EXPLAIN QUERY PLAN ' + statement, parameters)
+        return {match.group(1) for match in
+                (SQLITE_SCAN.match(row[-1]) for row in rows) if match}
+    raise NotImplementedError(f'no plan inspection for {dialect}')
+
+
+def _pg_seq_scans(node):
+    if node['Node Type'] == 'Seq Scan':
+        yield node['Relation Name']
+    for child in node.get('Plans', []):
+        yield from _pg_seq_scans(child)
@@ -0,0 +1,33 @@
+from datetime import datetime
+from functools import lru_cache
+
+# babel and dateutil are imported on first use, they are slow to import
+# and only needed once a page renders a date.
+
+# Named formats accepted by the ``datetime`` filter.
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+
+@lru_cache(maxsize=None)
+def datetime_pattern(format):
+    # Compiled CLDR pattern, parsed once per format.
+    import babel.dates
+    return babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format))
+
+
+@lru_cache(maxsize=None)
+def locale(identifier='en'):
+    import babel
+    return babel.Locale.parse(identifier)
+
+
+def format_datetime(value, format='medium'):
+    # Handlers pass datetimes, strings are still accepted for callers
+    # that format stored text.
+    if not isinstance(value, datetime):
+        import dateutil.parser
+        value = dateutil.parser.parse(value)
+    return datetime_pattern(format).apply(value, locale())
@@ -1,11 +1,12 @@
 from datetime import datetime
-from flask_wtf import Form
+from flask_wtf import FlaskForm
 from wtforms import StringField, SelectField, SelectMultipleField,\
-                    DateTimeField, BooleanField
-from wtforms.validators import DataRequired, AnyOf, URL
+                    DateTimeField, BooleanField, IntegerField
+from wtforms.validators import DataRequired, AnyOf, URL, Optional, \
+    NumberRange
 
 
-class ShowForm(Form):
+class ShowForm(FlaskForm):
     artist_id = StringField(
         'artist_id'
     )
@@ -17,9 +18,12 @@ class ShowForm(Form):
         validators=[DataRequired()],
         default=datetime.today()
     )
+    duration = IntegerField(
+        'duration', validators=[Optional(), NumberRange(min=1)]
+    )
 
 
-class VenueForm(Form):
+class VenueForm(FlaskForm):
     name = StringField(
         'name', validators=[DataRequired()]
     )
@@ -132,7 +136,7 @@ class VenueForm(Form):
     )
 
 
-class ArtistForm(Form):
+class ArtistForm(FlaskForm):
     name = StringField(
         'name', validators=[DataRequired()]
     )
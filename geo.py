@@ -0,0 +1,161 @@
+"""Venue coordinates: a grid index for radius lookups and offline
+geocoding from a local lookup file.
+
+The globe is cut into CELL_DEGREES squares numbered row by row from
+the south-west corner, and each venue stores the number of its cell.
+A radius lookup turns its bounding box into one range of cell numbers
+per row of cells, scans those with the (geocell, latitude, longitude)
+index and ranks what remains by haversine distance.
+
+    $ flask geocode places.csv
+    $ flask geocode places.csv --all
+"""
+import csv
+import math
+
+import click
+
+EARTH_RADIUS_KM = 6371.0088
+# Changing the cell size needs every geocell recomputed, run
+# ``flask geocode --all``.
+CELL_DEGREES = 0.1
+ROWS = round(180 / CELL_DEGREES)
+COLUMNS = round(360 / CELL_DEGREES)
+
+
+def _row(latitude):
+    return min(math.floor((latitude + 90) / CELL_DEGREES), ROWS - 1)
+
+
+def _column(longitude):
+    return math.floor((longitude + 180) / CELL_DEGREES) % COLUMNS
+
+
+def cell(latitude, longitude):
+    """Number of the grid cell holding a point."""
+    return _row(latitude) * COLUMNS + _column(longitude)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """``(south, north, west, east)`` around the circle of
+    ``radius_km``. West is greater than east when the box crosses the
+    antimeridian."""
+    angle = radius_km / EARTH_RADIUS_KM
+    south = max(latitude - math.degrees(angle), -90.0)
+    north = min(latitude + math.degrees(angle), 90.0)
+    if south == -90.0 or north == 90.0:
+        return south, north, -180.0, 180.0
+    spread = math.degrees(math.asin(
+        min(1.0, math.sin(angle) / math.cos(math.radians(latitude)))))
+    if spread >= 180.0:
+        return south, north, -180.0, 180.0
+    west, east = longitude - spread, longitude + spread
+    if west < -180.0:
+        west += 360.0
+    if east > 180.0:
+        east -= 360.0
+    return south, north, west, east
+
+
+def cell_ranges(south, north, west, east):
+    """``(first, last)`` cell numbers covering the box, one range per
+    row of cells, two when the box crosses the antimeridian."""
+    if west <= east:
+        spans = [(_column(west), _column(east) if east < 180.0
+                  else COLUMNS - 1)]
+    else:
+        spans = [(_column(west), COLUMNS - 1), (0, _column(east))]
+    return [(row * COLUMNS + first, row * COLUMNS + last)
+            for row in range(_row(south), _row(north) + 1)
+            for first, last in spans]
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Great-circle distances from one point to arrays of points."""
+    import numpy as np
+
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    lats, lons = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lats - lat) / 2) ** 2 + \
+        math.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def nearest(latitude, longitude, radius_km, rows, limit):
+    """The ``limit`` rows within ``radius_km``, closest first, as
+    ``(row, distance_km)``. Rows end with their latitude and
+    longitude."""
+    import numpy as np
+
+    if not rows:
+        return []
+    points = np.array([row[-2:] for row in rows], dtype=float)
+    distances = haversine_km(latitude, longitude, points[:, 0], points[:, 1])
+    inside = np.flatnonzero(distances <= radius_km)
+    order = inside[np.argsort(distances[inside], kind='stable')[:limit]]
+    return [(rows[i], float(distances[i])) for i in order]
+
+
+def place_key(*parts):
+    return '|'.join(' '.join((part or '').lower().split())
+                    for part in parts)
+
+
+def load_places(stream):
+    """Read a lookup file of ``city,state,latitude,longitude`` rows
+    with an optional ``address`` column. Rows with an address locate
+    that address, rows without one locate the city."""
+    places = {}
+    for row in csv.DictReader(stream):
+        point = (float(row['latitude']), float(row['longitude']))
+        places[place_key(row.get('address'), row['city'],
+                         row['state'])] = point
+    return places
+
+
+def locate(places, address, city, state):
+    return places.get(place_key(address, city, state)) or \
+        places.get(place_key(None, city, state))
+
+
+@click.command('geocode')
+@click.argument('places', type=click.File('r', encoding='utf-8'))
+@click.option('--all', 'everything', is_flag=True,
+              help='Geocode venues that already have coordinates too.')
+@click.option('--batch-size', default=1000, show_default=True)
+def geocode_command(places, everything, batch_size):
+    """Set venue coordinates from the PLACES lookup file."""
+    from sqlalchemy import bindparam
+    from app import db, Venue
+
+    places = load_places(places)
+    query = db.session.query(Venue.id, Venue.address, Venue.city,
+                             Venue.state)
+    if not everything:
+        query = query.filter(Venue.latitude.is_(None))
+    table = Venue.__table__
+    update = table.update().where(table.c.id == bindparam('venue_id')) \
+        .values(latitude=bindparam('lat'), longitude=bindparam('lon'),
+                geocell=bindparam('cell'))
+
+    located = missed = 0
+    last_id = 0
+    while True:
+        batch = query.filter(Venue.id > last_id).order_by(Venue.id) \
+            .limit(batch_size).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        values = []
+        for venue in batch:
+            point = locate(places, venue.address, venue.city, venue.state)
+            if point is None:
+                missed += 1
+                continue
+            values.append({'venue_id': venue.id, 'lat': point[0],
+                           'lon': point[1], 'cell': cell(*point)})
+        if values:
+            db.session.execute(update, values)
+        db.session.commit()
+        located += len(values)
+    click.echo(f'venues: {located} located, {missed} not found')
@@ -0,0 +1,202 @@
+"""Resized thumbnails of venue and artist images.
+
+/img/<kind>/<id>?w= fetches the entity's image_link once, and serves it
+scaled down to the next of THUMBNAIL_WIDTHS, as WebP to browsers that
+accept it and JPEG to the others. Originals and thumbnails live in
+``thumbnail_cache``, named after the SHA-256 of the original, so
+entities sharing an image share its thumbnails.
+
+Thumbnail URLs carry a version of the image link, browsers may keep
+them for a year: a new link is a new URL. An original that cannot be
+fetched or read is retried after THUMBNAIL_RETRY seconds, meanwhile
+its URL is redirected to, so the browser can still try.
+
+Only hosts with public addresses are fetched from, checked again on
+every redirect, so an image link cannot make the server request its
+own network. THUMBNAIL_ALLOW_PRIVATE lifts that, for a local origin.
+"""
+import hashlib
+import ipaddress
+import os
+import socket
+import time
+import urllib.error
+import urllib.request
+from io import BytesIO
+from urllib.parse import urljoin, urlsplit
+
+from flask import Blueprint, request, abort, redirect, send_file, url_for, \
+    current_app
+
+from app import db, Venue, Artist, thumbnail_cache
+
+bp = Blueprint('images', __name__)
+
+FORMATS = {'webp': ('WEBP', 'image/webp'), 'jpg': ('JPEG', 'image/jpeg')}
+ONE_YEAR = 365 * 24 * 60 * 60
+
+
+def link_key(image_link):
+    return hashlib.sha256(image_link.encode()).hexdigest()
+
+
+def link_version(image_link):
+    return link_key(image_link)[:8]
+
+
+@bp.app_template_global()
+def thumbnail_url(kind, id, image_link, width):
+    """URL of the ``width`` pixels wide thumbnail of an image link."""
+    if not image_link:
+        return image_link
+    return url_for('images.thumbnail', kind=kind, id=id, w=width,
+                   v=link_version(image_link))
+
+
+class NoRedirects(urllib.request.HTTPRedirectHandler):
+    # A redirect surfaces as an HTTPError, for fetch to check its
+    # target before following it.
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+opener = urllib.request.build_opener(NoRedirects)
+
+
+def check_public(url):
+    """Raise ValueError unless ``url`` is http(s) on a host all of
+    whose addresses are public."""
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ValueError(f'not an http(s) URL: {url}')
+    if current_app.config['THUMBNAIL_ALLOW_PRIVATE']:
+        return
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    for *_, sockaddr in socket.getaddrinfo(parts.hostname, port,
+                                           proto=socket.IPPROTO_TCP):
+        address = ipaddress.ip_address(sockaddr[0].split('%')[0])
+        address = getattr(address, 'ipv4_mapped', None) or address
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f'not a public address: {url} ({address})')
+
+
+def fetch(image_link):
+    """The bytes of an image, checked to be one Pillow can read."""
+    from PIL import Image
+
+    config = current_app.config
+    url = image_link
+    for _ in range(config['THUMBNAIL_MAX_REDIRECTS'] + 1):
+        check_public(url)
+        try:
+            with opener.open(urllib.request.Request(
+                    url, headers={'User-Agent': 'fyyur-thumbnails'}),
+                    timeout=config['THUMBNAIL_FETCH_TIMEOUT']) as response:
+                data = response.read(config['THUMBNAIL_MAX_BYTES'] + 1)
+            break
+        except urllib.error.HTTPError as e:
+            location = e.headers.get('Location')
+            if e.code not in (301, 302, 303, 307, 308) or not location:
+                raise
+            url = urljoin(url, location)
+    else:
+        raise ValueError(f'more than THUMBNAIL_MAX_REDIRECTS: {image_link}')
+    if len(data) > config['THUMBNAIL_MAX_BYTES']:
+        raise ValueError(f'larger than THUMBNAIL_MAX_BYTES: {image_link}')
+    Image.open(BytesIO(data)).verify()
+    return data
+
+
+def fetch_original(image_link):
+    """``(digest, data)`` of the image at ``image_link``, or None when
+    it cannot be had, in which case it is not asked for again for
+    THUMBNAIL_RETRY seconds."""
+    failed = 'failed-' + link_key(image_link)
+    try:
+        if time.time() - os.stat(thumbnail_cache.path(failed)).st_mtime < \
+                current_app.config['THUMBNAIL_RETRY']:
+            return None
+    except FileNotFoundError:
+        pass
+    try:
+        data = fetch(image_link)
+    except Exception as e:
+        current_app.logger.warning('thumbnail of %s: %s', image_link, e)
+        thumbnail_cache.set(failed, b'')
+        return None
+    digest = hashlib.sha256(data).hexdigest()
+    thumbnail_cache.set(digest, data)
+    thumbnail_cache.set('link-' + link_key(image_link), digest.encode())
+    return digest, data
+
+
+def resized(data, width, format):
+    from PIL import Image, ImageOps
+
+    image = Image.open(BytesIO(data))
+    # JPEGs decode straight at a fraction of their size.
+    image.draft('RGB', (width, width))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((width, width * 2), Image.LANCZOS)
+    transparent = image.mode in ('RGBA', 'LA') or \
+        (image.mode == 'P' and 'transparency' in image.info)
+    if format == 'jpg' and transparent:
+        image = image.convert('RGBA')
+        flat = Image.new('RGB', image.size, 'white')
+        flat.paste(image, mask=image.getchannel('A'))
+        image = flat
+    else:
+        image = image.convert('RGBA' if transparent else 'RGB')
+    buffer = BytesIO()
+    image.save(buffer, FORMATS[format][0],
+               quality=current_app.config['THUMBNAIL_QUALITY'],
+               optimize=True)
+    return buffer.getvalue()
+
+
+def thumbnail_width(requested):
+    widths = sorted(current_app.config['THUMBNAIL_WIDTHS'])
+    if requested is None:
+        return widths[-1]
+    return next((width for width in widths if width >= requested),
+                widths[-1])
+
+
+@bp.route('/img/<kind>/<int:id>')
+def thumbnail(kind, id):
+    model = {'venue': Venue, 'artist': Artist}.get(kind)
+    if model is None:
+        abort(404)
+    image_link = db.session.query(model.image_link) \
+        .filter(model.id == id).scalar()
+    if not image_link:
+        abort(404)
+    width = thumbnail_width(request.args.get('w', type=int))
+    format = 'webp' if 'image/webp' in request.headers.get('Accept', '') \
+        else 'jpg'
+
+    # Straight to the thumbnail when the link was fetched before.
+    digest = (thumbnail_cache.read('link-' + link_key(image_link)) or
+              b'').decode()
+    path = digest and thumbnail_cache.get(f'{digest}-{width}.{format}')
+    if not path:
+        data = digest and thumbnail_cache.read(digest)
+        if not data:
+            fetched = fetch_original(image_link)
+            if fetched is None:
+                if urlsplit(image_link).scheme in ('http', 'https'):
+                    return redirect(image_link)
+                abort(404)
+            digest, data = fetched
+        path = thumbnail_cache.set(f'{digest}-{width}.{format}',
+                                   resized(data, width, format))
+
+    versioned = request.args.get('v') == link_version(image_link)
+    # The file name is a digest of the content, the mtime is not, it
+    # moves on every read.
+    response = send_file(path, mimetype=FORMATS[format][1],
+                         etag=os.path.basename(path),
+                         max_age=ONE_YEAR if versioned else 3600)
+    response.vary.add('Accept')
+    response.cache_control.immutable = versioned
+    return response
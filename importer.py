@@ -0,0 +1,260 @@
+"""Streaming bulk import of venues, artists and shows.
+
+    $ flask import venues venues.csv
+    $ flask import shows shows.ndjson --batch-size 5000
+
+Rows are read one at a time, validated with the same forms the create
+pages use, and written in batches, so memory stays flat whatever the
+size of the file. Show rows reference their venue and artist either by
+``venue_id``/``artist_id`` or by ``venue_name``/``artist_name``, and
+may carry a ``duration`` in minutes. Shows that overlap a booked show,
+or an earlier row of the file, at the same venue or with the same
+artist are rejected.
+"""
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+import click
+from werkzeug.datastructures import MultiDict
+from wtforms import BooleanField
+
+# Proposed shows per conflict query, each takes six bound parameters.
+CONFLICT_CHUNK = 500
+
+
+def read_rows(stream, format):
+    if format == 'ndjson':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(stream)
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+# Spellings of booleans in CSV files, the export writes True/False.
+TRUE = {'true', 't', 'yes', 'y', 'on', '1'}
+FALSE = {'false', 'f', 'no', 'n', 'off', '0'}
+
+
+def boolean_fields(forms):
+    return {name for name in dir(forms)
+            if getattr(getattr(forms, name), 'field_class', None)
+            is BooleanField}
+
+
+def form_data(row, booleans=()):
+    # Forms read request-style multi dicts, CSV carries genres as "a,b".
+    data = MultiDict()
+    for key, value in row.items():
+        if value is None or value == '':
+            continue
+        if key == 'genres' and isinstance(value, str):
+            value = value.split(',')
+        if key in booleans and isinstance(value, str):
+            # A BooleanField takes any string but "false" as checked.
+            spelled = value.strip().lower()
+            if spelled in TRUE | FALSE:
+                value = spelled in TRUE
+        if isinstance(value, bool):
+            value = 'y' if value else 'false'
+        for item in value if isinstance(value, list) else [value]:
+            data.add(key, str(item).strip())
+    return data
+
+
+def validated(forms, rows, first_line, reject):
+    """Yield ``(line, form, row)`` for the rows that pass validation."""
+    booleans = boolean_fields(forms)
+    for line, row in enumerate(rows, first_line):
+        form = forms(form_data(row, booleans), meta={'csrf': False})
+        if form.validate():
+            yield line, form, row
+        else:
+            reject(line, form.errors)
+
+
+def insert_owners(model, links, owner_column, valid):
+    """Insert venues or artists and link them to their genres."""
+    from app import db, genres_named
+
+    if not valid:
+        # An empty executemany would insert one row of defaults.
+        return 0
+    table = model.__table__
+    columns = [c.name for c in table.columns
+               if c.name != 'id' and not c.server_default]
+    values = [{c: form[c].data for c in columns if c in form}
+              for _, form, _ in valid]
+    ids = db.session.execute(
+        table.insert().returning(table.c.id, sort_by_parameter_order=True),
+        values).scalars().all()
+
+    genres = {genre.name: genre for genre in genres_named(
+        {name for _, form, _ in valid for name in form.genres.data})}
+    db.session.flush()
+    rows = [{owner_column: id, 'genre_id': genres[name].id}
+            for id, (_, form, _) in zip(ids, valid)
+            for name in set(form.genres.data)]
+    if rows:
+        db.session.execute(links.insert(), rows)
+    return len(ids)
+
+
+def resolve(model, ids, names):
+    """Map the referenced ids and lower-cased names of one batch to
+    existing ids, with one query each."""
+    from app import db
+    from sqlalchemy import func
+
+    found = {}
+    if ids:
+        found.update((id, id) for id, in db.session.query(model.id)
+                     .filter(model.id.in_(ids)))
+    if names:
+        lower = func.lower(model.name)
+        found.update((name, id) for id, name in db.session.query(
+            model.id, lower).filter(lower.in_(names)))
+    return found
+
+
+def reference(row, form, kind):
+    value = form[f'{kind}_id'].data
+    if value:
+        return int(value) if value.isdigit() else None
+    return (row.get(f'{kind}_name') or '').strip().lower() or None
+
+
+def insert_shows(valid, reject):
+    from app import (db, Venue, Artist, Show, show_interval, show_conflicts,
+                     schedule_overlaps)
+
+    keys = {}
+    for kind in ('venue', 'artist'):
+        refs = [reference(row, form, kind) for _, form, row in valid]
+        keys[kind] = refs
+        keys[kind + 's'] = resolve(
+            Venue if kind == 'venue' else Artist,
+            {r for r in refs if isinstance(r, int)},
+            {r for r in refs if isinstance(r, str)})
+
+    lines, proposed = [], []
+    for i, (line, form, _) in enumerate(valid):
+        venue_id = keys['venues'].get(keys['venue'][i])
+        artist_id = keys['artists'].get(keys['artist'][i])
+        if venue_id is None or artist_id is None:
+            reject(line, {'show': ['unknown venue or artist']})
+            continue
+        try:
+            start_time, end_time = show_interval(form.start_time.data,
+                                                 form.duration.data)
+        except ValueError as e:
+            reject(line, {'duration': [str(e)]})
+            continue
+        lines.append(line)
+        proposed.append((venue_id, artist_id, start_time, end_time))
+
+    # Against the booked shows, earlier batches included, then within
+    # the batch, where the later of two overlapping rows loses.
+    conflicts = {}
+    for start in range(0, len(proposed), CONFLICT_CHUNK):
+        for index, kind, id, *_ in show_conflicts(
+                proposed[start:start + CONFLICT_CHUNK]):
+            conflicts.setdefault(start + index, f'{kind} booked by show {id}')
+    for index, other, kind in schedule_overlaps(proposed):
+        conflicts.setdefault(
+            index, f'{kind} booked by line {lines[other]}')
+
+    values = []
+    for i, (venue_id, artist_id, start_time, end_time) in enumerate(proposed):
+        if i in conflicts:
+            reject(lines[i], {'show': [conflicts[i]]})
+            continue
+        values.append({'venue_id': venue_id, 'artist_id': artist_id,
+                       'start_time': start_time, 'end_time': end_time})
+    if not values:
+        return 0
+
+    connection = db.session.connection()
+    if connection.dialect.driver == 'psycopg2':
+        # COPY is several times faster than multi-row INSERTs.
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for v in values:
+            writer.writerow([v['venue_id'], v['artist_id'],
+                             v['start_time'].isoformat(' '),
+                             v['end_time'].isoformat(' ')])
+        buffer.seek(0)
+        cursor = connection.connection.driver_connection.cursor()
+        cursor.copy_expert('COPY "Show" (venue_id, artist_id, start_time, '
+                           'end_time) FROM STDIN WITH (FORMAT csv)', buffer)
+    else:
+        db.session.execute(Show.__table__.insert(), values)
+    return len(values)
+
+
+@click.command('import')
+@click.argument('entity', type=click.Choice(['venues', 'artists', 'shows']))
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'format', type=click.Choice(['csv', 'ndjson']),
+              help='Defaults to the file extension, then csv.')
+@click.option('--batch-size', default=1000, show_default=True)
+def import_command(entity, source, format, batch_size):
+    """Stream ENTITY rows from SOURCE (a path or -) into the database."""
+    from app import (db, Venue, Artist, venue_genres, artist_genres,
+                     refresh_show_counts, refresh_rollups)
+    from forms import VenueForm, ArtistForm, ShowForm
+
+    if format is None:
+        format = 'ndjson' if source.name.endswith(
+            ('.ndjson', '.jsonl')) else 'csv'
+    forms = {'venues': VenueForm, 'artists': ArtistForm,
+             'shows': ShowForm}[entity]
+
+    imported = 0
+    rejected = 0
+
+    def reject(line, errors):
+        nonlocal rejected
+        rejected += 1
+        click.echo(f'line {line}: {errors}', err=True)
+
+    line = 2 if format == 'csv' else 1
+    started = time.perf_counter()
+    for batch in batches(read_rows(source, format), batch_size):
+        valid = list(validated(forms, batch, line, reject))
+        line += len(batch)
+        if entity == 'venues':
+            inserted = insert_owners(Venue, venue_genres, 'venue_id', valid)
+        elif entity == 'artists':
+            inserted = insert_owners(Artist, artist_genres, 'artist_id',
+                                     valid)
+        else:
+            inserted = insert_shows(valid, reject)
+        if inserted:
+            db.session.commit()
+        imported += inserted
+        elapsed = time.perf_counter() - started
+        click.echo(f'{imported} rows imported, '
+                   f'{imported / elapsed:.0f} rows/s', err=True)
+
+    if entity == 'shows' and imported:
+        # Bulk inserts bypass the ORM events that maintain the counters
+        # and rollups.
+        refresh_show_counts()
+        refresh_rollups()
+    elapsed = time.perf_counter() - started
+    click.echo(f'{entity}: {imported} imported, {rejected} rejected '
+               f'in {elapsed:.2f}s ({imported / max(elapsed, 1e-9):.0f} '
+               f'rows/s)')
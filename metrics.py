@@ -0,0 +1,110 @@
+"""Per-route request latency and SQL query metrics in Prometheus text
+format.
+
+Metrics live in the worker process that recorded them, so with several
+gunicorn workers each scrape of /metrics sees one worker; the ``pid``
+label keeps their series apart.
+"""
+import os
+from bisect import bisect_left
+from collections import defaultdict
+from threading import Lock
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        """Yield ``(le, cumulative count)`` pairs ending with +Inf."""
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestMetrics:
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS,
+                 query_buckets=QUERY_BUCKETS):
+        self._lock = Lock()
+        self._latency = defaultdict(lambda: Histogram(latency_buckets))
+        self._queries = defaultdict(lambda: Histogram(query_buckets))
+        self._db_seconds = defaultdict(float)
+        self._responses = defaultdict(int)
+        self._slow = defaultdict(int)
+
+    def observe(self, route, method, status, seconds, queries,
+                db_seconds, slow=False):
+        key = (route, method)
+        with self._lock:
+            self._latency[key].observe(seconds)
+            self._queries[key].observe(queries)
+            self._db_seconds[key] += db_seconds
+            self._responses[key + (str(status),)] += 1
+            if slow:
+                self._slow[key] += 1
+
+    def render(self):
+        pid = os.getpid()
+        lines = []
+        with self._lock:
+            lines += _counter(
+                'fyyur_requests_total', 'Responses sent.',
+                ('route', 'method', 'status'), self._responses, pid)
+            lines += _histogram(
+                'fyyur_request_duration_seconds', 'Request latency.',
+                self._latency, pid)
+            lines += _histogram(
+                'fyyur_request_queries', 'SQL statements per request.',
+                self._queries, pid)
+            lines += _counter(
+                'fyyur_request_db_seconds_total',
+                'Time spent executing SQL.', ('route', 'method'),
+                self._db_seconds, pid)
+            lines += _counter(
+                'fyyur_slow_requests_total',
+                'Requests over the latency or query count thresholds.',
+                ('route', 'method'), self._slow, pid)
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(names, values, pid, **extra):
+    pairs = list(zip(names, values)) + [('pid', pid)] + list(extra.items())
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"') \
+        .replace('\n', r'\n')
+
+
+def _counter(name, help, label_names, values, pid):
+    yield f'# HELP {name} {help}'
+    yield f'# TYPE {name} counter'
+    for key, value in sorted(values.items()):
+        yield f'{name}{{{_labels(label_names, key, pid)}}} {value}'
+
+
+def _histogram(name, help, histograms, pid):
+    yield f'# HELP {name} {help}'
+    yield f'# TYPE {name} histogram'
+    names = ('route', 'method')
+    for key, histogram in sorted(histograms.items()):
+        for bound, count in histogram.samples():
+            labels = _labels(names, key, pid, le=bound)
+            yield f'{name}_bucket{{{labels}}} {count}'
+        labels = _labels(names, key, pid)
+        yield f'{name}_sum{{{labels}}} {histogram.sum}'
+        yield f'{name}_count{{{labels}}} {sum(histogram.counts)}'
@@ -0,0 +1,32 @@
+"""show rollups
+
+Revision ID: 1be710f9045a
+Revises: 741a6b16d38f
+Create Date: 2026-10-18 17:14:37.844908
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1be710f9045a'
+down_revision = '741a6b16d38f'
+branch_labels = None
+depends_on = None
+
+
+# Starts empty, run ``flask refresh-rollups`` once after upgrading.
+def upgrade():
+    op.create_table(
+        'ShowRollup',
+        sa.Column('dimension', sa.String(length=6), nullable=False),
+        sa.Column('month', sa.String(length=7), nullable=False),
+        sa.Column('key', sa.String(length=250), nullable=False),
+        sa.Column('shows', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('dimension', 'month', 'key')
+    )
+
+
+def downgrade():
+    op.drop_table('ShowRollup')
@@ -0,0 +1,52 @@
+"""show counters
+
+Revision ID: 54e114cfe466
+Revises: abc21d016b36
+Create Date: 2026-10-18 16:43:31.151957
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '54e114cfe466'
+down_revision = 'abc21d016b36'
+branch_labels = None
+depends_on = None
+
+
+COUNTED = [('Venue', 'venue_id'), ('Artist', 'artist_id')]
+
+
+def upgrade():
+    for table, _ in COUNTED:
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+
+    # Backfill from the existing shows.
+    show = sa.table('Show', sa.column('id'), sa.column('venue_id'),
+                    sa.column('artist_id'), sa.column('start_time'))
+    now = datetime.now()
+    for table, fk in COUNTED:
+        owner = sa.table(table, sa.column('id'),
+                         sa.column('upcoming_shows_count'),
+                         sa.column('past_shows_count'))
+
+        def count(condition):
+            return sa.select(sa.func.count(show.c.id)).where(
+                show.c[fk] == owner.c.id, condition).scalar_subquery()
+
+        op.execute(owner.update().values(
+            upcoming_shows_count=count(show.c.start_time > now),
+            past_shows_count=count(show.c.start_time <= now)))
+
+
+def downgrade():
+    for table, _ in COUNTED:
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
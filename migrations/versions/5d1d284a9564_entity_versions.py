@@ -0,0 +1,27 @@
+"""entity versions
+
+Revision ID: 5d1d284a9564
+Revises: b255be5648c1
+Create Date: 2026-10-18 16:50:07.890696
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1d284a9564'
+down_revision = 'b255be5648c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('version', sa.Integer(),
+                                       server_default='1', nullable=False))
+
+
+def downgrade():
+    for table in ('Venue', 'Artist'):
+        op.drop_column(table, 'version')
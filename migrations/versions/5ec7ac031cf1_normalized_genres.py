@@ -0,0 +1,89 @@
+"""normalized genres
+
+Revision ID: 5ec7ac031cf1
+Revises: 54e114cfe466
+Create Date: 2026-10-18 16:44:46.538309
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5ec7ac031cf1'
+down_revision = '54e114cfe466'
+branch_labels = None
+depends_on = None
+
+
+OWNERS = [('Venue', 'venue'), ('Artist', 'artist')]
+
+
+def split_genres(value):
+    # create_*_submission stored "Jazz,Rock"; the edit handlers stored a
+    # list, which Postgres turned into an array literal "{Jazz,Rock}".
+    value = (value or '').strip().strip('{}')
+    return [g.strip().strip('"') for g in value.split(',') if g.strip()]
+
+
+def upgrade():
+    genre = op.create_table(
+        'Genre',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    links = {}
+    for table, owner in OWNERS:
+        links[table] = op.create_table(
+            f'{owner}_genres',
+            sa.Column(f'{owner}_id', sa.Integer(), nullable=False),
+            sa.Column('genre_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['genre_id'], ['Genre.id'], ),
+            sa.ForeignKeyConstraint([f'{owner}_id'], [f'{table}.id'], ),
+            sa.PrimaryKeyConstraint(f'{owner}_id', 'genre_id')
+        )
+        op.create_index(f'ix_{owner}_genres_genre_id', f'{owner}_genres',
+                        ['genre_id', f'{owner}_id'], unique=False)
+
+    # Move the comma-joined strings into the association tables.
+    bind = op.get_bind()
+    tagged = {}
+    for table, _ in OWNERS:
+        rows = bind.execute(sa.text(
+            f'SELECT id, genres FROM "{table}" WHERE genres IS NOT NULL'))
+        tagged[table] = [(id, split_genres(genres)) for id, genres in rows]
+    names = sorted({name for rows in tagged.values()
+                    for _, genres in rows for name in genres})
+    if names:
+        op.bulk_insert(genre, [{'name': name} for name in names])
+    ids = dict((name, id) for id, name in bind.execute(
+        sa.text('SELECT id, name FROM "Genre"')))
+    for table, owner in OWNERS:
+        rows = [{f'{owner}_id': id, 'genre_id': ids[name]}
+                for id, genres in tagged[table] for name in set(genres)]
+        if rows:
+            op.bulk_insert(links[table], rows)
+        op.drop_column(table, 'genres')
+
+
+def downgrade():
+    bind = op.get_bind()
+    for table, owner in OWNERS:
+        op.add_column(table, sa.Column('genres', sa.String(length=120),
+                                       nullable=True))
+        rows = bind.execute(sa.text(
+            f'SELECT l.{owner}_id, g.name FROM {owner}_genres l '
+            f'JOIN "Genre" g ON g.id = l.genre_id ORDER BY g.name'))
+        genres = {}
+        for id, name in rows:
+            genres.setdefault(id, []).append(name)
+        owners = sa.table(table, sa.column('id'), sa.column('genres'))
+        for id, names in genres.items():
+            op.execute(owners.update().where(owners.c.id == id)
+                       .values(genres=','.join(names)))
+        op.drop_index(f'ix_{owner}_genres_genre_id',
+                      table_name=f'{owner}_genres')
+        op.drop_table(f'{owner}_genres')
+    op.drop_table('Genre')
@@ -0,0 +1,38 @@
+"""recommendations
+
+Revision ID: 741a6b16d38f
+Revises: ecb4be789329
+Create Date: 2026-10-18 17:10:20.639072
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '741a6b16d38f'
+down_revision = 'ecb4be789329'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'Recommendation',
+        sa.Column('source', sa.String(length=6), nullable=False),
+        sa.Column('source_id', sa.Integer(), nullable=False),
+        sa.Column('target', sa.String(length=6), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('target_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('source', 'source_id', 'target', 'rank')
+    )
+    op.create_index('ix_Recommendation_computed_at', 'Recommendation',
+                    ['computed_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Recommendation_computed_at',
+                  table_name='Recommendation')
+    op.drop_table('Recommendation')
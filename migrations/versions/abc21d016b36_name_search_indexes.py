@@ -0,0 +1,76 @@
+"""name search indexes
+
+Revision ID: abc21d016b36
+Revises: c587c712f929
+Create Date: 2026-10-18 16:40:29.395762
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'abc21d016b36'
+down_revision = 'c587c712f929'
+branch_labels = None
+depends_on = None
+
+
+# Tables whose names are searched, with the FTS5 shadow table used on
+# SQLite.
+SEARCHED = [('Venue', 'venue_fts'), ('Artist', 'artist_fts')]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, _ in SEARCHED:
+            # Trigram index serves ILIKE '%term%' and similarity().
+            op.execute(
+                f'CREATE INDEX ix_{table.lower()}_name_trgm ON "{table}" '
+                f'USING gin (name gin_trgm_ops)')
+            # Full-text index, the expression must match the one used
+            # by the search query.
+            op.execute(
+                f'CREATE INDEX ix_{table.lower()}_name_tsv ON "{table}" '
+                f"USING gin (to_tsvector('english'::regconfig, "
+                f"coalesce(name, '')))")
+    elif dialect == 'sqlite':
+        for table, fts in SEARCHED:
+            # External-content FTS5 table kept in sync by triggers.
+            op.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5(name, "
+                f"content='{table}', content_rowid='id', "
+                f"tokenize='trigram')")
+            op.execute(
+                f'CREATE TRIGGER {fts}_ai AFTER INSERT ON "{table}" BEGIN '
+                f'INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); '
+                f'END')
+            op.execute(
+                f'CREATE TRIGGER {fts}_ad AFTER DELETE ON "{table}" BEGIN '
+                f"INSERT INTO {fts}({fts}, rowid, name) "
+                f"VALUES ('delete', old.id, old.name); "
+                f'END')
+            # Only renames touch the index, not the counter and
+            # version updates every booking makes.
+            op.execute(
+                f'CREATE TRIGGER {fts}_au AFTER UPDATE OF name '
+                f'ON "{table}" BEGIN '
+                f"INSERT INTO {fts}({fts}, rowid, name) "
+                f"VALUES ('delete', old.id, old.name); "
+                f'INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); '
+                f'END')
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table, _ in SEARCHED:
+            op.execute(f'DROP INDEX IF EXISTS ix_{table.lower()}_name_tsv')
+            op.execute(f'DROP INDEX IF EXISTS ix_{table.lower()}_name_trgm')
+    elif dialect == 'sqlite':
+        for _, fts in SEARCHED:
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+            op.execute(f'DROP TABLE IF EXISTS {fts}')
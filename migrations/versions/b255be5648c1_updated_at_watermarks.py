@@ -0,0 +1,38 @@
+"""updated_at watermarks
+
+Revision ID: b255be5648c1
+Revises: fce50497ff8e
+Create Date: 2026-10-18 16:48:42.058288
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b255be5648c1'
+down_revision = 'fce50497ff8e'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ['Venue', 'Artist', 'Show']
+
+
+def upgrade():
+    # SQLite cannot add a column with a non-constant default, there the
+    # models fill it in on insert.
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    for table in TABLES:
+        op.add_column(table, sa.Column(
+            'updated_at', sa.DateTime(), nullable=True,
+            server_default=sa.func.now() if postgres else None))
+        op.execute(f'UPDATE "{table}" SET updated_at = CURRENT_TIMESTAMP')
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'],
+                        unique=False)
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+        op.drop_column(table, 'updated_at')
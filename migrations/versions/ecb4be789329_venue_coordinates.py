@@ -0,0 +1,35 @@
+"""venue coordinates
+
+Revision ID: ecb4be789329
+Revises: f6e29607c8f1
+Create Date: 2026-10-18 17:07:08.846475
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ecb4be789329'
+down_revision = 'f6e29607c8f1'
+branch_labels = None
+depends_on = None
+
+
+# Plain ALTERs rather than batch mode, which would rebuild Venue and drop
+# its full-text search triggers on SQLite.
+COLUMNS = [('latitude', sa.Float()), ('longitude', sa.Float()),
+           ('geocell', sa.Integer())]
+
+
+def upgrade():
+    for name, type_ in COLUMNS:
+        op.add_column('Venue', sa.Column(name, type_, nullable=True))
+    op.create_index('ix_venue_geocell', 'Venue',
+                    ['geocell', 'latitude', 'longitude'])
+
+
+def downgrade():
+    op.drop_index('ix_venue_geocell', table_name='Venue')
+    for name, _ in reversed(COLUMNS):
+        op.drop_column('Venue', name)
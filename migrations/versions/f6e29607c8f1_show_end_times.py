@@ -0,0 +1,54 @@
+"""show end times
+
+Revision ID: f6e29607c8f1
+Revises: 5d1d284a9564
+Create Date: 2026-10-18 17:01:23.122856
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6e29607c8f1'
+down_revision = '5d1d284a9564'
+branch_labels = None
+depends_on = None
+
+
+# Existing shows get the default length, SHOW_MINUTES in config.py.
+SHOW_MINUTES = 180
+
+# Overlapping bookings rejected by Postgres, per venue and per artist.
+EXCLUSIONS = [('show_venue_no_overlap', 'venue_id'),
+              ('show_artist_no_overlap', 'artist_id')]
+
+
+def upgrade():
+    op.add_column('Show', sa.Column('end_time', sa.DateTime(),
+                                    nullable=True))
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(f"UPDATE \"Show\" SET end_time = start_time + "
+                   f"interval '{SHOW_MINUTES} minutes'")
+        # Fails if booked shows already overlap, those have to be moved
+        # or cancelled first.
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        for name, owner in EXCLUSIONS:
+            op.execute(
+                f'ALTER TABLE "Show" ADD CONSTRAINT {name} EXCLUDE USING '
+                f'gist ({owner} WITH =, '
+                f'tsrange(start_time, end_time) WITH &&)')
+    else:
+        # Keep the fractional seconds SQLAlchemy stores after the
+        # 19 characters of the date and time.
+        op.execute(f"UPDATE \"Show\" SET end_time = strftime("
+                   f"'%Y-%m-%d %H:%M:%S', start_time, "
+                   f"'+{SHOW_MINUTES} minutes') || substr(start_time, 20)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, _ in EXCLUSIONS:
+            op.drop_constraint(name, 'Show')
+    op.drop_column('Show', 'end_time')
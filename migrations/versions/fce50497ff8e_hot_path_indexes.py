@@ -0,0 +1,45 @@
+"""hot path indexes
+
+Revision ID: fce50497ff8e
+Revises: 5ec7ac031cf1
+Create Date: 2026-10-18 16:45:39.058348
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fce50497ff8e'
+down_revision = '5ec7ac031cf1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Detail pages: shows of one venue/artist split on start_time.
+    op.create_index('ix_show_venue_id_start_time', 'Show',
+                    ['venue_id', 'start_time'])
+    op.create_index('ix_show_artist_id_start_time', 'Show',
+                    ['artist_id', 'start_time'])
+    # /shows keyset order.
+    op.create_index('ix_show_start_time_id', 'Show', ['start_time', 'id'])
+    # /venues keyset order, grouped by area.
+    op.create_index('ix_venue_state_city_name_id', 'Venue',
+                    ['state', 'city', 'name', 'id'])
+    # /artists keyset order.
+    op.create_index('ix_artist_name_id', 'Artist', ['name', 'id'])
+    # Case-insensitive exact name lookups.
+    op.create_index('ix_venue_name_lower', 'Venue', [sa.text('lower(name)')])
+    op.create_index('ix_artist_name_lower', 'Artist',
+                    [sa.text('lower(name)')])
+
+
+def downgrade():
+    op.drop_index('ix_artist_name_lower', table_name='Artist')
+    op.drop_index('ix_venue_name_lower', table_name='Venue')
+    op.drop_index('ix_artist_name_id', table_name='Artist')
+    op.drop_index('ix_venue_state_city_name_id', table_name='Venue')
+    op.drop_index('ix_show_start_time_id', table_name='Show')
+    op.drop_index('ix_show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_show_venue_id_start_time', table_name='Show')
@@ -0,0 +1,60 @@
+import os
+import time
+from threading import Lock
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection,
+    including the time spent opening a new one."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._metrics_lock:
+                self.waits += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+def pool_stats(engine):
+    """Live state of ``engine``'s pool in this worker process."""
+    pool = engine.pool
+    stats = {"pid": os.getpid(), "pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        })
+    if isinstance(pool, MeteredQueuePool):
+        waits = pool.waits
+        stats.update({
+            "checkouts": waits,
+            "timeouts": pool.timeouts,
+            "wait_seconds": round(pool.wait_seconds, 6),
+            "avg_wait_ms": round(pool.wait_seconds / waits * 1000, 3)
+            if waits else 0.0,
+            "max_wait_ms": round(pool.max_wait_seconds * 1000, 3),
+        })
+    return stats
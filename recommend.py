@@ -0,0 +1,190 @@
+"""Artist and venue recommendations from where artists play.
+
+    $ flask recommend
+    $ flask recommend --full
+
+The Show table gives a sparse artist-by-venue matrix of show counts.
+Artists are similar when their rows point the same way (cosine
+similarity), venues when their columns do. An artist's venue
+recommendations are the venues of its similar artists, weighted by
+similarity, less the venues it already played; a venue's artist
+recommendations are built the same way from its similar venues.
+
+Runs are incremental: only the artists sharing a venue with an artist
+whose shows were added or changed since the last run, and the venues
+sharing an artist with such a venue, are recomputed. Deleted shows are
+not noticed, ``--full`` recomputes everything.
+"""
+import time
+from datetime import timedelta
+
+import click
+
+# Rows of the similarity matrix computed at once, bounds memory.
+BLOCK = 1000
+
+
+def show_matrix():
+    """``(artist_ids, venue_ids, matrix)``, the matrix is CSR with a
+    row per artist, a column per venue and log-damped show counts, so a
+    resident act does not drown everything else out."""
+    import numpy as np
+    from scipy import sparse
+    from sqlalchemy import func
+    from app import db, Show
+
+    rows = db.session.query(Show.artist_id, Show.venue_id, func.count()) \
+        .group_by(Show.artist_id, Show.venue_id).all()
+    if not rows:
+        return np.array([], int), np.array([], int), sparse.csr_matrix((0, 0))
+    pairs = np.array(rows, dtype=np.int64)
+    artist_ids, artists = np.unique(pairs[:, 0], return_inverse=True)
+    venue_ids, venues = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.log1p(pairs[:, 2]), (artists, venues)),
+        shape=(len(artist_ids), len(venue_ids)))
+    return artist_ids, venue_ids, matrix
+
+
+def normalized(matrix):
+    import numpy as np
+    from scipy import sparse
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    return sparse.diags(1 / norms) @ matrix
+
+
+def top_k(matrix, k, skip=None):
+    """Yield ``(columns, scores)`` of the ``k`` largest entries of each
+    row of ``matrix``, leaving out column ``skip[i]`` of row ``i``."""
+    import numpy as np
+
+    matrix = matrix.tocsr()
+    for i in range(matrix.shape[0]):
+        start, end = matrix.indptr[i], matrix.indptr[i + 1]
+        columns = matrix.indices[start:end]
+        scores = matrix.data[start:end]
+        keep = scores > 0
+        if skip is not None:
+            keep &= columns != skip[i]
+        columns, scores = columns[keep], scores[keep]
+        if len(scores) > k:
+            best = np.argpartition(-scores, k)[:k]
+            columns, scores = columns[best], scores[best]
+        order = np.lexsort((columns, -scores))
+        yield columns[order], scores[order]
+
+
+def neighbours(matrix, rows, k):
+    """Yield ``(row, similar, features)`` for each of ``rows`` of
+    ``matrix``: the ``k`` most similar rows and the ``k`` best columns
+    it does not have yet, each as ``(indices, scores)``."""
+    unit = normalized(matrix)
+    for start in range(0, len(rows), BLOCK):
+        block = rows[start:start + BLOCK]
+        similarity = unit[block] @ unit.T
+        # The row itself scores 1 but only adds columns it already has,
+        # which are removed below.
+        reach = similarity @ unit
+        reach = reach - reach.multiply(matrix[block] != 0)
+        for row, similar, features in zip(
+                block, top_k(similarity, k, skip=block), top_k(reach, k)):
+            yield row, similar, features
+
+
+def touched(matrix, changed_rows, changed_columns):
+    """Rows and columns whose recommendations a change of
+    ``changed_rows`` and ``changed_columns`` can move. A changed row
+    moves its similarity to every row sharing a column with it, its
+    norm changed, so those are recomputed; columns likewise."""
+    import numpy as np
+
+    rows_matrix, columns_matrix = matrix.tocsr(), matrix.tocsc()
+
+    def rows_of(columns):
+        return np.unique(columns_matrix[:, columns].nonzero()[0])
+
+    def columns_of(rows):
+        return np.unique(rows_matrix[rows].nonzero()[1])
+
+    return (rows_of(columns_of(changed_rows)),
+            columns_of(rows_of(changed_columns)))
+
+
+def recommendation_rows(kind, other, ids, other_ids, results, computed_at):
+    for row, similar, features in results:
+        for target, target_ids, (indices, scores) in (
+                (kind, ids, similar), (other, other_ids, features)):
+            for rank, (index, score) in enumerate(zip(indices, scores)):
+                yield {'source': kind, 'source_id': int(ids[row]),
+                       'target': target, 'rank': rank,
+                       'target_id': int(target_ids[index]),
+                       'score': float(score), 'computed_at': computed_at}
+
+
+@click.command('recommend')
+@click.option('--full', is_flag=True,
+              help='Recompute every artist and venue.')
+@click.option('--top', default=None, type=int,
+              help='Recommendations kept per list, defaults to '
+                   'RECOMMENDATIONS.')
+def recommend_command(full, top):
+    """Refresh the artist and venue recommendations."""
+    import numpy as np
+    from flask import current_app
+    from sqlalchemy import func
+    from app import db, Show, Recommendation
+
+    k = top or current_app.config['RECOMMENDATIONS']
+    started = time.perf_counter()
+    # Database time, the clock Show.updated_at is written with.
+    computed_at = db.session.query(func.now()).scalar()
+    last_run = db.session.query(func.max(Recommendation.computed_at)) \
+        .scalar()
+    full = full or last_run is None
+    if not full:
+        # Read before the matrix so it holds every changed pair. Some
+        # databases keep updated_at to the second only.
+        changed = db.session.query(Show.artist_id, Show.venue_id).filter(
+            Show.updated_at >= last_run - timedelta(seconds=1)
+        ).distinct().all()
+    artist_ids, venue_ids, matrix = show_matrix()
+
+    if full:
+        artists = np.arange(len(artist_ids))
+        venues = np.arange(len(venue_ids))
+    else:
+        artists, venues = touched(
+            matrix,
+            np.searchsorted(artist_ids, [a for a, _ in changed]),
+            np.searchsorted(venue_ids, [v for _, v in changed]))
+
+    table = Recommendation.__table__
+    if full:
+        db.session.execute(table.delete())
+    written = 0
+    for kind, other, ids, other_ids, rows, kind_matrix in (
+            ('artist', 'venue', artist_ids, venue_ids, artists, matrix),
+            ('venue', 'artist', venue_ids, artist_ids, venues, matrix.T)):
+        if not full:
+            for start in range(0, len(rows), BLOCK):
+                db.session.execute(table.delete().where(
+                    table.c.source == kind,
+                    table.c.source_id.in_(
+                        ids[rows[start:start + BLOCK]].tolist())))
+        values = []
+        for value in recommendation_rows(
+                kind, other, ids, other_ids,
+                neighbours(kind_matrix.tocsr(), rows, k), computed_at):
+            values.append(value)
+            if len(values) == 5000:
+                db.session.execute(table.insert(), values)
+                written += len(values)
+                values = []
+        if values:
+            db.session.execute(table.insert(), values)
+            written += len(values)
+    db.session.commit()
+    click.echo(f'recommendations: {len(artists)} artists and '
+               f'{len(venues)} venues refreshed, {written} rows '
+               f'in {time.perf_counter() - started:.2f}s')
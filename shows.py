@@ -0,0 +1,185 @@
+import sys
+from datetime import date, datetime, time, timedelta
+
+from flask import Blueprint, render_template, request, flash, abort, \
+    jsonify, current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db, Venue, Artist, Show, keyset_page, page_size, \
+    page_cache, show_interval, show_conflicts, schedule_overlaps
+from forms import ShowForm
+
+bp = Blueprint('shows', __name__)
+
+
+def show_filters():
+    """The ``from``, ``to``, ``venue`` and ``artist`` arguments of
+    /shows that parse, ``from`` and ``to`` are ISO dates and both days
+    are included."""
+    filters = {
+        'from': request.args.get('from', type=date.fromisoformat),
+        'to': request.args.get('to', type=date.fromisoformat),
+        'venue': request.args.get('venue', type=int),
+        'artist': request.args.get('artist', type=int),
+    }
+    return {name: value for name, value in filters.items()
+            if value is not None}
+
+
+@bp.route('/shows')
+def shows():
+    # displays list of shows at /shows
+    # Venue and artist names come from one joined query, and the list
+    # is paged with keyset cursors on (start_time, id). A time window
+    # narrows the range scan of the (start_time, id) index, or of the
+    # (venue_id|artist_id, start_time) one with a venue or artist.
+    filters = show_filters()
+    query = db.session.query(
+        Show.id, Show.start_time,
+        Show.venue_id, Venue.name.label('venue_name'),
+        Show.artist_id, Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link')
+    ).join(Venue, Show.venue_id == Venue.id) \
+        .join(Artist, Show.artist_id == Artist.id)
+    if 'from' in filters:
+        query = query.filter(
+            Show.start_time >= datetime.combine(filters['from'], time.min))
+    if 'to' in filters:
+        query = query.filter(Show.start_time < datetime.combine(
+            filters['to'] + timedelta(days=1), time.min))
+    if 'venue' in filters:
+        query = query.filter(Show.venue_id == filters['venue'])
+    if 'artist' in filters:
+        query = query.filter(Show.artist_id == filters['artist'])
+    rows, prev_cursor, next_cursor = keyset_page(
+        query, [Show.start_time, Show.id], page_size(),
+        before=request.args.get('before'), after=request.args.get('after'))
+
+    data = []
+    for i in rows:
+        data.append({
+            "venue_id": i.venue_id,
+            "venue_name": i.venue_name,
+            "artist_id": i.artist_id,
+            "artist_name": i.artist_name,
+            "artist_image_link": i.artist_image_link,
+            "start_time": i.start_time
+        })
+
+    return render_template('pages/shows.html', shows=data, filters=filters,
+                           prev_cursor=prev_cursor, next_cursor=next_cursor)
+
+
+@bp.route('/shows/create', methods=['GET'])
+def create_shows():
+    # renders form. do not touch.
+    form = ShowForm()
+    return render_template('forms/new_show.html', form=form)
+
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+    # called to create new shows in the db,
+    # upon submitting new show listing form
+    # TODO: insert form data as a new Show record in the db, instead
+    error = False
+    invalid = None
+    conflicts = []
+    try:
+        form = ShowForm()
+        artist_id = form.artist_id.data
+        venue_id = form.venue_id.data
+        if not form.validate():
+            invalid = '; '.join(
+                f'{name}: {" ".join(errors).rstrip(".")}'
+                for name, errors in form.errors.items())
+        else:
+            try:
+                start_time, end_time = show_interval(form.start_time.data,
+                                                     form.duration.data)
+            except ValueError as e:
+                invalid = str(e)
+        if not invalid:
+            conflicts = show_conflicts(
+                [(int(venue_id), int(artist_id), start_time, end_time)])
+        if not invalid and not conflicts:
+            newShow = Show(artist_id=artist_id, venue_id=venue_id,
+                           start_time=start_time, end_time=end_time)
+            db.session.add(newShow)
+            db.session.commit()
+            page_cache.invalidate(f'venue:{venue_id}',
+                                  f'artist:{artist_id}')
+
+    except IntegrityError:
+        # A conflicting booking was committed after the check above,
+        # the Postgres exclusion constraints turned this one down.
+        db.session.rollback()
+        conflicts = show_conflicts(
+            [(int(venue_id), int(artist_id), start_time, end_time)])
+        error = not conflicts
+    except:
+        db.session.rollback()
+        error = True
+        abort(404)
+        print(sys.exc_info())
+    finally:
+        db.session.close()
+        if error:
+            flash('An error occurred. Show could not be listed.')
+        elif invalid:
+            flash(f'Show could not be listed, {invalid}.')
+        elif conflicts:
+            taken = conflicts[0]
+            flash(f'Show could not be listed, the {taken.kind} is already '
+                  f'booked from {taken.start_time:%Y-%m-%d %H:%M} to '
+                  f'{taken.end_time:%Y-%m-%d %H:%M}.')
+        else:
+            # on successful db insert, flash success
+            flash('Show was successfully listed!')
+
+    # TODO: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Show could not be listed.')
+    # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+    return render_template('pages/home.html')
+
+
+@bp.route('/api/shows/check', methods=['POST'])
+def check_schedule():
+    """Check a proposed schedule, such as a tour, against the booked
+    shows and against itself:
+
+        {"shows": [{"venue_id": 1, "artist_id": 4,
+                    "start_time": "2030-05-01T20:00", "duration": 120}]}
+
+    Each show takes a ``duration`` in minutes or an ``end_time``.
+    """
+    items = (request.get_json(silent=True) or {}).get('shows')
+    if not isinstance(items, list) or \
+            len(items) > current_app.config['SCHEDULE_CHECK_LIMIT']:
+        abort(400)
+    proposed = []
+    try:
+        for item in items:
+            end_time = item.get('end_time')
+            start_time, end_time = show_interval(
+                datetime.fromisoformat(item['start_time']),
+                item.get('duration'),
+                datetime.fromisoformat(end_time) if end_time else None)
+            proposed.append((int(item['venue_id']), int(item['artist_id']),
+                             start_time, end_time))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        abort(400)
+
+    conflicts = [{
+        "index": index,
+        "kind": kind,
+        "show_id": id,
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat()
+    } for index, kind, id, start_time, end_time in show_conflicts(proposed)]
+    conflicts += [{
+        "index": index,
+        "kind": kind,
+        "with_index": other
+    } for index, other, kind in schedule_overlaps(proposed)]
+    return jsonify({"ok": not conflicts, "conflicts": conflicts})
@@ -0,0 +1,115 @@
+import time
+from bisect import bisect_left, insort
+from threading import Lock
+
+
+class PrefixIndex:
+    """In-memory typeahead index over artist and venue names.
+
+    Every word of a name is a key, so "hop" finds "The Musical Hop".
+    Keys live in one sorted list and a prefix lookup is a bisect
+    followed by a short forward scan.
+
+    ``loader`` returns ``(kind, id, name)`` triples and is called on
+    first lookup. Writes before that are dropped since the loader will
+    see them anyway. Writes made by other processes are not seen; when
+    ``stamp`` is given, it is called at most every ``refresh`` seconds
+    and the index is loaded again once it returns something else.
+    """
+
+    def __init__(self, loader, stamp=None, refresh=None):
+        self._loader = loader
+        self._stamp = stamp
+        self.refresh = refresh
+        self._loaded = False
+        self._loaded_stamp = None
+        self._checked = 0.0
+        self._keys = []
+        self._names = {}
+        self._lock = Lock()
+
+    def configure(self, refresh):
+        self.refresh = refresh
+
+    def _load(self, stamp=None):
+        with self._lock:
+            if self._loaded and stamp == self._loaded_stamp:
+                return
+            self._checked = time.monotonic()
+            if stamp is None and self._stamp is not None:
+                # Taken first, so writes made while loading are
+                # caught by the next check.
+                stamp = self._stamp()
+            keys, names = [], {}
+            for kind, id, name in self._loader():
+                names[kind, id] = name
+                keys.extend((key, kind, id) for key in self._words(name))
+            keys.sort()
+            self._keys, self._names = keys, names
+            self._loaded_stamp = stamp
+            self._loaded = True
+
+    def _check(self):
+        if self._stamp is None or self.refresh is None or \
+                time.monotonic() - self._checked < self.refresh:
+            return
+        self._checked = time.monotonic()
+        stamp = self._stamp()
+        if stamp != self._loaded_stamp:
+            self._load(stamp)
+
+    def __len__(self):
+        return len(self._names)
+
+    @staticmethod
+    def _words(name):
+        words = (name or '').lower().split()
+        return {' '.join(words[i:]) for i in range(len(words))}
+
+    def add(self, kind, id, name):
+        with self._lock:
+            if not self._loaded:
+                return
+            self._discard(kind, id)
+            self._names[kind, id] = name
+            for key in self._words(name):
+                insort(self._keys, (key, kind, id))
+
+    def remove(self, kind, id):
+        with self._lock:
+            self._discard(kind, id)
+
+    def _discard(self, kind, id):
+        name = self._names.pop((kind, id), None)
+        if name is None:
+            return
+        for key in self._words(name):
+            i = bisect_left(self._keys, (key, kind, id))
+            if i < len(self._keys) and self._keys[i] == (key, kind, id):
+                del self._keys[i]
+
+    def search(self, prefix, limit=10):
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+        if not self._loaded:
+            self._load()
+        else:
+            self._check()
+        results = []
+        seen = set()
+        with self._lock:
+            i = bisect_left(self._keys, (prefix,))
+            while i < len(self._keys) and len(results) < limit:
+                key, kind, id = self._keys[i]
+                if not key.startswith(prefix):
+                    break
+                if (kind, id) not in seen:
+                    seen.add((kind, id))
+                    results.append({
+                        "kind": kind,
+                        "id": id,
+                        "name": self._names[kind, id]
+                    })
+                i += 1
+        return results
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def app(tmp_path):
+    from app import create_app, db
+
+    app = create_app(
+        SQLALCHEMY_DATABASE_URI='sqlite://', SECRET_KEY='test',
+        WTF_CSRF_ENABLED=False, WARM_TEMPLATES=False,
+        LOG_FILE=str(tmp_path / 'error.log'),
+        TEMPLATE_CACHE_DIR=str(tmp_path / 'jinja'),
+        THUMBNAIL_CACHE_DIR=str(tmp_path / 'thumbnails'))
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def queries(app):
+    """The SQL statements run on the app's engine, in order."""
+    from sqlalchemy import event
+    from app import db
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
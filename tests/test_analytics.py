@@ -0,0 +1,107 @@
+from datetime import date, datetime
+
+import pytest
+
+
+def month_start(month):
+    return datetime.strptime(month + '-01 20:00', '%Y-%m-%d %H:%M')
+
+
+@pytest.fixture
+def season(app):
+    """Two shows this month, one last month and one long before the
+    dashboard's window."""
+    from app import db, Venue, Artist, Genre, Show
+    from analytics import last_months
+
+    jazz, folk = Genre(name='Jazz'), Genre(name='Folk')
+    hop = Venue(id=1, name='The Musical Hop', city='San Francisco',
+                state='CA')
+    park = Venue(id=2, name='Park Square Live Music & Coffee',
+                 city='San Francisco', state='CA')
+    pianos = Venue(id=3, name='The Dueling Pianos Bar', city='New York',
+                   state='NY')
+    petals = Artist(id=1, name='Guns N Petals', genres=[jazz, folk])
+    quevedo = Artist(id=2, name='Matt Quevedo', genres=[jazz])
+    *_, last, this = last_months(2)
+    db.session.add_all([
+        Show(Venue=hop, Artist=petals, start_time=month_start(this)),
+        Show(Venue=hop, Artist=quevedo, start_time=month_start(this)),
+        Show(Venue=pianos, Artist=petals, start_time=month_start(last)),
+        Show(Venue=park, Artist=quevedo,
+             start_time=datetime(2000, 1, 1, 20)),
+    ])
+    db.session.commit()
+
+
+def rollups():
+    from app import db, ShowRollup
+
+    return sorted((r.dimension, r.month, r.key, r.shows)
+                  for r in db.session.query(ShowRollup) if r.shows)
+
+
+def test_last_months():
+    from analytics import last_months
+
+    assert last_months(3, today=date(2024, 1, 15)) == \
+        ['2023-11', '2023-12', '2024-01']
+
+
+def test_show_writes_keep_rollups(app, season):
+    from app import db, Show, refresh_rollups, refresh_rollups_command
+
+    kept = rollups()
+    assert ('genre', '2000-01', 'Jazz', 1) in kept
+    assert ('city', '2000-01', 'San Francisco, CA', 1) in kept
+    result = app.test_cli_runner().invoke(refresh_rollups_command)
+    assert result.exit_code == 0, result.output
+    assert rollups() == kept
+
+    db.session.delete(db.session.get(Show, 1))
+    db.session.commit()
+    kept = rollups()
+    refresh_rollups()
+    assert rollups() == kept
+
+
+def test_analytics(app, season):
+    client = app.test_client()
+    data = client.get('/api/analytics').json
+
+    assert len(data['months']) == app.config['ANALYTICS_MONTHS']
+    assert data['shows'][-2:] == [1, 2] and sum(data['shows']) == 3
+    assert [(venue['name'], venue['total']) for venue in data['venues']] \
+        == [('The Musical Hop', 2), ('The Dueling Pianos Bar', 1)]
+    assert data['venues'][0]['shows'][-2:] == [0, 2]
+    assert [(city['city'], city['total']) for city in data['cities']] == \
+        [('San Francisco, CA', 2), ('New York, NY', 1)]
+    # The shows of Guns N Petals count for both of its genres.
+    assert data['genres'] == [
+        {'genre': 'Jazz', 'total': 3, 'share': 1.0},
+        {'genre': 'Folk', 'total': 2, 'share': 0.6667}]
+    assert data['utilisation'][-2:] == [
+        {'month': data['months'][-2], 'active_artists': 1, 'share': 0.5,
+         'shows_per_artist': 1.0},
+        {'month': data['months'][-1], 'active_artists': 2, 'share': 1.0,
+         'shows_per_artist': 1.0}]
+    assert data['utilisation'][0]['active_artists'] == 0
+
+    page = client.get('/analytics')
+    assert page.status_code == 200
+    assert 'The Dueling Pianos Bar' in page.text
+
+
+def test_analytics_read_only_rollups(app, season, queries):
+    app.test_client().get('/api/analytics')
+    assert queries
+    assert not [statement for statement in queries
+                if '"Show"' in statement]
+
+
+def test_top_limits_the_lists(app, season):
+    app.config['ANALYTICS_TOP'] = 1
+    data = app.test_client().get('/api/analytics').json
+
+    assert [venue['id'] for venue in data['venues']] == [1]
+    assert [genre['genre'] for genre in data['genres']] == ['Jazz']
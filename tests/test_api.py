@@ -0,0 +1,100 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def test_etag_changes_when_a_show_starts(app):
+    from app import db, Venue, Artist, Show
+
+    db.session.add_all([Venue(id=1, name='The Musical Hop'),
+                        Artist(id=1, name='Guns N Petals')])
+    start = datetime.now() + timedelta(days=1)
+    show = Show(venue_id=1, artist_id=1, start_time=start,
+                end_time=start + timedelta(hours=3))
+    db.session.add(show)
+    db.session.commit()
+    client = app.test_client()
+
+    response = client.get('/api/venues/1')
+    etag = response.headers['ETag']
+    assert response.json['upcoming_shows_count'] == 1
+    assert client.get('/api/venues/1', headers={
+        'If-None-Match': etag}).status_code == 304
+
+    # The show starting is not a write, the version stays the same.
+    db.session.execute(db.update(Show).values(
+        start_time=datetime.now() - timedelta(hours=1)))
+    db.session.commit()
+    response = client.get('/api/venues/1', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json['past_shows_count'] == 1
+
+
+def cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.mark.parametrize('values', [
+    ['2030-05-01T20:00:00', {'id': 1}],
+    ['2030-05-01T20:00:00', [1]],
+    ['2030-05-01T20:00:00', '1'],
+    ['2030-05-01T20:00:00', True],
+    [20300501, 1],
+    {'start_time': '2030-05-01T20:00:00', 'id': 1},
+])
+def test_crafted_cursor_is_a_bad_request(app, values):
+    response = app.test_client().get('/shows', query_string={
+        'after': cursor(values)})
+    assert response.status_code == 400
+
+
+def test_cursor_pages(app):
+    response = app.test_client().get('/shows', query_string={
+        'after': cursor(['2030-05-01T20:00:00', 1])})
+    assert response.status_code == 200
+
+
+def walk(client, path, direction='next', cursor=None):
+    """The pages from ``path`` on, following ``direction`` cursors, and
+    the number of queries each took."""
+    pages = []
+    while True:
+        query = {'per_page': 3}
+        if cursor:
+            query['after' if direction == 'next' else 'before'] = cursor
+        response = client.get(path, query_string=query)
+        assert response.status_code == 200
+        pages.append(response.json)
+        cursor = response.json[direction]
+        if not cursor:
+            return pages
+
+
+@pytest.mark.parametrize('path', ['/api/venues', '/api/artists'])
+def test_api_listing_pages(app, queries, path):
+    from app import db, Venue, Artist
+
+    # Same names, so the id breaks the ties.
+    db.session.add_all([Venue(id=i, name=f'Venue {i % 4}', city='Austin',
+                              state='TX') for i in range(1, 11)] +
+                       [Artist(id=i, name=f'Artist {i % 4}')
+                        for i in range(1, 11)])
+    db.session.commit()
+    client = app.test_client()
+
+    queries.clear()
+    pages = walk(client, path)
+    assert len(queries) == len(pages) == 4
+    if path == '/api/venues':
+        ids = [[venue['id'] for area in page['data']
+                for venue in area['venues']] for page in pages]
+    else:
+        ids = [[artist['id'] for artist in page['data']] for page in pages]
+    assert ids == [[4, 8, 1], [5, 9, 2], [6, 10, 3], [7]]
+    assert pages[0]['prev'] is None
+
+    back = walk(client, path, 'prev', pages[-1]['prev'])
+    assert [page['data'] for page in back] == \
+        [page['data'] for page in pages[-2::-1]]
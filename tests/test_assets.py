@@ -0,0 +1,109 @@
+import gzip
+import mimetypes
+import os
+import shutil
+
+import pytest
+
+
+@pytest.fixture
+def static(app, tmp_path):
+    """A copy of the static folder for builds to write to."""
+    folder = tmp_path / 'static'
+    shutil.copytree(app.static_folder, folder)
+    app.static_folder = str(folder)
+    return folder
+
+
+def build(app):
+    from assets import build_assets_command, manifest
+
+    result = app.test_cli_runner().invoke(build_assets_command)
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        return manifest()
+
+
+def test_source_files_before_a_build(app, static):
+    page = app.test_client().get('/').text
+
+    assert '/static/css/bootstrap.css' in page
+    assert '/static/js/script.js' in page
+    assert '/assets/' not in page
+
+
+def test_build(app, static):
+    built = build(app)
+    dist = static / 'dist'
+
+    assert sorted(built) == ['app.css', 'app.js', 'head.js', 'icons.woff',
+                             'icons.woff2']
+    for name in ('app.css', 'app.js', 'head.js'):
+        data = (dist / built[name]).read_bytes()
+        assert gzip.decompress((dist / (built[name] + '.gz')).read_bytes()) \
+            == data
+        assert (dist / (built[name] + '.br')).is_file()
+    css = (dist / built['app.css']).read_text()
+    assert f'url({built["icons.woff2"]}) format("woff2")' in css
+    assert 'fontawesome-webfont' not in css
+
+    page = app.test_client().get('/').text
+    assert f'/assets/{built["app.css"]}' in page
+    assert f'/assets/{built["app.js"]}' in page
+    assert '/static/js/script.js' not in page
+
+
+@pytest.mark.parametrize('accept, encoding', [
+    ('br, gzip', 'br'), ('gzip', 'gzip'), ('', None)])
+def test_serves_the_best_accepted_encoding(app, static, accept, encoding):
+    import brotli
+
+    built = build(app)
+    data = (static / 'dist' / built['app.js']).read_bytes()
+    response = app.test_client().get(
+        f'/assets/{built["app.js"]}', headers={'Accept-Encoding': accept})
+
+    assert response.status_code == 200
+    assert response.content_encoding == encoding
+    assert response.mimetype == mimetypes.guess_type('app.js')[0]
+    assert 'Accept-Encoding' in response.vary
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == 365 * 24 * 60 * 60
+    body = response.get_data()
+    if encoding == 'br':
+        body = brotli.decompress(body)
+    elif encoding == 'gzip':
+        body = gzip.decompress(body)
+    assert body == data
+
+
+def test_fonts_are_served_as_built(app, static):
+    built = build(app)
+    response = app.test_client().get(
+        f'/assets/{built["icons.woff2"]}', headers={'Accept-Encoding': 'br'})
+
+    assert response.content_encoding is None
+    assert response.get_data() == \
+        (static / 'dist' / built['icons.woff2']).read_bytes()
+
+
+def test_only_built_files_are_served(app, static):
+    build(app)
+    client = app.test_client()
+
+    assert client.get('/assets/missing.js').status_code == 404
+    assert client.get('/assets/..%2F..%2Fapp.py').status_code == 404
+
+
+def test_rebuild_keeps_the_previous_build(app, static):
+    script = static / 'js' / 'script.js'
+    first = build(app)['app.js']
+    script.write_text(script.read_text() + '\nvar rebuilt = 1;\n')
+    second = build(app)['app.js']
+    script.write_text(script.read_text() + '\nvar rebuilt = 2;\n')
+    third = build(app)['app.js']
+
+    files = os.listdir(static / 'dist')
+    assert len({first, second, third}) == 3
+    assert second in files and third in files
+    assert first not in files and first + '.br' not in files
@@ -0,0 +1,59 @@
+import html
+import re
+from datetime import datetime
+
+import pytest
+
+
+@pytest.fixture
+def client(app):
+    from app import db, Venue, Artist, Show
+
+    hop, bar = Venue(id=1, name='The Musical Hop'), \
+        Venue(id=2, name='The Dueling Pianos Bar')
+    artist = Artist(id=1, name='Guns N Petals')
+    for venue, start in ((hop, datetime(2030, 5, 1, 18)),
+                         (hop, datetime(2030, 5, 1, 22)),
+                         (hop, datetime(2030, 5, 31, 20)),
+                         (hop, datetime(2030, 6, 1, 20)),
+                         (bar, datetime(2030, 5, 10, 20))):
+        db.session.add(Show(Venue=venue, Artist=artist, start_time=start))
+    db.session.commit()
+    return app.test_client()
+
+
+def listed(client, query):
+    response = client.get('/shows', query_string=query)
+    assert response.status_code == 200
+    return re.findall(r'<h5><a href="/venues/(\d+)">', response.text)
+
+
+def test_shows_time_window(client):
+    # Both days are included.
+    assert listed(client, {'from': '2030-05-01', 'to': '2030-05-31'}) == \
+        ['1', '1', '2', '1']
+    assert listed(client, {'from': '2030-05-02', 'to': '2030-05-31',
+                           'venue': 1}) == ['1']
+    assert listed(client, {'from': '2030-06-01'}) == ['1']
+    # Arguments that do not parse are ignored.
+    assert len(listed(client, {'from': 'May'})) == 5
+
+
+def test_venue_calendar(client):
+    response = client.get('/venues/1/calendar?month=2030-05')
+    assert response.status_code == 200
+    days = dict(re.findall(
+        r'<td class="(?:free)?">\s*(\d+)\s*<br><a href="([^"]+)">',
+        response.text))
+    assert sorted(days, key=int) == ['1', '31']
+    assert '2 shows</a>' in response.text
+    assert listed(client, html.unescape(days['1']).split('?')[1]) == \
+        ['1', '1']
+
+
+def test_venue_calendar_months(client):
+    response = client.get('/venues/1/calendar?month=2030-12')
+    assert 'December 2030' in response.text
+    assert '?month=2031-01' in response.text
+    assert client.get('/venues/1/calendar?month=soon').status_code == 200
+    assert client.get('/venues/9/calendar').status_code == 404
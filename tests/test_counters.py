@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def booked(app):
+    """A venue and an artist with two upcoming shows and a past one."""
+    from app import db, Venue, Artist, Show
+
+    venue, artist = Venue(id=1, name='The Musical Hop'), \
+        Artist(id=1, name='Guns N Petals')
+    now = datetime.now()
+    db.session.add_all([
+        Show(Venue=venue, Artist=artist, start_time=now + timedelta(days=1)),
+        Show(Venue=venue, Artist=artist, start_time=now + timedelta(days=9)),
+        Show(Venue=venue, Artist=artist, start_time=now - timedelta(days=3)),
+    ])
+    db.session.commit()
+    return venue, artist
+
+
+def counts(entity):
+    from app import db
+
+    db.session.refresh(entity)
+    return entity.upcoming_shows_count, entity.past_shows_count
+
+
+def test_show_writes_keep_counters(booked):
+    from app import db, Show
+
+    venue, artist = booked
+    assert counts(venue) == counts(artist) == (2, 1)
+    version = venue.version
+
+    db.session.delete(db.session.query(Show).filter(
+        Show.start_time > datetime.now()).first())
+    db.session.commit()
+    assert counts(venue) == counts(artist) == (1, 1)
+    assert venue.version == version + 1
+
+
+def test_refresh_moves_started_shows_to_the_past(app, booked):
+    from app import refresh_show_counts, refresh_show_counts_command
+
+    venue, artist = booked
+    result = app.test_cli_runner().invoke(refresh_show_counts_command)
+    assert result.exit_code == 0, result.output
+    assert counts(venue) == (2, 1)
+
+    refresh_show_counts(now=datetime.now() + timedelta(days=5))
+    assert counts(venue) == counts(artist) == (1, 2)
@@ -0,0 +1,34 @@
+def test_statement_timeout_only_in_requests(app):
+    from app import request_statement_timeout
+
+    class Connection:
+        def __init__(self):
+            self.statements = []
+
+        def exec_driver_sql(self, statement):
+            self.statements.append(statement)
+
+    begin = request_statement_timeout(30000)
+    connection = Connection()
+    begin(connection)
+    assert connection.statements == []
+    with app.test_request_context('/venues'):
+        begin(connection)
+    assert connection.statements == ['SET LOCAL statement_timeout = 30000']
+
+
+def test_postgres_engine_options():
+    import config
+    from app import engine_options, MeteredQueuePool
+
+    options = engine_options({
+        **vars(config),
+        'SQLALCHEMY_DATABASE_URI': 'postgresql://localhost/fyyur'})
+    assert options['poolclass'] is MeteredQueuePool
+    assert 'connect_args' not in options
+
+
+def test_engines_are_tracked_for_fork(app):
+    from app import db, engines
+
+    assert db.engine in engines
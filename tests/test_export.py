@@ -0,0 +1,74 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+
+@pytest.fixture
+def catalog(app):
+    from app import db, Venue, Artist, Genre, Show
+
+    jazz, folk = Genre(name='Jazz'), Genre(name='Folk')
+    venues = [Venue(id=i, name=f'Venue {i}', city='Austin', state='TX',
+                    genres=[jazz, folk] if i == 1 else [])
+              for i in range(1, 6)]
+    artist = Artist(id=1, name='Guns N Petals', genres=[jazz])
+    db.session.add_all(venues + [
+        Show(Venue=venues[0], Artist=artist,
+             start_time=datetime(2030, 5, 1, 20))])
+    db.session.commit()
+    app.config['EXPORT_CHUNK'] = 2
+
+
+def test_csv_export(app, catalog):
+    response = app.test_client().get('/export/venues.csv?after_id=2')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row['id'] for row in rows] == ['3', '4', '5']
+
+    rows = list(csv.DictReader(io.StringIO(
+        app.test_client().get('/export/venues.csv').text)))
+    assert sorted(rows[0]['genres'].split(',')) == ['Folk', 'Jazz']
+
+
+def test_ndjson_export_is_gzipped_on_request(app, catalog):
+    response = app.test_client().get(
+        '/export/shows.ndjson?updated_since=2000-01-01T00:00:00',
+        headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    shows = [json.loads(line) for line in
+             gzip.decompress(response.data).decode().splitlines()]
+    assert [(show['venue_id'], show['artist_id'], show['start_time'])
+            for show in shows] == [(1, 1, '2030-05-01T20:00:00')]
+
+
+def test_bad_watermark(app):
+    assert app.test_client().get(
+        '/export/shows.csv?updated_since=yesterday').status_code == 400
+
+
+def test_export_command(app, catalog, tmp_path):
+    from export import export_command
+
+    target = str(tmp_path / 'artists.ndjson.gz')
+    result = app.test_cli_runner().invoke(export_command,
+                                          ['artists', target])
+    assert result.exit_code == 0, result.output
+    with gzip.open(target, 'rt', encoding='utf-8') as f:
+        artists = [json.loads(line) for line in f]
+    assert [(artist['name'], artist['genres']) for artist in artists] == \
+        [('Guns N Petals', 'Jazz')]
+
+
+def test_rows_are_written_in_chunks():
+    from export import csv_chunks
+
+    rows = [{'id': i, 'name': f'Venue {i}'} for i in range(5)]
+    chunks = list(csv_chunks(iter(rows), 2))
+    assert len(chunks) == 3
+    assert chunks[0].startswith('id,name\r\n')
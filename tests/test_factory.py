@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by the routes and commands that use them. Not babel,
+# Flask-WTF imports it when Flask-Babel is installed.
+HEAVY = ['numpy', 'scipy', 'PIL', 'dateutil', 'fontTools', 'brotli',
+         'rcssmin', 'rjsmin']
+
+PROBE = '''
+import json, sys
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+connections = []
+event.listen(Pool, 'connect', lambda *args: connections.append(1))
+import app
+app.create_app(SQLALCHEMY_DATABASE_URI=sys.argv[1], SECRET_KEY='x',
+               WARM_TEMPLATES=False, TEMPLATE_CACHE_DIR=sys.argv[2],
+               LOG_FILE=sys.argv[3])
+print(json.dumps({'modules': sorted(sys.modules),
+                  'connections': len(connections)}))
+'''
+
+
+def test_create_app_is_lazy(tmp_path):
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, f'sqlite:///{tmp_path}/fyyur.db',
+         str(tmp_path / 'jinja'), str(tmp_path / 'error.log')],
+        cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    probe = json.loads(output)
+    assert probe['connections'] == 0
+    assert [name for name in HEAVY if name in probe['modules']] == []
+
+
+def test_apps_are_independent(app, tmp_path):
+    from app import create_app
+
+    other = create_app(
+        SQLALCHEMY_DATABASE_URI='sqlite://', SECRET_KEY='other',
+        WARM_TEMPLATES=False, PER_PAGE=7,
+        TEMPLATE_CACHE_DIR=str(tmp_path / 'other'))
+    assert other.config['PER_PAGE'] == 7
+    assert app.config['PER_PAGE'] != 7
+    assert {'venues', 'artists', 'shows', 'main'} <= set(other.blueprints)
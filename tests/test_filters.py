@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import babel.dates
+import pytest
+
+from filters import DATETIME_FORMATS, datetime_pattern, format_datetime
+
+WHEN = datetime(2035, 4, 1, 20, 30)
+
+
+@pytest.mark.parametrize('format', ['full', 'medium'])
+def test_matches_babel(format):
+    assert format_datetime(WHEN, format) == babel.dates.format_datetime(
+        WHEN, DATETIME_FORMATS[format], locale='en')
+
+
+def test_strings_are_parsed():
+    assert format_datetime('2035-04-01T20:30:00.000Z', 'full') == \
+        format_datetime(WHEN, 'full') == \
+        'Sunday April, 1, 2035 at 8:30PM'
+
+
+def test_patterns_are_compiled_once():
+    format_datetime(WHEN, 'y-MM-dd')
+    hits = datetime_pattern.cache_info().hits
+    assert format_datetime(WHEN, 'y-MM-dd') == '2035-04-01'
+    assert datetime_pattern.cache_info().hits == hits + 1
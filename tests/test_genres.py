@@ -0,0 +1,39 @@
+def test_created_venues_share_genre_rows(app):
+    from app import db, Venue, Genre
+
+    client = app.test_client()
+    for name, genres in (('The Musical Hop', ['Jazz', 'Folk']),
+                         ('The Dueling Pianos Bar', ['Jazz'])):
+        client.post('/venues/create', data={
+            'name': name, 'city': 'San Francisco', 'state': 'CA',
+            'address': '1015 Folsom Street', 'genres': genres})
+
+    assert sorted(name for name, in db.session.query(Genre.name)) == \
+        ['Folk', 'Jazz']
+    assert {venue.name: [genre.name for genre in venue.genres]
+            for venue in db.session.query(Venue)} == {
+        'The Musical Hop': ['Folk', 'Jazz'],
+        'The Dueling Pianos Bar': ['Jazz']}
+
+
+def test_listings_filter_by_genre(app):
+    from app import db, Venue, Artist, Genre
+
+    jazz, folk = Genre(name='Jazz'), Genre(name='Folk')
+    db.session.add_all([
+        Venue(id=1, name='The Musical Hop', city='San Francisco',
+              state='CA', genres=[jazz, folk]),
+        Venue(id=2, name='The Dueling Pianos Bar', city='New York',
+              state='NY', genres=[folk]),
+        Artist(id=1, name='Guns N Petals', genres=[jazz]),
+    ])
+    db.session.commit()
+    client = app.test_client()
+
+    venues = client.get('/api/venues?genre=Jazz').json['data']
+    assert [venue['name'] for area in venues
+            for venue in area['venues']] == ['The Musical Hop']
+    assert client.get('/api/artists?genre=Folk').json['data'] == []
+    assert client.get('/api/genres').json['data'] == [
+        {'name': 'Folk', 'venues': 2, 'artists': 0},
+        {'name': 'Jazz', 'venues': 1, 'artists': 1}]
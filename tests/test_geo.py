@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+import geo
+
+PLACES = '''city,state,address,latitude,longitude
+San Francisco,CA,,37.7749,-122.4194
+San Francisco,CA,1015 Folsom Street,37.7786,-122.4059
+Oakland,CA,,37.8044,-122.2712
+Los Angeles,CA,,34.0522,-118.2437
+'''
+
+
+@pytest.fixture
+def client(app, tmp_path):
+    from app import db, Venue
+    from geo import geocode_command
+
+    db.session.add_all([
+        Venue(id=1, name='The Musical Hop', city='San Francisco',
+              state='CA', address='1015 Folsom Street'),
+        Venue(id=2, name='The Fillmore', city='San Francisco', state='CA',
+              address='1805 Geary Boulevard'),
+        Venue(id=3, name='Fox Theater', city='Oakland', state='CA'),
+        Venue(id=4, name='The Wiltern', city='Los Angeles', state='CA'),
+        Venue(id=5, name='Nowhere Hall', city='Atlantis', state='XX'),
+    ])
+    db.session.commit()
+    places = tmp_path / 'places.csv'
+    places.write_text(PLACES)
+    result = app.test_cli_runner().invoke(geocode_command, [str(places)])
+    assert result.exit_code == 0, result.output
+    assert 'venues: 4 located, 1 not found' in result.output
+    return app.test_client()
+
+
+def test_geocode_prefers_addresses(client):
+    from app import db, Venue
+
+    hop, fillmore = db.session.get(Venue, 1), db.session.get(Venue, 2)
+    assert (hop.latitude, hop.longitude) == (37.7786, -122.4059)
+    # No row for its address, located by its city.
+    assert (fillmore.latitude, fillmore.longitude) == (37.7749, -122.4194)
+    assert hop.geocell == geo.cell(37.7786, -122.4059)
+
+
+def test_venues_near(client):
+    near = client.get('/venues/near?lat=37.7790&lon=-122.4060&radius=20')
+    assert near.status_code == 200
+    venues = near.json['data']
+    assert [venue['id'] for venue in venues] == [1, 2, 3]
+    assert venues[0]['distance_km'] < 0.1
+    assert all(venue['distance_km'] <= 20 for venue in venues)
+
+
+@pytest.mark.parametrize('query', [
+    '', 'lat=37.7&lon=', 'lat=91&lon=0', 'lat=0&lon=181',
+    'lat=0&lon=0&radius=0'])
+def test_venues_near_bad_arguments(client, query):
+    assert client.get(f'/venues/near?{query}').status_code == 400
+
+
+def brute_force(latitude, longitude, radius_km, points):
+    distances = geo.haversine_km(latitude, longitude,
+                                 [p[0] for p in points],
+                                 [p[1] for p in points])
+    return sorted(i for i, d in enumerate(distances) if d <= radius_km)
+
+
+def in_cells(latitude, longitude, radius_km, points):
+    ranges = geo.cell_ranges(*geo.bounding_box(latitude, longitude,
+                                               radius_km))
+    candidates = [(i, lat, lon) for i, (lat, lon) in enumerate(points)
+                  if any(first <= geo.cell(lat, lon) <= last
+                         for first, last in ranges)]
+    return sorted(row[0] for row, _ in geo.nearest(
+        latitude, longitude, radius_km, candidates, len(points)))
+
+
+@pytest.mark.parametrize('latitude, longitude', [
+    (37.77, -122.42), (0.0, 179.99), (-33.87, 151.21), (89.95, 10.0)])
+def test_grid_finds_what_a_full_scan_finds(latitude, longitude):
+    rng = random.Random(0)
+    points = [(max(-90.0, min(90.0, latitude + rng.uniform(-1, 1))),
+               (longitude + rng.uniform(-1, 1) + 180) % 360 - 180)
+              for _ in range(500)]
+    for radius in (5, 25, 60):
+        expected = brute_force(latitude, longitude, radius, points)
+        assert expected
+        assert in_cells(latitude, longitude, radius, points) == expected
@@ -0,0 +1,55 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'benchmarks'))
+
+from image_origin import image_origin  # noqa: E402
+
+
+def test_private_addresses_are_not_fetched(app):
+    from images import fetch
+
+    with image_origin(port=0) as origin:
+        with pytest.raises(ValueError, match='not a public address'):
+            fetch(origin + '/240/160')
+        app.config['THUMBNAIL_ALLOW_PRIVATE'] = True
+        assert fetch(origin + '/240/160')[:2] == b'\xff\xd8'
+
+
+def test_redirects_are_checked(app, monkeypatch):
+    import images
+
+    class Redirect(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(302)
+            self.send_header('Location', 'http://169.254.169.254/latest')
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Redirect)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    checked = []
+    real_check = images.check_public
+
+    def check_public(url):
+        checked.append(url)
+        # Only the first hop, the local server, is let through.
+        if len(checked) == 1:
+            return
+        real_check(url)
+
+    monkeypatch.setattr(images, 'check_public', check_public)
+    try:
+        with pytest.raises(ValueError, match='not a public address'):
+            images.fetch(f'http://127.0.0.1:{server.server_port}/')
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert checked[1] == 'http://169.254.169.254/latest'
@@ -0,0 +1,39 @@
+from click.testing import CliRunner
+
+from app import db, Venue, Artist
+from importer import import_command
+
+VENUE = ('name,city,state,address,phone,genres,facebook_link,'
+         'seeking_talent\n')
+ARTIST = ('name,city,state,phone,genres,facebook_link,website,'
+          'seeking_venue\n')
+
+
+def run_import(tmp_path, entity, text):
+    path = tmp_path / f'{entity}.csv'
+    path.write_text(text)
+    return CliRunner().invoke(
+        import_command, [entity, str(path)])
+
+
+def test_batch_without_valid_rows_inserts_nothing(app, tmp_path):
+    result = run_import(tmp_path, 'venues', VENUE + ',,,,,,,\n')
+
+    assert result.exit_code == 0, result.output
+    assert 'venues: 0 imported, 1 rejected' in result.output
+    assert db.session.query(Venue).count() == 0
+
+
+def test_boolean_strings(app, tmp_path):
+    rows = [('False', False), ('false', False), ('0', False), ('no', False),
+            ('True', True), ('yes', True), ('1', True), ('', False)]
+    result = run_import(tmp_path, 'artists', ARTIST + ''.join(
+        f'Artist {i},Austin,TX,512-555-0100,Jazz,https://facebook.com/a,'
+        f'https://example.com,{spelled}\n'
+        for i, (spelled, _) in enumerate(rows)))
+
+    assert result.exit_code == 0, result.output
+    assert f'artists: {len(rows)} imported, 0 rejected' in result.output
+    seeking = dict(db.session.query(Artist.name, Artist.seeking_venue))
+    assert seeking == {f'Artist {i}': expected
+                       for i, (_, expected) in enumerate(rows)}
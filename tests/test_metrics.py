@@ -0,0 +1,57 @@
+import os
+import re
+
+import pytest
+
+
+@pytest.fixture
+def metrics(app, monkeypatch):
+    """Scrapes a fresh /metrics, ``{series with labels: value}``."""
+    import app as app_module
+    from metrics import RequestMetrics
+
+    monkeypatch.setattr(app_module, 'request_metrics', RequestMetrics())
+    client = app.test_client()
+
+    def scrape():
+        text = client.get('/metrics').text
+        pid = f',pid="{os.getpid()}"'
+        return {name.replace(pid, ''): float(value) for name, value in
+                re.findall(r'^(\w+\{.*\}) (\S+)$', text, re.M)}
+    return scrape
+
+
+def test_requests_are_counted_per_route(app, metrics):
+    client = app.test_client()
+    client.get('/venues')
+    client.get('/venues?per_page=5')
+    client.get('/nowhere')
+    samples = metrics()
+
+    assert samples['fyyur_requests_total{route="/venues",method="GET",'
+                   'status="200"}'] == 2
+    assert samples['fyyur_requests_total{route="unmatched",method="GET",'
+                   'status="404"}'] == 1
+    # One query per listing page.
+    assert samples['fyyur_request_queries_sum{route="/venues",'
+                   'method="GET"}'] == 2
+    assert samples['fyyur_request_queries_bucket{route="/venues",'
+                   'method="GET",le="1"}'] == 2
+
+
+def test_slow_requests(app, metrics, caplog):
+    app.config['SLOW_REQUEST_QUERIES'] = 0
+    app.test_client().get('/venues')
+    assert metrics()['fyyur_slow_requests_total{route="/venues",'
+                     'method="GET"}'] == 1
+    assert 'slow request: GET /venues 200' in caplog.text
+
+
+def test_histogram_buckets_are_cumulative():
+    from metrics import Histogram
+
+    histogram = Histogram((1, 5))
+    for value in (0, 1, 3, 9):
+        histogram.observe(value)
+    assert list(histogram.samples()) == [(1, 2), (5, 3), ('+Inf', 4)]
+    assert histogram.sum == 13
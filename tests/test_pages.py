@@ -0,0 +1,55 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def client(app):
+    from app import db, Venue, Artist, Show
+
+    start = datetime.now() + timedelta(days=7)
+    db.session.add(Show(
+        Venue=Venue(id=1, name='The Musical Hop', city='San Francisco',
+                    state='CA', address='1015 Folsom Street'),
+        Artist=Artist(id=1, name='Guns N Petals'),
+        start_time=start, end_time=start + timedelta(hours=3)))
+    db.session.commit()
+    return app.test_client()
+
+
+def test_detail_pages_are_served_from_cache(client, queries):
+    first = client.get('/venues/1')
+    assert first.status_code == 200
+    queries.clear()
+    assert client.get('/venues/1').text == first.text
+    assert queries == []
+
+
+def test_editing_a_venue_invalidates_its_pages(client):
+    client.get('/venues/1')
+    client.get('/artists/1')
+    response = client.post('/venues/1/edit', data={
+        'name': 'The Musical Stop', 'city': 'San Francisco', 'state': 'CA',
+        'address': '1015 Folsom Street', 'genres': ['Jazz']})
+    assert response.status_code == 302
+
+    assert 'The Musical Stop' in client.get('/venues/1').text
+    # The artist page lists the venue of the show.
+    assert 'The Musical Stop' in client.get('/artists/1').text
+
+
+def test_lru_backend_evicts_and_expires(monkeypatch):
+    from cache import LRUBackend
+
+    backend = LRUBackend(max_entries=2, ttl=60)
+    backend.set('venue:1', 'one')
+    backend.set('venue:2', 'two')
+    backend.get('venue:1')
+    backend.set('venue:3', 'three')
+    assert backend.get('venue:2') is None
+    assert backend.get('venue:1') == 'one'
+
+    now = time.monotonic() + 61
+    monkeypatch.setattr('cache.time.monotonic', lambda: now)
+    assert backend.get('venue:3') is None
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+
+def test_hot_routes_encode_genres(app):
+    from app import db, Genre, hot_routes
+
+    db.session.add(Genre(name='R&B'))
+    db.session.commit()
+    paths = [path for _, path, _ in hot_routes()]
+    assert '/venues?genre=R%26B' in paths
+    assert '/artists?genre=R%26B' in paths
+
+
+def test_seq_scans(app):
+    from app import db
+    from explain import seq_scans
+
+    with db.engine.connect() as connection:
+        assert seq_scans(connection, 'SELECT * FROM "Venue" '
+                         'WHERE website = ?', ('x',)) == {'Venue'}
+        # Served by the (venue_id, start_time) index.
+        assert seq_scans(
+            connection, 'SELECT id FROM "Show" WHERE venue_id = ? '
+            'ORDER BY start_time', (1,)) == set()
+
+
+def test_check_query_plans(app):
+    from app import db, Venue, Artist, Genre, Show, check_query_plans
+
+    genre = Genre(name='Jazz')
+    db.session.add(Show(
+        Venue=Venue(name='The Musical Hop', genres=[genre]),
+        Artist=Artist(name='Guns N Petals', genres=[genre]),
+        start_time=datetime(2030, 5, 1, 20)))
+    db.session.commit()
+    result = app.test_cli_runner().invoke(check_query_plans,
+                                          ['--min-rows', '0'])
+    assert result.exit_code == 0, result.output
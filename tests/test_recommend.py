@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+# Artist: the venues they played.
+PLAYED = {1: [1, 2], 2: [1, 2, 3], 3: [3, 4], 4: [5]}
+
+
+@pytest.fixture
+def catalog(app):
+    from app import db, Venue, Artist, Show
+
+    venues = {i: Venue(id=i, name=f'Venue {i}') for i in range(1, 6)}
+    for artist_id, venue_ids in PLAYED.items():
+        artist = Artist(id=artist_id, name=f'Artist {artist_id}')
+        db.session.add_all(
+            Show(Artist=artist, Venue=venues[venue_id],
+                 start_time=datetime(2030, 5, venue_id, 20))
+            for venue_id in venue_ids)
+    db.session.commit()
+
+
+def recommend(app, *args):
+    from recommend import recommend_command
+
+    result = app.test_cli_runner().invoke(recommend_command, args)
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def stored():
+    from app import db, Recommendation
+
+    return sorted((r.source, r.source_id, r.target, r.rank, r.target_id,
+                   round(r.score, 9)) for r in db.session.query(
+        Recommendation))
+
+
+def names(found, kind):
+    return [item['name'] for item in found[kind]]
+
+
+def test_recommendations(app, catalog):
+    from app import recommendations
+
+    assert 'recommendations: 4 artists and 5 venues refreshed' in \
+        recommend(app)
+    found = recommendations('artist', 1)
+    # Only artist 2 shares a venue with artist 1, venue 3 is the one of
+    # its venues artist 1 did not play yet.
+    assert names(found, 'artist') == ['Artist 2']
+    assert names(found, 'venue') == ['Venue 3']
+    assert names(recommendations('venue', 1), 'venue')[0] == 'Venue 2'
+    assert recommendations('artist', 4) == {'artist': [], 'venue': []}
+
+
+def test_incremental_run_matches_a_full_one(app, catalog):
+    from app import db, Show
+
+    # The catalog is older than the first run.
+    db.session.query(Show).update({'updated_at': datetime(2020, 1, 1)})
+    db.session.commit()
+    recommend(app)
+    db.session.add(Show(artist_id=4, venue_id=3,
+                        start_time=datetime(2030, 6, 1, 20)))
+    db.session.commit()
+    output = recommend(app)
+    # Artists 2 and 3 now share venue 3 with artist 4.
+    assert 'recommendations: 3 artists and 5 venues' in output
+    incremental = stored()
+    recommend(app, '--full')
+    assert incremental == stored()
@@ -0,0 +1,55 @@
+import pytest
+
+VENUES = ['The Musical Hop', 'Park Square Live Music & Coffee',
+          'The Dueling Pianos Bar']
+
+
+@pytest.fixture
+def client(app):
+    from app import db, Venue
+
+    db.session.add_all([Venue(id=i, name=name)
+                        for i, name in enumerate(VENUES, 1)])
+    db.session.commit()
+    return app.test_client()
+
+
+@pytest.fixture
+def fts(app):
+    """The FTS5 table of the name search migration, which create_all()
+    does not make."""
+    from app import db
+
+    db.session.execute(db.text(
+        "CREATE VIRTUAL TABLE venue_fts USING fts5(name, content='Venue', "
+        "content_rowid='id', tokenize='trigram')"))
+    db.session.execute(db.text(
+        "INSERT INTO venue_fts(venue_fts) VALUES ('rebuild')"))
+    db.session.commit()
+
+
+def found(client, term):
+    response = client.post('/venues/search', data={'search_term': term})
+    assert response.status_code == 200
+    return [name for name in VENUES if name.replace('&', '&amp;')
+            in response.text]
+
+
+@pytest.mark.parametrize('term, names', [
+    ('hop', ['The Musical Hop']),
+    ('MUSIC', ['The Musical Hop', 'Park Square Live Music & Coffee']),
+    ('Th', ['The Musical Hop', 'The Dueling Pianos Bar']),
+    ('nowhere', []),
+])
+def test_search_without_fts_table(client, term, names):
+    assert found(client, term) == names
+
+
+@pytest.mark.parametrize('term, names', [
+    ('hop', ['The Musical Hop']),
+    ('MUSIC', ['The Musical Hop', 'Park Square Live Music & Coffee']),
+    ('Th', ['The Musical Hop', 'The Dueling Pianos Bar']),
+    ('nowhere', []),
+])
+def test_search_with_fts_table(client, fts, term, names):
+    assert found(client, term) == names
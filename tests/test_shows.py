@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def client(app):
+    from app import db, Venue, Artist
+
+    db.session.add_all([Venue(id=1, name='The Dueling Pianos Bar'),
+                        Artist(id=1, name='Guns N Petals')])
+    db.session.commit()
+    return app.test_client()
+
+
+def create_show(client, **form):
+    return client.post('/shows/create', data={
+        'venue_id': '1', 'artist_id': '1',
+        'start_time': '2030-05-01 20:00:00', **form})
+
+
+def show_count():
+    from app import db, Show
+
+    return db.session.query(Show).count()
+
+
+def test_show_is_listed(client):
+    response = create_show(client, duration='120')
+    assert response.status_code == 200
+    assert 'Show was successfully listed!' in response.text
+    assert show_count() == 1
+
+
+def test_duration_must_be_a_number(client):
+    response = create_show(client, duration='abc')
+    assert response.status_code == 200
+    assert 'Show could not be listed, duration: ' in response.text
+    assert show_count() == 0
+
+
+def test_duration_too_long(client):
+    response = create_show(client, duration='2000')
+    assert response.status_code == 200
+    assert 'Show could not be listed, a show lasts up to 1440 minutes.' \
+        in response.text
+    assert show_count() == 0
+
+
+def test_booking_lost_to_a_concurrent_one(app, client, monkeypatch):
+    import shows
+    from app import db, Show
+
+    start = datetime(2030, 5, 1, 20)
+    db.session.add(Show(venue_id=1, artist_id=1, start_time=start,
+                        end_time=start + timedelta(hours=3)))
+    db.session.commit()
+    # Stands in for the Postgres exclusion constraints.
+    db.session.execute(db.text(
+        'CREATE TRIGGER show_overlap BEFORE INSERT ON "Show" '
+        'WHEN EXISTS (SELECT 1 FROM "Show" WHERE venue_id = new.venue_id '
+        'AND start_time < new.end_time AND end_time > new.start_time) '
+        "BEGIN SELECT RAISE(ABORT, 'overlapping show'); END"))
+    db.session.commit()
+    checks = []
+    show_conflicts = shows.show_conflicts
+
+    def racing_show_conflicts(proposed):
+        # The first check runs before the other booking commits.
+        checks.append(proposed)
+        return show_conflicts(proposed) if len(checks) > 1 else []
+
+    monkeypatch.setattr(shows, 'show_conflicts', racing_show_conflicts)
+    response = create_show(client, duration='60')
+    assert response.status_code == 200
+    assert 'the venue is already booked from 2030-05-01 20:00 to ' \
+        '2030-05-01 23:00.' in response.text
+    assert len(checks) == 2
+    assert show_count() == 1
+
+
+def add_shows(count):
+    from app import db, Show
+
+    start = datetime(2030, 1, 1, 20)
+    # Booked out of order, listed by start time.
+    for i in reversed(range(count)):
+        db.session.add(Show(venue_id=1, artist_id=1,
+                            start_time=start + timedelta(days=i)))
+    db.session.commit()
+
+
+def shows_pages(client, path):
+    """The show times of every page from ``path`` on, following the
+    next page links."""
+    import html
+    import re
+
+    pages = []
+    while path:
+        response = client.get(path)
+        assert response.status_code == 200
+        pages.append(re.findall(r'<h4>(.*?)</h4>', response.text))
+        path = re.search(r'<li class="next"><a href="([^"]+)"',
+                         response.text)
+        path = path and html.unescape(path.group(1))
+    return pages
+
+
+def test_show_listing_pages(client):
+    from filters import format_datetime
+
+    add_shows(5)
+    pages = shows_pages(client, '/shows?per_page=2')
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [time for page in pages for time in page] == [
+        format_datetime(datetime(2030, 1, 1 + i, 20), 'full')
+        for i in range(5)]
+
+
+def test_show_listing_is_one_query(client, queries):
+    add_shows(2)
+    queries.clear()
+    client.get('/shows')
+    assert len(queries) == 1
+
+    add_shows(40)
+    queries.clear()
+    client.get('/shows')
+    assert len(queries) == 1
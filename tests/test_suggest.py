@@ -0,0 +1,31 @@
+from suggest import PrefixIndex
+
+
+def names(index, prefix):
+    return [result['name'] for result in index.search(prefix)]
+
+
+def test_reloads_when_stamp_changes():
+    rows = [('venue', 1, 'The Musical Hop')]
+    index = PrefixIndex(lambda: list(rows), stamp=lambda: len(rows),
+                        refresh=0)
+    assert names(index, 'hop') == ['The Musical Hop']
+
+    # Written by another worker.
+    rows.append(('artist', 2, 'Hop Along'))
+    assert names(index, 'hop') == ['The Musical Hop', 'Hop Along']
+
+
+def test_stamp_checked_every_refresh_seconds():
+    rows = [('venue', 1, 'The Musical Hop')]
+    calls = []
+
+    def stamp():
+        calls.append(len(rows))
+        return len(rows)
+
+    index = PrefixIndex(lambda: list(rows), stamp=stamp, refresh=3600)
+    names(index, 'hop')
+    rows.append(('artist', 2, 'Hop Along'))
+    assert names(index, 'hop') == ['The Musical Hop']
+    assert calls == [1]
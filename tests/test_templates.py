@@ -0,0 +1,64 @@
+import jinja2
+import pytest
+
+
+@pytest.fixture
+def compiled(monkeypatch):
+    """The names of the templates compiled from source."""
+    names = []
+    compile = jinja2.Environment.compile
+
+    def counting(self, source, name=None, *args, **kwargs):
+        names.append(name)
+        return compile(self, source, name, *args, **kwargs)
+
+    monkeypatch.setattr(jinja2.Environment, 'compile', counting)
+    return names
+
+
+def warmed_app(tmp_path):
+    from app import create_app
+
+    return create_app(
+        SQLALCHEMY_DATABASE_URI='sqlite://', SECRET_KEY='test',
+        WARM_TEMPLATES=True, TEMPLATE_CACHE_DIR=str(tmp_path / 'jinja'),
+        LOG_FILE=str(tmp_path / 'error.log'))
+
+
+def html_templates(app):
+    return sorted(app.jinja_env.list_templates(
+        filter_func=lambda name: name.endswith('.html')))
+
+
+def test_create_app_warms_the_templates(tmp_path, compiled):
+    app = warmed_app(tmp_path)
+    templates = html_templates(app)
+
+    assert templates and sorted(compiled) == templates
+    assert sorted(name for _, name in app.jinja_env.cache) == templates
+    assert len(list((tmp_path / 'jinja').iterdir())) == len(templates)
+
+
+def test_later_apps_load_cached_bytecode(tmp_path, compiled):
+    warmed_app(tmp_path)
+    compiled.clear()
+    app = warmed_app(tmp_path)
+
+    assert compiled == []
+    assert sorted(name for _, name in app.jinja_env.cache) == \
+        html_templates(app)
+
+
+def test_warm_templates_command_recompiles(app, compiled):
+    from app import warm_templates, warm_templates_command
+
+    warm_templates(app)
+    compiled.clear()
+    result = app.test_cli_runner().invoke(warm_templates_command)
+
+    assert result.exit_code == 0, result.output
+    templates = html_templates(app)
+    assert sorted(compiled) == templates
+    lines = result.output.splitlines()
+    assert sorted(line.split()[-1] for line in lines[:-1]) == templates
+    assert lines[-1].startswith(f'{len(templates)} templates in ')
@@ -0,0 +1,49 @@
+def test_delete_venue_with_genres(app):
+    from app import db, Venue, Genre, venue_genres
+
+    db.session.add(Venue(id=1, name='The Musical Hop', genres=[
+        Genre(name='Jazz'), Genre(name='Folk')]))
+    db.session.commit()
+
+    response = app.test_client().delete('/venues/1')
+    assert response.status_code == 200
+    assert db.session.query(Venue).count() == 0
+    assert db.session.query(venue_genres).count() == 0
+    assert db.session.query(Genre).count() == 2
+
+
+def add_venues(start, count):
+    """``count`` venues over three cities, each with a genre and a
+    show."""
+    from datetime import datetime, timedelta
+    from app import db, Venue, Artist, Genre, Show
+
+    jazz = db.session.query(Genre).filter_by(name='Jazz').first() or \
+        Genre(name='Jazz')
+    artist = Artist(name=f'Artist {start}')
+    for i in range(start, start + count):
+        city, state = [('San Francisco', 'CA'), ('New York', 'NY'),
+                       ('Austin', 'TX')][i % 3]
+        venue = Venue(id=i, name=f'Venue {i:03d}', city=city, state=state,
+                      genres=[jazz])
+        db.session.add(Show(Venue=venue, Artist=artist,
+                            start_time=datetime.now() + timedelta(days=i)))
+    db.session.commit()
+
+
+def test_venue_listing_is_one_query(app, queries):
+    client = app.test_client()
+    add_venues(1, 3)
+    queries.clear()
+    response = client.get('/venues')
+    assert response.status_code == 200
+    assert len(queries) == 1
+
+    add_venues(4, 30)
+    queries.clear()
+    response = client.get('/venues')
+    assert len(queries) == 1
+    areas = response.text.split('<h3>')[1:]
+    assert [area.split('</h3>')[0] for area in areas] == \
+        ['San Francisco, CA', 'New York, NY', 'Austin, TX']
+    assert all(area.count('<h5>') == 11 for area in areas)
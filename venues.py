@@ -0,0 +1,362 @@
+import sys
+from calendar import Calendar
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+
+from flask import Blueprint, render_template, request, flash, redirect, \
+    url_for, abort, jsonify, current_app
+from sqlalchemy import func, or_
+
+import geo
+from app import db, Venue, Artist, Show, keyset_page, page_size, paged, \
+    search_names, filter_genre, genres_named, suggestions, page_cache, \
+    cached_page, venue_changed, versioned_json, recommendations
+from forms import VenueForm
+
+bp = Blueprint('venues', __name__)
+
+
+def venues_page():
+    # One query builds a page of the area listing, upcoming shows are
+    # read from the denormalized counter. Pages are ordered by area,
+    # then name and id.
+    query = filter_genre(db.session.query(
+        Venue.city, Venue.state, Venue.id, Venue.name,
+        Venue.upcoming_shows_count.label('upcoming_shows')
+    ), Venue, request.args.get('genre'))
+    page = keyset_page(
+        query, [Venue.state, Venue.city, Venue.name, Venue.id], page_size(),
+        before=request.args.get('before'), after=request.args.get('after'))
+
+    data = []
+    for (city, state), venuesPerEachCity in groupby(
+            page[0], key=lambda r: (r.city, r.state)):
+        data.append({
+            "city": city,
+            "state": state,
+            "venues": [{
+                "id": venue.id,
+                "name": venue.name,
+                "upcoming_shows": venue.upcoming_shows
+            } for venue in venuesPerEachCity]
+        })
+    return paged(page, data)
+
+
+@bp.route('/venues')
+def venues():
+    page = venues_page()
+    return render_template('pages/venues.html', areas=page['data'],
+                           prev_cursor=page['prev'], next_cursor=page['next'])
+
+
+@bp.route('/api/venues')
+def venues_json():
+    return jsonify(venues_page())
+
+
+@bp.route('/venues/search', methods=['POST'])
+def search_venues():
+    # TODO: implement search on artists with partial string search.
+    # Ensure it is case-insensitive.
+    # seach for Hop should return "The Musical Hop".
+    # search for "Music" should return "The Musical Hop"
+    # and "Park Square Live Music & Coffee"
+    search_term = request.form.get('search_term', '')
+    results = search_names(Venue, search_term, request.values.get('genre'))
+    data = []
+    for r in results:
+        data.append({
+            "id": r.id,
+            "name": r.name,
+            "upcoming_shows": r.upcoming_shows
+        })
+
+    response = {
+        "count": len(results),
+        "data": data
+    }
+    return render_template('pages/search_venues.html', results=response,
+                           search_term=request.form.get('search_term', ''))
+
+
+def venue_data(venue_id):
+    # shows the venue page with the given venue_id
+    # TODO: replace with real venue data from the venues table, using venue_id
+    try:
+
+        venue = Venue.query.get(venue_id)
+        data = []
+        upcoming = db.session.query(
+            Show.start_time, Artist.id, Artist.name, Artist.image_link
+        ).join(Artist).filter(
+            Show.venue_id == venue_id).filter(
+                Show.start_time > datetime.now()).all()
+        upcomingShows = []
+
+        past = db.session.query(
+            Show.start_time, Artist.id, Artist.name, Artist.image_link
+        ).join(Artist).filter(
+            Show.venue_id == venue_id).filter(
+                Show.start_time < datetime.now()).all()
+        pastShows = []
+
+        for u in upcoming:
+            upcomingShows.append({
+                "artist_id": u.id,
+                "artist_name": u.name,
+                "artist_image_link": u.image_link,
+                "start_time": u.start_time
+            })
+
+        for p in past:
+            pastShows.append({
+                "artist_id": p.id,
+                "artist_name": p.name,
+                "artist_image_link": p.image_link,
+                "start_time": p.start_time
+            })
+
+        data = [{
+            "id": venue.id,
+            "name": venue.name,
+            "genres": [genre.name for genre in venue.genres],
+            "address": venue.address,
+            "city": venue.city,
+            "state": venue.state,
+            "phone": venue.phone,
+            "website": venue.website,
+            "facebook_link": venue.facebook_link,
+            "seeking_talent": venue.seeking_talent,
+            "seeking_description": venue.seeking_description,
+            "image_link": venue.image_link,
+            "past_shows": pastShows,
+            "upcoming_shows": upcomingShows,
+            "past_shows_count": len(past),
+            "upcoming_shows_count": len(upcoming)
+        }]
+
+        return list(filter(lambda d: d['id'] == venue_id, data))[0]
+    except:
+        abort(404)
+
+
+@bp.route('/venues/<int:venue_id>')
+@cached_page('venue')
+def show_venue(venue_id):
+    data = venue_data(venue_id)
+    return render_template(
+        'pages/show_venue.html', venue=data,
+        recommendations=recommendations('venue', venue_id))
+
+
+@bp.route('/api/venues/<int:venue_id>')
+def venue_json(venue_id):
+    return versioned_json(Venue, venue_id, venue_data)
+
+
+@bp.route('/venues/near')
+def venues_near():
+    """Venues within ``radius`` km of ``lat``/``lon``, closest first.
+
+    The grid cells under the bounding box of the circle are range
+    scanned with the (geocell, latitude, longitude) index, the box
+    itself filters the cells' venues in SQL, and the survivors are
+    ranked by haversine distance with NumPy.
+    """
+    config = current_app.config
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    radius = request.args.get('radius', config['NEAR_RADIUS_KM'], type=float)
+    if lat is None or lon is None or not -90 <= lat <= 90 or \
+            not -180 <= lon <= 180 or not 0 < radius:
+        abort(400)
+    radius = min(radius, config['NEAR_MAX_RADIUS_KM'])
+
+    south, north, west, east = geo.bounding_box(lat, lon, radius)
+    if west <= east:
+        longitude = Venue.longitude.between(west, east)
+    else:
+        longitude = or_(Venue.longitude >= west, Venue.longitude <= east)
+    rows = db.session.query(
+        Venue.id, Venue.name, Venue.city, Venue.state,
+        Venue.latitude, Venue.longitude
+    ).filter(
+        or_(*[Venue.geocell.between(first, last) for first, last
+              in geo.cell_ranges(south, north, west, east)]),
+        Venue.latitude.between(south, north), longitude
+    ).all()
+
+    return jsonify({"data": [{
+        "id": venue.id,
+        "name": venue.name,
+        "city": venue.city,
+        "state": venue.state,
+        "latitude": venue.latitude,
+        "longitude": venue.longitude,
+        "distance_km": round(distance, 3)
+    } for venue, distance in geo.nearest(
+        lat, lon, radius, rows, config['NEAR_LIMIT'])]})
+
+
+def month_arg():
+    """The first day of ``?month=YYYY-MM``, this month without one."""
+    try:
+        return datetime.strptime(request.args['month'], '%Y-%m').date()
+    except (KeyError, ValueError):
+        return date.today().replace(day=1)
+
+
+@bp.route('/venues/<int:venue_id>/calendar')
+def venue_calendar(venue_id):
+    # Shows per day of one month, to find free dates. The counts come
+    # from one grouped range scan of the (venue_id, start_time) index.
+    venue = db.session.query(Venue.id, Venue.name) \
+        .filter(Venue.id == venue_id).first()
+    if venue is None:
+        abort(404)
+    first = month_arg()
+    following = (first + timedelta(days=32)).replace(day=1)
+    day = func.date(Show.start_time)
+    counts = {str(shown)[:10]: count for shown, count in db.session.query(
+        day, func.count(Show.id)
+    ).filter(
+        Show.venue_id == venue_id,
+        Show.start_time >= datetime.combine(first, time.min),
+        Show.start_time < datetime.combine(following, time.min)
+    ).group_by(day)}
+
+    weeks = [[{
+        "date": d,
+        "in_month": d.month == first.month,
+        "shows": counts.get(d.isoformat(), 0)
+    } for d in week] for week in Calendar().monthdatescalendar(
+        first.year, first.month)]
+    return render_template(
+        'pages/venue_calendar.html', venue=venue, month=first, weeks=weeks,
+        prev_month=(first - timedelta(days=1)).replace(day=1),
+        next_month=following)
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+    form = VenueForm()
+    return render_template('forms/new_venue.html', form=form)
+
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+    # TODO: insert form data as a new Venue record in the db, instead
+    # TODO: modify data to be the data object returned from db insertion
+    error = False
+    try:
+        form = VenueForm()
+        name = form.name.data
+        city = form.city.data
+        state = form.state.data
+        address = form.address.data
+        phone = form.phone.data
+        genres = genres_named(form.genres.data)
+        facebook_link = form.facebook_link.data
+        website = form.website.data
+        image_link = form.image_link.data
+        seeking_talent = form.seeking_talent.data
+        seeking_description = form.seeking_description.data
+
+        venue = Venue(name=name, city=city, state=state, address=address,
+                      phone=phone, image_link=image_link,
+                      facebook_link=facebook_link,
+                      website=website, seeking_talent=seeking_talent,
+                      seeking_description=seeking_description, genres=genres)
+        db.session.add(venue)
+        db.session.commit()
+        suggestions.add('venue', venue.id, name)
+
+    except:
+        db.session.rollback()
+        error = True
+        print(sys.exc_info())
+
+    finally:
+        db.session.close()
+    # TODO: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Venue ' + data.name +
+    # ' could not be listed.')
+    # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+        if error:
+            flash('An error occurred. Venue ' +
+                  request.form['name'] + ' could not be listed.')
+        else:
+            # on successful db insert, flash success
+            flash('Venue ' + request.form['name'] +
+                  ' was successfully listed!')
+    return render_template('pages/home.html')
+
+
+@bp.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+    # TODO: Complete this endpoint for taking a venue_id, and using
+    # SQLAlchemy ORM to delete a record. Handle cases
+    # where the session commit could fail.
+    try:
+        changed = venue_changed(venue_id)
+        venue = db.session.get(Venue, venue_id)
+        if venue is not None:
+            # Through the session, so the genres relationship removes
+            # the venue's venue_genres rows first.
+            db.session.delete(venue)
+        db.session.commit()
+        suggestions.remove('venue', int(venue_id))
+        page_cache.invalidate(*changed)
+    except:
+        db.session.rollback()
+    finally:
+        db.session.close()
+    return render_template('pages/home.html')
+
+    # BONUS CHALLENGE: Implement a button to delete a Venue on
+    # a Venue Page, have it so that
+    # clicking that button delete it from the db then
+    # redirect the user to the homepage
+    # return None
+
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+    Art = Venue.query.get(venue_id)
+    form = VenueForm(obj=Art)
+    form.genres.data = [genre.name for genre in Art.genres]
+    # TODO: populate form with values from venue with ID <venue_id>
+    return render_template('forms/edit_venue.html', form=form, venue=Art)
+
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+    # TODO: take values from the form submitted, and update existing
+    # venue record with ID <venue_id> using the new attributes
+    form = VenueForm()
+    venEdit = Venue.query.get(venue_id)
+
+    if (venEdit.address, venEdit.city, venEdit.state) != \
+            (form.address.data, form.city.data, form.state.data):
+        # Moved, the next ``flask geocode`` locates it again.
+        venEdit.latitude = venEdit.longitude = venEdit.geocell = None
+    venEdit.name = form.name.data
+    venEdit.genres = genres_named(form.genres.data)
+    venEdit.city = form.city.data
+    venEdit.state = form.state.data
+    venEdit.phone = form.phone.data
+    venEdit.website = form.website.data
+    venEdit.facebook_link = form.facebook_link.data
+    venEdit.seeking_talent = form.seeking_talent.data
+    venEdit.seeking_description = form.seeking_description.data
+    venEdit.image_link = form.image_link.data
+    venEdit.address = form.address.data
+    changed = venue_changed(venue_id)
+    db.session.commit()
+    suggestions.add('venue', venue_id, form.name.data)
+    page_cache.invalidate(*changed)
+    return redirect(url_for('.show_venue', venue_id=venue_id))